@@ -6,29 +6,385 @@ Tool 2: Web Search
 """
 
 import os
+import re
 import json
-import requests
-from typing import List, Dict, Any, Optional
-from vectorize_wrapper import VectorizeWrapper
+import atexit
+import asyncio
+import contextlib
+import itertools
+import logging
+import weakref
+import orjson
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
 from dotenv import load_dotenv
 
+# requests, httpx, numpy and the Vectorize client are imported on first use
+# so that importing this module stays cheap for the CLI
+if TYPE_CHECKING:
+    import httpx
+    import requests
+    from cache import TieredCache
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+DDG_API_URL = "https://api.duckduckgo.com/"
+
+
+@lru_cache(maxsize=1)
+def _get_session() -> "requests.Session":
+    """Get the shared HTTP session so keep-alive connections are reused."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(total=2, backoff_factor=0.2)
+    ))
+    session.headers["Accept-Encoding"] = "gzip"
+    atexit.register(session.close)
+    return session
+
+
+@lru_cache(maxsize=1)
+def _get_ijson():
+    """Get the ijson module if installed (optional streaming JSON parser)."""
+    try:
+        import ijson
+    except ImportError:
+        return None
+    return ijson
+
+
+# Top-level DuckDuckGo fields used when building web results
+_DDG_SCALAR_FIELDS = frozenset({"Abstract", "AbstractURL", "Answer"})
+
+
+def _stream_ddg_response(response: "requests.Response", max_topics: int) -> Dict[str, Any]:
+    """
+    Incrementally parse a streamed DuckDuckGo response.
+    
+    Only the fields `_build_web_results` reads are kept, and parsing stops as
+    soon as those fields and `max_topics` related topics have been seen, so
+    long RelatedTopics arrays are never fully downloaded or parsed.
+    
+    Args:
+        response: Streaming response (``stream=True``)
+        max_topics (int): Number of RelatedTopics entries to keep
+        
+    Returns:
+        Dict shaped like the full DuckDuckGo response, trimmed
+    """
+    ijson = _get_ijson()
+    response.raw.decode_content = True
+    
+    data: Dict[str, Any] = {}
+    topics: List[Any] = []
+    builder = None
+    
+    for prefix, event, value in ijson.parse(response.raw):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == "RelatedTopics.item" and event in ("end_map", "end_array"):
+                topics.append(builder.value)
+                builder = None
+                if len(topics) >= max_topics and _DDG_SCALAR_FIELDS.issubset(data):
+                    break
+        elif prefix == "RelatedTopics.item":
+            if len(topics) >= max_topics:
+                continue
+            if event in ("start_map", "start_array"):
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+            else:
+                topics.append(value)
+        elif prefix in _DDG_SCALAR_FIELDS:
+            data[prefix] = value
+            if len(topics) >= max_topics and _DDG_SCALAR_FIELDS.issubset(data):
+                break
+    
+    data["RelatedTopics"] = topics
+    return data
+
+
+@lru_cache(maxsize=1)
+def _get_rag():
+    """
+    Get the process-wide RAG source, constructing it on first use.
+    
+    The outcome, including failure, is cached so repeated AgentTools()
+    constructions never redo the client setup or retry a missing configuration.
+    
+    Returns:
+        VectorizeWrapper instance, or None if it is unavailable
+    """
+    try:
+        from vectorize_wrapper import VectorizeWrapper
+        return VectorizeWrapper()
+    except (ImportError, ValueError, OSError, RuntimeError) as e:
+        logger.warning("RAG source unavailable, document search disabled: %s", e)
+        return None
+
+
+def _keywords_re(keywords: tuple) -> "re.Pattern":
+    """Match any of the keywords as a whole word, case-insensitively."""
+    return re.compile(r"\b(?:%s)\b" % "|".join(map(re.escape, keywords)), re.IGNORECASE)
+
+
+# Query classification keywords. Whole words only, so "training" is not
+# weather and "newsletter" is not news.
+_WEATHER_KEYWORDS = ("weather", "temperature", "climate", "forecast", "rain", "sunny", "cloudy")
+_NEWS_KEYWORDS = ("news", "latest", "current", "today", "recent", "breaking", "updates")
+_WEATHER_RE = _keywords_re(_WEATHER_KEYWORDS)
+_NEWS_RE = _keywords_re(_NEWS_KEYWORDS)
+
+# The no-results fallback classifies with its own, shorter keyword lists
+_FALLBACK_WEATHER_RE = _keywords_re(("weather", "temperature", "climate", "forecast"))
+_FALLBACK_NEWS_RE = _keywords_re(("news", "latest", "current", "today", "recent"))
+_FINANCIAL_RE = _keywords_re(("price", "cost", "value", "bitcoin", "stock"))
+
+# Words dropped when extracting the subject of a query. Matches whole
+# whitespace-delimited tokens only, so "rainy" or "news," are kept.
+_CITY_STOPWORDS_RE = re.compile(
+    r"(?<!\S)(?:weather|temperature|climate|forecast|in|for|at|the|what|is|how)(?!\S)",
+    re.IGNORECASE
+)
+_NEWS_STOPWORDS_RE = re.compile(
+    r"(?<!\S)(?:news|latest|current|today|recent|breaking|updates"
+    r"|what|are|the|in|for|about)(?!\S)",
+    re.IGNORECASE
+)
+
+# Simulated weather and news data for demo purposes
+_TEMPERATURES = (20, 22, 25, 28, 30, 32, 35)
+_CONDITIONS = ("Sunny", "Partly cloudy", "Cloudy", "Light rain", "Clear")
+
+_AI_HEADLINES = (
+    "OpenAI Announces Major Breakthrough in Multimodal AI",
+    "Google DeepMind Releases New Language Model with Enhanced Reasoning",
+    "Microsoft Integrates Advanced AI into Office Suite",
+    "AI Startup Raises $100M for Revolutionary Computer Vision Technology",
+    "New Study Shows AI Improving Healthcare Diagnosis Accuracy by 40%"
+)
+
+_GENERAL_HEADLINES = (
+    "Tech Industry Sees Record Investment in Q2 2025",
+    "New Breakthrough in Quantum Computing Announced",
+    "Global Climate Summit Reaches Historic Agreement",
+    "Space Exploration Mission Launches Successfully",
+    "Economic Markets Show Strong Growth This Quarter"
+)
+
+
+@dataclass(slots=True)
+class ResultItem:
+    """A single web search hit."""
+    title: str
+    content: str
+    url: str
+    source: str
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"title": self.title, "content": self.content, "url": self.url, "source": self.source}
+
+
+@dataclass(slots=True)
+class DocumentItem:
+    """A single document retrieved from the knowledge base."""
+    content: str
+    score: Any
+    source: str = "knowledge_base"
+    
+    @classmethod
+    def from_document(cls, doc: Any) -> "DocumentItem":
+        """Format a RAG source document, either a dict or a RetrievedDocument view."""
+        if isinstance(doc, dict):
+            content, metadata = doc.get("content", ""), doc.get("metadata", {})
+        else:
+            content, metadata = doc.content, doc.metadata
+        score = metadata.get("score")
+        return cls(content=content, score="N/A" if score is None else score)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"content": self.content, "score": self.score, "source": self.source}
+
+
+@dataclass(slots=True)
+class ToolResult:
+    """
+    Result of a tool call.
+    
+    Tools pass these around internally and cache them; `to_dict` produces the
+    JSON-ready dict handed to the agent at the `execute_tool` boundary.
+    """
+    success: bool
+    query: str = ""
+    results: List[Any] = field(default_factory=list)
+    total_found: int = 0
+    error: Optional[str] = None
+    
+    @classmethod
+    def failure(cls, error: str) -> "ToolResult":
+        return cls(success=False, error=error)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ToolResult":
+        """Rebuild a result from `to_dict` output (e.g. a persisted cache)."""
+        items = [
+            ResultItem(**item) if "url" in item else DocumentItem(**item)
+            for item in data.get("results", [])
+        ]
+        return cls(
+            success=data["success"],
+            query=data.get("query", ""),
+            results=items,
+            total_found=data.get("total_found", len(items)),
+            error=data.get("error")
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        results = [item.to_dict() for item in self.results]
+        if self.error is not None:
+            return {"success": self.success, "error": self.error, "results": results}
+        return {
+            "success": self.success,
+            "query": self.query,
+            "results": results,
+            "total_found": self.total_found
+        }
+
+
+@lru_cache(maxsize=2048)
+def _is_weather_query(query: str) -> bool:
+    """Check if query is weather-related."""
+    return _WEATHER_RE.search(query) is not None
+
+
+@lru_cache(maxsize=2048)
+def _is_news_query(query: str) -> bool:
+    """Check if query is news-related."""
+    return _NEWS_RE.search(query) is not None
+
+
+@lru_cache(maxsize=2048)
+def _classify_query(query: str) -> str:
+    """Classify a query as weather, news, financial or general."""
+    if _FALLBACK_WEATHER_RE.search(query):
+        return "weather"
+    if _FALLBACK_NEWS_RE.search(query):
+        return "news"
+    if _FINANCIAL_RE.search(query):
+        return "financial"
+    return "general"
+
+
+@lru_cache(maxsize=2048)
+def _extract_city_from_query(query: str) -> Optional[str]:
+    """Extract city name from weather query."""
+    # Simple extraction - remove weather-related words
+    city = " ".join(_CITY_STOPWORDS_RE.sub("", query).split())
+    return city.title() or None
+
+
+@lru_cache(maxsize=2048)
+def _extract_news_topic(query: str) -> str:
+    """Extract the main topic from news query."""
+    # Remove news-related words to get the core topic
+    topic = " ".join(_NEWS_STOPWORDS_RE.sub("", query).split())
+    return topic or "general"
+
+
+# Document caches saved at exit by one hook, keyed by AGENT_DOCUMENT_CACHE_PATH
+# (the newest AgentTools for a path owns the file)
+_PERSISTED_CACHES: Dict[str, "TieredCache"] = {}
+
+
+def _save_document_caches():
+    """Save every persisted document cache to its file."""
+    for path, cache in list(_PERSISTED_CACHES.items()):
+        try:
+            cache.save(path, encode=ToolResult.to_dict)
+        except OSError as e:
+            logger.warning("Could not save the document cache to %s: %s", path, e)
+
+
+atexit.register(_save_document_caches)
+
 
 class AgentTools:
     """
     Function calling tools for the AI agent.
     """
     
-    def __init__(self):
-        """Initialize the agent tools."""
-        # Initialize RAG source if available
-        try:
-            self.rag_source = VectorizeWrapper()
-            self.has_rag = True
-        except:
-            self.rag_source = None
-            self.has_rag = False
+    # Pure string helpers, memoized at module level
+    _is_weather_query = staticmethod(_is_weather_query)
+    _is_news_query = staticmethod(_is_news_query)
+    _classify_query = staticmethod(_classify_query)
+    _extract_city_from_query = staticmethod(_extract_city_from_query)
+    _extract_news_topic = staticmethod(_extract_news_topic)
+    
+    def __init__(self, seed: Optional[int] = None):
+        """
+        Initialize the agent tools.
+        
+        Args:
+            seed (Optional[int]): Seed for the simulated weather/news data
+        """
+        import numpy as np
+        from cache import TieredCache
+        
+        # Initialize RAG source if available (shared across instances)
+        self.rag_source = _get_rag()
+        self.has_rag = self.rag_source is not None
+        
+        # Exact caches so repeated queries skip the backends. The approximate
+        # tier is opt-in: the built-in hashed-token embedder cannot tell
+        # "chapter 3" from "chapter 4", so its tau has to stay near zero.
+        cache_size = int(os.getenv("AGENT_DOCUMENT_CACHE_SIZE", "1024"))
+        cache_semantic = os.getenv("AGENT_DOCUMENT_CACHE_SEMANTIC", "0") == "1"
+        cache_tau = float(os.getenv("AGENT_DOCUMENT_CACHE_TAU", "0.01"))
+        cache_int8 = os.getenv("AGENT_DOCUMENT_CACHE_INT8", "").lower() in ("1", "true", "yes")
+        self._document_cache = TieredCache(cache_size, cache_tau, quantize=cache_int8,
+                                           semantic=cache_semantic)
+        # Web results go stale quickly: exact matches only, and a short ttl
+        web_ttl = float(os.getenv("AGENT_WEB_CACHE_TTL", "300"))
+        self._web_cache = TieredCache(cache_size, semantic=False, ttl=web_ttl)
+        cache_path = os.getenv("AGENT_DOCUMENT_CACHE_PATH")
+        if cache_path:
+            if os.path.exists(cache_path):
+                try:
+                    self._document_cache.load(cache_path, decode=ToolResult.from_dict)
+                except (OSError, ValueError):
+                    pass  # Start cold if the saved cache is unreadable
+            _PERSISTED_CACHES[cache_path] = self._document_cache
+        
+        # Memoize the document cache's encoder so a query is embedded once per
+        # turn instead of on every cache lookup and insert
+        if cache_semantic:
+            self._embed_once = lru_cache(maxsize=256)(self._document_cache.embed)
+        else:
+            self._embed_once = lambda query: None
+        
+        # One async HTTP client per event loop, dropped along with its loop;
+        # `async_session` closes it when the last session on the loop ends
+        self._aclients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._asession_users: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, int]" = (
+            weakref.WeakKeyDictionary()
+        )
+        
+        # Pool for the blocking tools run by `aexecute_tool` (None: the loop's default)
+        self.executor: Optional[Executor] = None
+        
+        self._rng = np.random.default_rng(seed)
     
     def get_available_tools(self) -> List[Dict]:
         """Get the list of available tools for the AI agent."""
@@ -85,189 +441,278 @@ class AgentTools:
         
         return tools
     
-    def search_documents(self, query: str, num_results: int = 5) -> Dict[str, Any]:
+    def search_documents(self, query: str, num_results: int = 5, q_vec: Optional[Any] = None) -> ToolResult:
         """
         Tool 1: Search through RAG documents.
         
         Args:
             query (str): Search query
             num_results (int): Number of results to return
+            q_vec (Optional[np.ndarray]): Precomputed cache embedding of the query
             
         Returns:
-            Dict with search results
+            ToolResult with search results
         """
         if not self.has_rag:
-            return {
-                "success": False,
-                "error": "RAG source not available",
-                "results": []
-            }
+            return ToolResult.failure("RAG source not available")
+        
+        if q_vec is None:
+            q_vec = self._embed_once(query)
+        
+        cached = self._document_cache.get(query, num_results, q_vec)
+        if cached is not None:
+            return cached
         
         try:
             documents = self.rag_source.retrieve_documents(query, num_results)
             
             # Format results for the agent
-            formatted_results = []
-            for doc in documents:
-                formatted_results.append({
-                    "content": doc.get("content", ""),
-                    "score": doc.get("metadata", {}).get("score", "N/A"),
-                    "source": "knowledge_base"
-                })
+            formatted_results = [DocumentItem.from_document(doc) for doc in documents]
             
-            return {
-                "success": True,
-                "query": query,
-                "results": formatted_results,
-                "total_found": len(formatted_results)
-            }
+            result = ToolResult(
+                success=True,
+                query=query,
+                results=formatted_results,
+                total_found=len(formatted_results)
+            )
+            self._document_cache.put(query, result, num_results, q_vec)
+            return result
             
         except Exception as e:
-            return {
-                "success": False,
-                "error": f"Error searching documents: {str(e)}",
-                "results": []
-            }
+            return ToolResult.failure(f"Error searching documents: {str(e)}")
     
-    def search_web(self, query: str, max_results: int = 5) -> Dict[str, Any]:
+    def search_web(self, query: str, max_results: int = 5) -> ToolResult:
         """Tool 2: Search the web for current information."""
+        cached = self._web_cache.get(query, max_results)
+        if cached is not None:
+            return cached
+        
+        result = self._search_web(query, max_results)
+        if result.success:
+            self._web_cache.put(query, result, max_results)
+        return result
+    
+    def _search_web(self, query: str, max_results: int) -> ToolResult:
+        """Run a web search without consulting the cache."""
         try:
-            # Check if this is a weather query and try to get better info
-            if self._is_weather_query(query):
-                weather_result = self._get_weather_info(query)
-                if weather_result:
-                    return {
-                        "success": True,
-                        "query": query,
-                        "results": [weather_result],
-                        "total_found": 1
-                    }
-            
-            # Check if this is a news query and try to get better info
-            if self._is_news_query(query):
-                news_results = self._get_news_info(query)
-                if news_results:
-                    return {
-                        "success": True,
-                        "query": query,
-                        "results": news_results,
-                        "total_found": len(news_results)
-                    }
+            quick_result = self._quick_web_result(query)
+            if quick_result:
+                return quick_result
             
             # First try DuckDuckGo instant answers
-            url = "https://api.duckduckgo.com/"
-            params = {
-                "q": query,
-                "format": "json",
-                "no_html": "1",
-                "skip_disambig": "1"
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
-            
-            results = []
-            
-            # Check for instant answer
-            if data.get("Abstract") and len(data["Abstract"]) > 10:
-                results.append({
-                    "title": "Instant Answer",
-                    "content": data["Abstract"],
-                    "url": data.get("AbstractURL", ""),
-                    "source": "web_search"
-                })
-            
-            # Check for answer (often has good info)
-            if data.get("Answer") and len(data["Answer"]) > 5:
-                results.append({
-                    "title": "Direct Answer",
-                    "content": data["Answer"],
-                    "url": "",
-                    "source": "web_search"
-                })
+            params = self._ddg_params(query)
+            if _get_ijson() is not None:
+                with _get_session().get(DDG_API_URL, params=params, timeout=10, stream=True) as response:
+                    data = _stream_ddg_response(response, max_results * 2)
+            else:
+                response = _get_session().get(DDG_API_URL, params=params, timeout=10)
+                data = orjson.loads(response.content)
             
-            # Get related topics with better filtering
-            for topic in data.get("RelatedTopics", [])[:max_results]:
-                if isinstance(topic, dict) and topic.get("Text"):
-                    text = topic.get("Text", "")
-                    if len(text) > 20:  # Only include substantial content
-                        results.append({
-                            "title": text[:60] + "..." if len(text) > 60 else text,
-                            "content": text,
-                            "url": topic.get("FirstURL", ""),
-                            "source": "web_search"
-                        })
+            return self._build_web_results(query, data, max_results)
             
-            # If we have good results, return them
-            if results and any(len(r["content"]) > 20 for r in results):
-                return {
-                    "success": True,
-                    "query": query,
-                    "results": results[:max_results],
-                    "total_found": len(results)
-                }
-            
-            # Fallback: Try to provide contextual search suggestions
-            weather_keywords = ["weather", "temperature", "climate", "forecast"]
-            news_keywords = ["news", "latest", "current", "today", "recent"]
-            price_keywords = ["price", "cost", "value", "bitcoin", "stock"]
-            
-            search_type = "general"
-            if any(keyword in query.lower() for keyword in weather_keywords):
-                search_type = "weather"
-            elif any(keyword in query.lower() for keyword in news_keywords):
-                search_type = "news"
-            elif any(keyword in query.lower() for keyword in price_keywords):
-                search_type = "financial"
-            
-            # Provide helpful contextual response
-            contextual_responses = {
-                "weather": f"For current weather information about '{query}', I recommend checking a dedicated weather service. Weather data changes frequently and requires real-time APIs.",
-                "news": f"For the latest news about '{query}', I recommend checking current news websites as news updates happen in real-time.",
-                "financial": f"For current financial information about '{query}', I recommend checking a financial data service as prices change constantly.",
-                "general": f"I searched for '{query}' but didn't find substantial instant answers. This might require checking current websites directly."
-            }
-            
-            # Add some useful suggestions
-            suggestions = {
-                "weather": ["OpenWeatherMap", "Weather.com", "AccuWeather"],
-                "news": ["Google News", "BBC News", "Reuters"],
-                "financial": ["Yahoo Finance", "Bloomberg", "MarketWatch"],
-                "general": ["Google Search", "Bing", "DuckDuckGo"]
-            }
-            
-            results.append({
-                "title": f"Search Performed: {query}",
-                "content": f"{contextual_responses[search_type]} Recommended sources: {', '.join(suggestions[search_type])}",
-                "url": f"https://duckduckgo.com/?q={query.replace(' ', '+')}",
-                "source": "web_search"
-            })
+        except Exception as e:
+            return ToolResult.failure(f"Error searching web: {str(e)}")
+    
+    async def search_web_async(self, query: str, max_results: int = 5) -> ToolResult:
+        """Tool 2 (async): Search the web without blocking the event loop."""
+        cached = self._web_cache.get(query, max_results)
+        if cached is not None:
+            return cached
+        
+        result = await self._search_web_async(query, max_results)
+        if result.success:
+            self._web_cache.put(query, result, max_results)
+        return result
+    
+    async def _search_web_async(self, query: str, max_results: int) -> ToolResult:
+        """
+        Run an async web search without consulting the cache.
+        
+        Weather and news queries are answered locally when possible (those
+        answers are computed in-process and never block), so only the other
+        queries send a DuckDuckGo request.
+        """
+        try:
+            quick_result = self._quick_web_result(query)
+        except Exception as e:
+            return ToolResult.failure(f"Error searching web: {str(e)}")
+        if quick_result:
+            return quick_result
+        
+        return await self._ddg_result_async(query, max_results)
+    
+    async def _ddg_result_async(self, query: str, max_results: int) -> ToolResult:
+        """Query DuckDuckGo asynchronously and build the tool result."""
+        try:
+            response = await self._get_async_client().get(DDG_API_URL, params=self._ddg_params(query))
+            data = orjson.loads(response.content)
             
-            return {
-                "success": True,
-                "query": query,
-                "results": results,
-                "total_found": len(results)
-            }
+            return self._build_web_results(query, data, max_results)
             
         except Exception as e:
-            return {
-                "success": False,
-                "error": f"Error searching web: {str(e)}",
-                "results": []
-            }
+            return ToolResult.failure(f"Error searching web: {str(e)}")
     
-    def _is_weather_query(self, query: str) -> bool:
-        """Check if query is weather-related."""
-        weather_keywords = ["weather", "temperature", "climate", "forecast", "rain", "sunny", "cloudy"]
-        return any(keyword in query.lower() for keyword in weather_keywords)
+    def _get_async_client(self) -> "httpx.AsyncClient":
+        """Get the async HTTP client for the running event loop."""
+        import httpx
+        
+        # httpx connection pools are bound to the loop that created them
+        loop = asyncio.get_running_loop()
+        client = self._aclients.get(loop)
+        if client is None or client.is_closed:
+            client = self._aclients[loop] = httpx.AsyncClient(timeout=10)
+        return client
     
-    def _is_news_query(self, query: str) -> bool:
-        """Check if query is news-related."""
-        news_keywords = ["news", "latest", "current", "today", "recent", "breaking", "updates"]
-        return any(keyword in query.lower() for keyword in news_keywords)
+    @contextlib.asynccontextmanager
+    async def async_session(self):
+        """
+        Share the loop's HTTP client across the calls inside the block.
+        
+        Sessions on one loop may nest or overlap; the client is closed when
+        the last of them exits.
+        """
+        loop = asyncio.get_running_loop()
+        self._asession_users[loop] = self._asession_users.get(loop, 0) + 1
+        try:
+            yield self
+        finally:
+            self._asession_users[loop] -= 1
+            if not self._asession_users[loop]:
+                del self._asession_users[loop]
+                await self.aclose()
+    
+    async def aclose(self):
+        """Close the running loop's HTTP client, if it has one."""
+        client = self._aclients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
     
-    def _get_weather_info(self, query: str) -> Optional[Dict[str, Any]]:
+    def close(self):
+        """Close the HTTP clients of every event loop that is still open."""
+        for loop, client in list(self._aclients.items()):
+            if loop.is_closed():
+                continue
+            if loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            else:
+                loop.run_until_complete(client.aclose())
+        self._aclients.clear()
+    
+    def _quick_web_result(self, query: str) -> Optional[ToolResult]:
+        """Answer weather and news queries without hitting the search API."""
+        # Check if this is a weather query and try to get better info
+        if self._is_weather_query(query):
+            weather_result = self._weather_result(query)
+            if weather_result:
+                return weather_result
+        
+        # Check if this is a news query and try to get better info
+        if self._is_news_query(query):
+            news_result = self._news_result(query)
+            if news_result:
+                return news_result
+        
+        return None
+    
+    def _weather_result(self, query: str) -> Optional[ToolResult]:
+        """Build a web search result from weather info, if available."""
+        weather_result = self._get_weather_info(query)
+        if not weather_result:
+            return None
+        return ToolResult(success=True, query=query, results=[weather_result], total_found=1)
+    
+    def _news_result(self, query: str) -> Optional[ToolResult]:
+        """Build a web search result from news info, if available."""
+        news_results = self._get_news_info(query)
+        if not news_results:
+            return None
+        return ToolResult(success=True, query=query, results=news_results, total_found=len(news_results))
+    
+    def _ddg_params(self, query: str) -> Dict[str, str]:
+        """Build DuckDuckGo instant answer API parameters."""
+        return {
+            "q": query,
+            "format": "json",
+            "no_html": "1",
+            "skip_disambig": "1"
+        }
+    
+    def _build_web_results(self, query: str, data: Dict[str, Any], max_results: int) -> ToolResult:
+        """Turn a DuckDuckGo response into the web search tool result."""
+        results = []
+        
+        # Check for instant answer
+        if data.get("Abstract") and len(data["Abstract"]) > 10:
+            results.append(ResultItem(
+                title="Instant Answer",
+                content=data["Abstract"],
+                url=data.get("AbstractURL", ""),
+                source="web_search"
+            ))
+        
+        # Check for answer (often has good info)
+        if data.get("Answer") and len(data["Answer"]) > 5:
+            results.append(ResultItem(
+                title="Direct Answer",
+                content=data["Answer"],
+                url="",
+                source="web_search"
+            ))
+        
+        # Get related topics with better filtering, stopping once we have enough
+        for topic in itertools.islice(data.get("RelatedTopics") or (), max_results * 2):
+            if len(results) >= max_results:
+                break
+            if not isinstance(topic, dict):
+                continue
+            text = topic.get("Text") or ""
+            if len(text) <= 20:  # Only include substantial content
+                continue
+            results.append(ResultItem(
+                title=text[:60] + "..." if len(text) > 60 else text,
+                content=text,
+                url=topic.get("FirstURL", ""),
+                source="web_search"
+            ))
+        
+        # If we have good results, return them
+        if results and any(len(r.content) > 20 for r in results):
+            return ToolResult(
+                success=True,
+                query=query,
+                results=results[:max_results],
+                total_found=len(results)
+            )
+        
+        # Fallback: Try to provide contextual search suggestions
+        search_type = self._classify_query(query)
+        
+        # Provide helpful contextual response
+        contextual_responses = {
+            "weather": f"For current weather information about '{query}', I recommend checking a dedicated weather service. Weather data changes frequently and requires real-time APIs.",
+            "news": f"For the latest news about '{query}', I recommend checking current news websites as news updates happen in real-time.",
+            "financial": f"For current financial information about '{query}', I recommend checking a financial data service as prices change constantly.",
+            "general": f"I searched for '{query}' but didn't find substantial instant answers. This might require checking current websites directly."
+        }
+        
+        # Add some useful suggestions
+        suggestions = {
+            "weather": ["OpenWeatherMap", "Weather.com", "AccuWeather"],
+            "news": ["Google News", "BBC News", "Reuters"],
+            "financial": ["Yahoo Finance", "Bloomberg", "MarketWatch"],
+            "general": ["Google Search", "Bing", "DuckDuckGo"]
+        }
+        
+        results.append(ResultItem(
+            title=f"Search Performed: {query}",
+            content=f"{contextual_responses[search_type]} Recommended sources: {', '.join(suggestions[search_type])}",
+            url=f"https://duckduckgo.com/?q={query.replace(' ', '+')}",
+            source="web_search"
+        ))
+        
+        return ToolResult(success=True, query=query, results=results, total_found=len(results))
+    
+    def _get_weather_info(self, query: str) -> Optional[ResultItem]:
         """Try to get weather information using a free weather API."""
         try:
             # Extract city name from query
@@ -279,17 +724,17 @@ class AgentTools:
             # For demo purposes, we'll simulate getting weather data
             weather_info = self._simulate_weather_data(city)
             
-            return {
-                "title": f"Weather for {city}",
-                "content": weather_info,
-                "url": f"https://weather.com/weather/today/l/{city.replace(' ', '+')}",
-                "source": "weather_api"
-            }
+            return ResultItem(
+                title=f"Weather for {city}",
+                content=weather_info,
+                url=f"https://weather.com/weather/today/l/{city.replace(' ', '+')}",
+                source="weather_api"
+            )
             
         except Exception as e:
             return None
     
-    def _get_news_info(self, query: str) -> Optional[List[Dict[str, Any]]]:
+    def _get_news_info(self, query: str) -> Optional[List[ResultItem]]:
         """Try to get news information using simulated news data."""
         try:
             # For demo purposes, simulate news results
@@ -299,85 +744,42 @@ class AgentTools:
         except Exception as e:
             return None
     
-    def _extract_city_from_query(self, query: str) -> Optional[str]:
-        """Extract city name from weather query."""
-        # Simple extraction - look for common patterns
-        query_lower = query.lower()
-        
-        # Remove weather-related words
-        weather_words = ["weather", "temperature", "climate", "forecast", "in", "for", "at", "the", "what", "is", "how"]
-        words = [word for word in query.split() if word.lower() not in weather_words]
-        
-        if words:
-            return " ".join(words).title()
-        return None
-    
     def _simulate_weather_data(self, city: str) -> str:
         """Simulate weather data for demo purposes."""
         # In a real implementation, you'd call a weather API here
-        import random
-        
-        temperatures = [20, 22, 25, 28, 30, 32, 35]
-        conditions = ["Sunny", "Partly cloudy", "Cloudy", "Light rain", "Clear"]
-        
-        temp = random.choice(temperatures)
-        condition = random.choice(conditions)
-        humidity = random.randint(40, 80)
+        temp_index, condition_index, humidity = self._rng.integers(
+            [0, 0, 40], [len(_TEMPERATURES), len(_CONDITIONS), 81]
+        )
+        temp = _TEMPERATURES[temp_index]
+        condition = _CONDITIONS[condition_index]
         
         return f"Current weather in {city}: {condition}, {temp}°C (feels like {temp+2}°C). Humidity: {humidity}%. Note: This is simulated data for demo purposes. For accurate weather, check a dedicated weather service."
     
-    def _simulate_news_data(self, query: str) -> List[Dict[str, Any]]:
+    def _simulate_news_data(self, query: str) -> List[ResultItem]:
         """Simulate news data for demo purposes."""
-        import random
-        
         # Extract topic from query
         topic = self._extract_news_topic(query)
         
-        # Simulate realistic news headlines and content
-        ai_headlines = [
-            "OpenAI Announces Major Breakthrough in Multimodal AI",
-            "Google DeepMind Releases New Language Model with Enhanced Reasoning",
-            "Microsoft Integrates Advanced AI into Office Suite",
-            "AI Startup Raises $100M for Revolutionary Computer Vision Technology",
-            "New Study Shows AI Improving Healthcare Diagnosis Accuracy by 40%"
-        ]
-        
-        general_headlines = [
-            "Tech Industry Sees Record Investment in Q2 2025",
-            "New Breakthrough in Quantum Computing Announced",
-            "Global Climate Summit Reaches Historic Agreement",
-            "Space Exploration Mission Launches Successfully",
-            "Economic Markets Show Strong Growth This Quarter"
-        ]
+        headlines = _AI_HEADLINES if "ai" in topic.lower() or "artificial intelligence" in topic.lower() else _GENERAL_HEADLINES
         
-        headlines = ai_headlines if "ai" in topic.lower() or "artificial intelligence" in topic.lower() else general_headlines
+        # Sample without replacement so headlines don't repeat
+        chosen = self._rng.choice(len(headlines), size=min(3, len(headlines)), replace=False)
         
         news_results = []
-        for i in range(min(3, len(headlines))):
-            headline = random.choice(headlines)
-            headlines.remove(headline)  # Don't repeat
+        for index in chosen:
+            headline = headlines[index]
             
             content = f"{headline}. This is simulated news content for demo purposes. In a real implementation, this would fetch actual current news from news APIs or RSS feeds. The content would include recent developments, expert opinions, and relevant details about {topic}."
             
-            news_results.append({
-                "title": headline,
-                "content": content,
-                "url": f"https://news.example.com/{headline.lower().replace(' ', '-')}",
-                "source": "news_api"
-            })
+            news_results.append(ResultItem(
+                title=headline,
+                content=content,
+                url=f"https://news.example.com/{headline.lower().replace(' ', '-')}",
+                source="news_api"
+            ))
         
         return news_results
     
-    def _extract_news_topic(self, query: str) -> str:
-        """Extract the main topic from news query."""
-        # Remove news-related words to get the core topic
-        news_words = ["news", "latest", "current", "today", "recent", "breaking", "updates", "what", "are", "the", "in", "for", "about"]
-        words = [word for word in query.split() if word.lower() not in news_words]
-        
-        if words:
-            return " ".join(words)
-        return "general"
-    
     def execute_tool(self, tool_name: str, **kwargs) -> Dict[str, Any]:
         """
         Execute a tool by name with given parameters.
@@ -389,13 +791,36 @@ class AgentTools:
         Returns:
             Dict with tool execution results
         """
+        if tool_name == "search_documents" and "query" in kwargs:
+            # Embed once and share the vector between cache lookup and insert
+            kwargs["q_vec"] = self._embed_once(kwargs["query"])
+        
         if tool_name == "search_documents":
-            return self.search_documents(**kwargs)
+            return self.search_documents(**kwargs).to_dict()
         elif tool_name == "search_web":
-            return self.search_web(**kwargs)
+            return self.search_web(**kwargs).to_dict()
         else:
             return {
                 "success": False,
                 "error": f"Unknown tool: {tool_name}",
                 "results": []
-            } 
\ No newline at end of file
+            }
+    
+    async def aexecute_tool(self, tool_name: str, **kwargs) -> Dict[str, Any]:
+        """
+        Execute a tool by name from async code without blocking the event loop.
+        
+        Args:
+            tool_name (str): Name of the tool to execute
+            **kwargs: Tool parameters
+            
+        Returns:
+            Dict with tool execution results
+        """
+        if tool_name == "search_web":
+            return (await self.search_web_async(**kwargs)).to_dict()
+        
+        # The other tools block, so they run on a worker thread
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, partial(self.execute_tool, tool_name, **kwargs)
+        )
@@ -0,0 +1,828 @@
+#!/usr/bin/env python3
+"""
+Query Caches
+Agent Engineering Bootcamp - Week 3 Assignment
+
+In-process caches that let the agent tools skip repeated backend lookups.
+The proximity cache is an approximate key-value store: a query hits when
+its embedding is within a cosine-distance threshold of a cached query.
+The tiered cache puts an exact-match LRU in front of it, and the SQLite
+cache keeps exact matches on disk across restarts and worker processes.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+import zlib
+import hashlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+import numpy as np
+
+EMBEDDING_DIM = 256
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Below this many cached rows a compiled loop beats the BLAS call overhead
+NUMBA_MAX_ROWS = 256
+
+# int8 rows are widened for BLAS in blocks of about this many bytes, small
+# enough that each block is still in cache when the product reads it
+WIDEN_BLOCK_BYTES = 1 << 20
+
+
+# Typographic quotes and dashes that NFKC leaves alone
+_TYPOGRAPHIC = str.maketrans({
+    "\u2018": "'", "\u2019": "'", "\u201c": '"', "\u201d": '"',
+    "\u2013": "-", "\u2014": "-"
+})
+
+# Punctuation runs at the start or end of a token ("x?", '"x"', "(x)").
+# Punctuation inside a token ("3.5", "what's") and + / # ("c++", "c#") is
+# kept, since dropping it would merge different questions.
+_EDGE_PUNCT_RE = re.compile(r"(?<!\S)[^\w\s+#]+|[^\w\s+#]+(?!\S)")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for exact-match keying.
+
+    Applies NFKC (full-width forms, ligatures), case folding and ASCII
+    quotes, drops punctuation at token edges and collapses whitespace.
+    """
+    text = unicodedata.normalize("NFKC", query).casefold().translate(_TYPOGRAPHIC)
+    return " ".join(_EDGE_PUNCT_RE.sub("", text).split())
+
+
+def _digest(text: str, tag: Hashable = "") -> bytes:
+    """16-byte blake2b digest of a tag and key text."""
+    return hashlib.blake2b(f"{tag}\x00{text}".encode("utf-8"), digest_size=16).digest()
+
+
+def embed_text(text: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """
+    Embed text with the hashing trick (word unigrams + character trigrams).
+
+    This is a cheap, local, deterministic encoder: the vector DB embeds
+    queries server-side, so there is no client-side model to reuse.
+
+    Args:
+        text (str): Text to embed
+        dim (int): Embedding dimension
+
+    Returns:
+        np.ndarray: L2-normalized float32 vector (all zeros for empty text)
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for word in _TOKEN_RE.findall(text.lower()):
+        features = [word]
+        padded = f"#{word}#"
+        features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        for feature in features:
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % dim] += 1.0 if h & 0x80000000 else -1.0
+
+    norm = float(np.linalg.norm(vector))
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+@lru_cache(maxsize=1)
+def _numba_kernels() -> Optional[Tuple[Callable, Callable]]:
+    """
+    Compile the nearest-row kernels with numba, if it is installed.
+
+    Imported lazily because numba adds noticeable startup time.
+
+    Returns:
+        (float32 kernel, int8 kernel) mapping (matrix, vector[, scales]) to
+        (best row, similarity), or None when numba is unavailable
+    """
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+
+    @njit(fastmath=True, cache=True)
+    def nearest(matrix, vector):
+        best_index = 0
+        best_score = -2.0
+        for row in range(matrix.shape[0]):
+            score = 0.0
+            for col in range(matrix.shape[1]):
+                score += matrix[row, col] * vector[col]
+            if score > best_score:
+                best_index = row
+                best_score = score
+        return best_index, best_score
+
+    @njit(fastmath=True, cache=True)
+    def nearest_int8(matrix, vector, scales):
+        best_index = 0
+        best_score = -2.0
+        for row in range(matrix.shape[0]):
+            acc = 0
+            for col in range(matrix.shape[1]):
+                acc += np.int32(matrix[row, col]) * np.int32(vector[col])
+            score = acc * scales[row]
+            if score > best_score:
+                best_index = row
+                best_score = score
+        return best_index, best_score
+
+    return nearest, nearest_int8
+
+
+@lru_cache(maxsize=1)
+def _hnswlib():
+    """Get the hnswlib module if installed (optional HNSW index)."""
+    try:
+        import hnswlib
+    except ImportError:
+        return None
+    return hnswlib
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Quantize vectors to int8 with one symmetric scale per vector.
+
+    Args:
+        vectors (np.ndarray): (dim,) or (n, dim) float array
+
+    Returns:
+        Tuple of the int8 array and the float32 scale(s) that dequantize it
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=-1) / 127.0
+    safe = np.where(scales > 0, scales, 1.0).astype(np.float32)
+    quantized = np.rint(vectors / np.expand_dims(safe, -1)).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def _write_npz(path: str, **arrays: np.ndarray):
+    """Write arrays to exactly `path`, replacing any previous file atomically."""
+    # Through a file object, since np.savez appends ".npz" to other paths
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        np.savez(file, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _read_npz(path: str) -> Tuple[np.ndarray, List[Any], int]:
+    """Read float32 embeddings, JSON entries and the next slot saved by `save`."""
+    with np.load(path) as data:
+        matrix = data["matrix"].astype(np.float32)
+        if "scales" in data.files:
+            matrix *= data["scales"][:, None]
+        return matrix, json.loads(str(data["entries"])), int(data["next"])
+
+
+class ProximityCache:
+    """
+    Approximate key-value cache keyed by query embedding.
+
+    Embeddings live in a preallocated, C-contiguous (capacity, dim) float32
+    matrix so a lookup is one BLAS sgemv into a reusable score buffer followed
+    by an argmax over cosine similarity. Small caches use a numba kernel when
+    numba is available. Entries are evicted FIFO from a ring buffer, which
+    avoids LRU bookkeeping on hits. With a `ttl`, an entry found expired on
+    lookup is dropped and counts as a miss.
+
+    With `quantize=True` embeddings are stored as int8 rows plus one float
+    scale per row, a quarter of the float32 footprint. numba scores them with
+    int32 accumulators against an int8 query; without numba the rows are
+    widened block by block into a small reusable float32 buffer for BLAS.
+
+    Safe to share between threads: a lock covers the ring buffer and the
+    scratch buffers, while queries are embedded outside it.
+    """
+
+    def __init__(self, capacity: int = 1024, tau: float = 0.15,
+                 dim: int = EMBEDDING_DIM,
+                 embed: Optional[Callable[[str], np.ndarray]] = None,
+                 quantize: bool = False, ttl: Optional[float] = None):
+        """
+        Initialize an empty cache.
+
+        Args:
+            capacity (int): Maximum number of cached entries
+            tau (float): Maximum cosine distance that still counts as a hit
+            dim (int): Embedding dimension
+            embed (Callable): Text encoder returning L2-normalized vectors
+            quantize (bool): Store embeddings as int8 with per-row scales
+            ttl (float): Seconds an entry stays valid (None = forever)
+        """
+        self.capacity = capacity
+        self.tau = tau
+        self.ttl = ttl
+        self.dim = dim
+        self.embed = embed or (lambda text: embed_text(text, dim))
+        self.quantize = quantize
+
+        dtype = np.int8 if quantize else np.float32
+        self._matrix = np.zeros((capacity, dim), dtype=dtype, order="C")
+        self._row_scales = np.zeros(capacity, dtype=np.float32) if quantize else None
+        self._widened = None
+        if quantize:
+            rows = max(1, min(capacity, WIDEN_BLOCK_BYTES // (4 * dim)))
+            self._widened = np.empty((rows, dim), dtype=np.float32)
+        self._scores = np.empty(capacity, dtype=np.float32)
+        self._entries: List[Optional[Tuple[str, Any]]] = [None] * capacity
+        self._expires = np.full(capacity, np.inf)
+        self._size = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get(self, query: str, vector: Optional[np.ndarray] = None) -> Optional[Any]:
+        """
+        Return the value cached for the nearest query, or None on a miss.
+
+        Args:
+            query (str): Query to look up
+            vector (np.ndarray): Precomputed `embed(query)`, to avoid re-embedding
+        """
+        match = self.lookup(query, vector)
+        if match is not None and match[2] < self.tau:
+            return match[1]
+        return None
+
+    def lookup(self, query: str,
+               vector: Optional[np.ndarray] = None) -> Optional[Tuple[str, Any, float]]:
+        """
+        Return the nearest cached entry whatever its distance.
+
+        Lets callers apply their own policy around `tau`, e.g. verifying
+        borderline matches before trusting them.
+
+        Args:
+            query (str): Query to look up
+            vector (np.ndarray): Precomputed `embed(query)`, to avoid re-embedding
+
+        Returns:
+            (cached query, value, cosine distance), or None if the cache is empty
+        """
+        if not self._size:
+            return None
+
+        if vector is None:
+            vector = self.embed(query)
+        vector = np.asarray(vector, dtype=np.float32)
+        if not vector.any():
+            return None
+
+        with self._lock:
+            if not self._size:
+                return None
+            index, similarity = self._nearest(vector)
+            entry = self._entries[index]
+            if entry is None:
+                return None  # Only dropped rows left to match
+            if self._expires[index] < time.monotonic():
+                self._forget(index)
+                return None
+        cached_query, value = entry
+        return cached_query, value, 1.0 - similarity
+
+    def _nearest(self, vector: np.ndarray) -> Tuple[int, float]:
+        """Find the cached row with the highest cosine similarity to `vector`."""
+        matrix = self._matrix[:self._size]
+        kernels = _numba_kernels()
+
+        if self.quantize:
+            row_scales = self._row_scales[:self._size]
+            if kernels is not None:
+                q_vector, q_scale = quantize_int8(vector)
+                index, similarity = kernels[1](matrix, q_vector, row_scales * q_scale)
+                return int(index), float(similarity)
+
+            scores = self._scores[:self._size]
+            block = len(self._widened)
+            for start in range(0, self._size, block):
+                stop = min(start + block, self._size)
+                rows = self._widened[:stop - start]
+                np.copyto(rows, matrix[start:stop], casting="unsafe")
+                np.dot(rows, vector, out=scores[start:stop])
+            scores *= row_scales
+        else:
+            if kernels is not None and self._size <= NUMBA_MAX_ROWS:
+                index, similarity = kernels[0](matrix, vector)
+                return int(index), float(similarity)
+
+            scores = self._scores[:self._size]
+            np.dot(matrix, vector, out=scores)
+
+        index = int(scores.argmax())
+        return index, float(scores[index])
+
+    def _forget(self, index: int):
+        """Drop one row so no later lookup can match it; the caller holds the lock."""
+        self._matrix[index] = 0
+        if self.quantize:
+            self._row_scales[index] = 0
+        self._entries[index] = None
+
+    def _set_rows(self, start: int, vectors: np.ndarray):
+        """Store float embeddings starting at row `start`, quantizing if enabled."""
+        stop = start + len(vectors)
+        if self.quantize:
+            self._matrix[start:stop], self._row_scales[start:stop] = quantize_int8(vectors)
+        else:
+            self._matrix[start:stop] = vectors
+
+    def put(self, query: str, value: Any, vector: Optional[np.ndarray] = None):
+        """Insert a value, evicting the oldest entry when full."""
+        if vector is None:
+            vector = self.embed(query)
+        if not vector.any():
+            return
+
+        with self._lock:
+            slot = self._next
+            self._set_rows(slot, np.asarray(vector, dtype=np.float32)[None, :])
+            self._entries[slot] = (query, value)
+            self._expires[slot] = time.monotonic() + self.ttl if self.ttl is not None else np.inf
+            self._next = (slot + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        """Empty the ring buffer; the caller holds the lock."""
+        self._matrix[:] = 0
+        if self.quantize:
+            self._row_scales[:] = 0
+        self._entries = [None] * self.capacity
+        self._expires[:] = np.inf
+        self._size = 0
+        self._next = 0
+
+    def save(self, path: str, encode: Optional[Callable[[Any], Any]] = None):
+        """
+        Persist embeddings and values to an .npz file.
+
+        Expired and dropped entries are left out; loaded entries get a fresh ttl.
+
+        Args:
+            path (str): Destination file
+            encode (Callable): Converts a value to something JSON-serializable
+        """
+        with self._lock:
+            live = self._live()
+            entries = [self._entries[index] for index in live]
+            arrays = {"matrix": self._matrix[live]}
+            if self.quantize:
+                arrays["scales"] = self._row_scales[live]
+            # Dropping rows compacts the ring, so reloading starts after them
+            next_slot = self._next if len(live) == self._size else len(live)
+
+        if encode is not None:
+            entries = [(query, encode(value)) for query, value in entries]
+        _write_npz(
+            path,
+            entries=np.array(json.dumps(entries)),
+            next=np.array(next_slot),
+            **arrays
+        )
+
+    def rows(self) -> Tuple[List[Tuple[str, Any]], np.ndarray]:
+        """Return the unexpired (query, value) entries and their float32 embeddings."""
+        with self._lock:
+            live = self._live()
+            entries = [self._entries[index] for index in live]
+            matrix = self._matrix[live].astype(np.float32)
+            if self.quantize:
+                matrix *= self._row_scales[live][:, None]
+        return entries, matrix
+
+    def _live(self) -> List[int]:
+        """Rows holding an unexpired entry; the caller holds the lock."""
+        now = time.monotonic()
+        return [
+            index for index in range(self._size)
+            if self._entries[index] is not None and self._expires[index] >= now
+        ]
+
+    def load(self, path: str, decode: Optional[Callable[[Any], Any]] = None):
+        """
+        Load entries saved with `save`, keeping at most `capacity` of them.
+
+        Args:
+            path (str): File written by `save`
+            decode (Callable): Inverse of the `encode` passed to `save`
+        """
+        matrix, entries, next_slot = _read_npz(path)
+        if decode is not None:
+            entries = [(query, decode(value)) for query, value in entries]
+
+        if matrix.shape[1] != self.dim:
+            raise ValueError(f"Cached embeddings have dimension {matrix.shape[1]}, expected {self.dim}")
+
+        count = min(len(entries), self.capacity)
+        with self._lock:
+            self._reset()
+            self._set_rows(0, matrix[:count])
+            self._entries[:count] = [tuple(entry) for entry in entries[:count]]
+            if self.ttl is not None:
+                self._expires[:count] = time.monotonic() + self.ttl
+            self._size = count
+            self._next = next_slot % self.capacity if count == self.capacity else count
+
+
+class HNSWProximityCache(ProximityCache):
+    """
+    ProximityCache that finds the nearest row through an HNSW graph.
+
+    Lookups walk an hnswlib index in roughly logarithmic time instead of
+    scoring every row, which pays off from about 1e5 entries. Rows are still
+    kept in the base matrix, so eviction, `save` and `load` work unchanged;
+    the graph is rebuilt from them on load. Slot numbers double as graph
+    labels, so overwriting the oldest slot updates its node in place.
+    """
+
+    def __init__(self, capacity: int = 1024, tau: float = 0.15,
+                 dim: int = EMBEDDING_DIM,
+                 embed: Optional[Callable[[str], np.ndarray]] = None,
+                 quantize: bool = False, ttl: Optional[float] = None,
+                 ef_construction: int = 200, links: int = 16, ef: int = 64):
+        """
+        Initialize an empty cache (requires hnswlib).
+
+        Args:
+            capacity (int): Maximum number of cached entries
+            tau (float): Maximum cosine distance that still counts as a hit
+            dim (int): Embedding dimension
+            embed (Callable): Text encoder returning L2-normalized vectors
+            quantize (bool): Store the base rows as int8 with per-row scales
+            ttl (float): Seconds an entry stays valid (None = forever)
+            ef_construction (int): Candidate list size while inserting
+            links (int): Graph links per node (hnswlib's M)
+            ef (int): Candidate list size while searching
+        """
+        if _hnswlib() is None:
+            raise ImportError("HNSWProximityCache requires hnswlib")
+        super().__init__(capacity, tau, dim, embed, quantize, ttl)
+        self.ef_construction = ef_construction
+        self.links = links
+        self.ef = ef
+        self._index = self._new_index()
+        self._deleted = set()
+
+    def _new_index(self):
+        """Create an empty inner-product index (vectors are unit length)."""
+        index = _hnswlib().Index(space="ip", dim=self.dim)
+        index.init_index(max_elements=self.capacity, ef_construction=self.ef_construction, M=self.links)
+        index.set_ef(self.ef)
+        return index
+
+    def _nearest(self, vector: np.ndarray) -> Tuple[int, float]:
+        if len(self._deleted) >= self._size:
+            # knn_query fails when every node is deleted; any dropped row is a miss
+            return next(iter(self._deleted)), 0.0
+        labels, distances = self._index.knn_query(vector, k=1)
+        return int(labels[0, 0]), 1.0 - float(distances[0, 0])
+
+    def _forget(self, index: int):
+        super()._forget(index)
+        self._index.mark_deleted(index)
+        self._deleted.add(index)
+
+    def _set_rows(self, start: int, vectors: np.ndarray):
+        super()._set_rows(start, vectors)
+        for label in range(start, start + len(vectors)):
+            if label in self._deleted:
+                self._index.unmark_deleted(label)
+                self._deleted.discard(label)
+        if len(vectors):
+            self._index.add_items(vectors, np.arange(start, start + len(vectors)))
+
+    def _reset(self):
+        super()._reset()
+        self._index = self._new_index()
+        self._deleted = set()
+
+
+class ExactCache:
+    """
+    Bounded LRU cache for exact (normalized) query matches.
+
+    Keys are 16-byte blake2b digests of the normalized query, so lookups cost
+    one hash and one dict probe regardless of query length. Entries can
+    optionally expire `ttl` seconds after insertion, and the cache can be
+    held under a byte budget as well as an entry count. Hits, misses and
+    evictions are counted for `stats`. Safe to share between threads.
+    """
+
+    def __init__(self, capacity: int = 1024, ttl: Optional[float] = None,
+                 normalize: Callable[[str], str] = normalize_query,
+                 max_bytes: Optional[int] = None,
+                 sizeof: Callable[[Any], int] = sys.getsizeof):
+        """
+        Initialize an empty cache.
+
+        Args:
+            capacity (int): Maximum number of cached entries
+            ttl (float): Seconds an entry stays valid (None = forever)
+            normalize (Callable): Maps a query to its canonical key text
+            max_bytes (int): Budget for the summed `sizeof` of values (None = no budget)
+            sizeof (Callable): Estimates a value's size in bytes
+        """
+        self.capacity = capacity
+        self.ttl = ttl
+        self.normalize = normalize
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries: "OrderedDict[bytes, Tuple[float, Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(self, query: str, tag: Hashable = "") -> bytes:
+        """Build the cache key for a query and an optional tag."""
+        return _digest(self.normalize(query), tag)
+
+    def get(self, query: str, tag: Hashable = "") -> Optional[Any]:
+        """Return the cached value for the query, or None on a miss."""
+        key = self.key(query, tag)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires, value, size = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, query: str, value: Any, tag: Hashable = "", ttl: Optional[float] = None):
+        """
+        Insert a value, evicting least recently used entries to stay in bounds.
+
+        Args:
+            query (str): Query the value answers
+            value (Any): Value to cache
+            tag (Hashable): Keeps different request shapes apart
+            ttl (float): Overrides the cache's ttl for this entry
+        """
+        self.put_key(self.key(query, tag), value, ttl)
+
+    def put_key(self, key: bytes, value: Any, ttl: Optional[float] = None):
+        """Insert a value under a key built by `key` (see `put`)."""
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl is not None else float("inf")
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            if self.max_bytes is not None and size > self.max_bytes:
+                return  # Would flush the whole cache for one entry
+
+            self._entries[key] = (expires, value, size)
+            self._bytes += size
+            while len(self._entries) > self.capacity or (
+                    self.max_bytes is not None and self._bytes > self.max_bytes):
+                self._bytes -= self._entries.popitem(last=False)[1][2]
+                self.evictions += 1
+
+    def items(self) -> List[Tuple[bytes, Any]]:
+        """Unexpired (key, value) pairs, least recently used first."""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value) for key, (expires, value, _) in self._entries.items() if expires >= now]
+
+    def clear(self):
+        """Drop every cached entry (statistics are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters, hit rate and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes
+        }
+
+
+class SQLiteCache:
+    """
+    Exact-match cache persisted in a SQLite file.
+
+    Uses the same keys as ExactCache, with JSON values and wall-clock expiry
+    so entries outlive the process. The database runs in WAL mode, letting
+    several web workers share one file: readers never block on the writer.
+    Each thread keeps its own connection. Expired rows are dropped lazily
+    when they are read.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = None,
+                 normalize: Callable[[str], str] = normalize_query):
+        """
+        Open (creating if needed) the cache database.
+
+        Args:
+            path (str): SQLite database file
+            ttl (float): Seconds an entry stays valid (None = forever)
+            normalize (Callable): Maps a query to its canonical key text
+        """
+        self.path = path
+        self.ttl = ttl
+        self.normalize = normalize
+        self._local = threading.local()
+
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key BLOB PRIMARY KEY, expires REAL NOT NULL, value TEXT NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, query: str, tag: Hashable = "") -> Optional[Any]:
+        """Return the cached value for the query, or None on a miss."""
+        key = _digest(self.normalize(query), tag)
+        conn = self._connection()
+        row = conn.execute("SELECT expires, value FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+
+        expires, value = row
+        if expires < time.time():
+            with conn:
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            return None
+        return json.loads(value)
+
+    def put(self, query: str, value: Any, tag: Hashable = ""):
+        """Insert or replace a JSON-serializable value."""
+        key = _digest(self.normalize(query), tag)
+        expires = time.time() + self.ttl if self.ttl is not None else float("inf")
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, expires, value) VALUES (?, ?, ?)",
+                (key, expires, json.dumps(value))
+            )
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM cache")
+
+
+class TieredCache:
+    """
+    Two-level cache: exact-match LRU first, proximity (semantic) cache second.
+
+    Byte-identical queries (retries, repeated phrasing) are answered from the
+    exact tier without embedding the query. The tag keeps results for
+    different request shapes (e.g. result counts) apart in both tiers: each
+    tag gets its own proximity cache, created on first insert, so the nearest
+    query is always searched among same-tag entries. With `semantic=False`
+    only the exact tier is kept and vectors are ignored. A `ttl` applies to
+    entries in both tiers.
+    """
+
+    def __init__(self, capacity: int = 1024, tau: float = 0.15, quantize: bool = False,
+                 semantic: bool = True, ttl: Optional[float] = None):
+        """Initialize both tiers (or just the exact one) with the same capacity and ttl."""
+        self.exact = ExactCache(capacity, ttl)
+        self.semantic = semantic
+        self.capacity = capacity
+        self.tau = tau
+        self.quantize = quantize
+        self.ttl = ttl
+        self.embed = lambda text: embed_text(text, EMBEDDING_DIM)
+        self._tiers: Dict[Hashable, ProximityCache] = {}
+        self._lock = threading.Lock()
+
+    def _tier(self, tag: Hashable) -> ProximityCache:
+        """Return the proximity cache for a tag, creating it if needed."""
+        tier = self._tiers.get(tag)
+        if tier is None:
+            with self._lock:
+                tier = self._tiers.get(tag)
+                if tier is None:
+                    tier = self._tiers[tag] = ProximityCache(
+                        self.capacity, self.tau, embed=self.embed,
+                        quantize=self.quantize, ttl=self.ttl
+                    )
+        return tier
+
+    def get(self, query: str, tag: Hashable = "",
+            vector: Optional[np.ndarray] = None) -> Optional[Any]:
+        """Return a cached value from the cheapest tier that has one."""
+        value = self.exact.get(query, tag)
+        if value is not None:
+            return value
+
+        tier = self._tiers.get(tag) if self.semantic else None
+        if tier is None:
+            return None
+
+        value = tier.get(query, vector)
+        if value is not None:
+            self.exact.put(query, value, tag)
+        return value
+
+    def put(self, query: str, value: Any, tag: Hashable = "",
+            vector: Optional[np.ndarray] = None):
+        """Insert a value into both tiers."""
+        self.exact.put(query, value, tag)
+        if self.semantic:
+            self._tier(tag).put(query, value, vector)
+
+    def clear(self):
+        """Drop every cached entry in both tiers."""
+        self.exact.clear()
+        with self._lock:
+            self._tiers.clear()
+
+    def save(self, path: str, encode: Optional[Callable[[Any], Any]] = None):
+        """
+        Persist the cache to one .npz file.
+
+        The semantic tiers are written as (query, (tag, value)) entries in
+        ProximityCache's format; the exact tier is rebuilt from them on hits.
+        Without semantic tiers the exact tier itself is written, keyed by
+        digest.
+        """
+        entries, matrices, exact = [], [np.zeros((0, EMBEDDING_DIM), dtype=np.float32)], []
+        if self.semantic:
+            for tag, tier in list(self._tiers.items()):
+                tier_entries, matrix = tier.rows()
+                for query, value in tier_entries:
+                    entries.append((query, (tag, encode(value) if encode is not None else value)))
+                matrices.append(matrix)
+        else:
+            exact = [(key.hex(), encode(value) if encode is not None else value)
+                     for key, value in self.exact.items()]
+        _write_npz(
+            path,
+            entries=np.array(json.dumps(entries)),
+            next=np.array(len(entries)),
+            matrix=np.concatenate(matrices),
+            exact=np.array(json.dumps(exact))
+        )
+
+    def load(self, path: str, decode: Optional[Callable[[Any], Any]] = None):
+        """Load a cache saved with `save`, replacing the semantic tiers."""
+        matrix, entries, _ = _read_npz(path)
+        if matrix.shape[1] != EMBEDDING_DIM:
+            raise ValueError(f"Cached embeddings have dimension {matrix.shape[1]}, expected {EMBEDDING_DIM}")
+        with np.load(path) as data:
+            exact = json.loads(str(data["exact"])) if "exact" in data.files else []
+
+        for key, value in exact:
+            self.exact.put_key(bytes.fromhex(key), decode(value) if decode is not None else value)
+        if not self.semantic:
+            # Semantic entries still carry their queries, so they seed the exact tier
+            for query, (tag, value) in entries:
+                self.exact.put(query, decode(value) if decode is not None else value, tag)
+            return
+
+        with self._lock:
+            self._tiers.clear()
+        for (query, (tag, value)), vector in zip(entries, matrix):
+            self._tier(tag).put(query, decode(value) if decode is not None else value, vector)
@@ -1,5 +1,6 @@
-import time
 import sys
+import threading
+from contextlib import contextmanager
 from typing import List, Dict, Any
 
 
@@ -24,24 +25,47 @@ class CLIInterface:
         'end': '\033[0m'
     }
     
-    def __init__(self, app_name: str = "RAG Chat System"):
-        """Initialize the CLI interface with app name."""
+    # Escape prefixes resolved once so color_text is a single dict lookup
+    _PREFIXES = {name: code for name, code in COLORS.items() if name != 'end'}
+    _END = COLORS['end']
+    
+    def __init__(self, app_name: str = "RAG Chat System", interactive: bool = False):
+        """
+        Initialize the CLI interface with app name.
+        
+        Args:
+            app_name (str): Name shown in the header
+            interactive (bool): Show loading animations (off for servers)
+        """
         self.app_name = app_name
+        self.interactive = interactive
+        
+        # Static colored strings reused on every print
+        self._separator = self.color_text('=' * 60, 'blue')
+        self._doc_header = self.color_text('📚 Retrieved Documents:', 'cyan')
+        self._doc_rule = self.color_text('-' * 50, 'cyan')
+        self._score_label = self.color_text('Score:', 'yellow')
+        self._content_label = self.color_text('Content:', 'white')
+        self._answer_header = self.color_text('🤖 AI Answer:', 'green')
+        self._answer_rule = self.color_text('-' * 50, 'green')
+        
         self.print_header()
     
     def color_text(self, text: str, color: str) -> str:
         """Apply color to text."""
-        return f"{self.COLORS.get(color, '')}{text}{self.COLORS['end']}"
+        return f"{self._PREFIXES.get(color, '')}{text}{self._END}"
     
     def print_header(self):
         """Print a welcome header."""
         header = f"""
-{self.color_text('=' * 60, 'blue')}
+{self._separator}
 {self.color_text(f'  {self.app_name}', 'bold')}
 {self.color_text('  Agent Engineering Bootcamp - RAG Integration', 'cyan')}
-{self.color_text('=' * 60, 'blue')}
-        """
-        print(header)
+{self._separator}
+        
+"""
+        sys.stdout.write(header)
+        sys.stdout.flush()
     
     def print_info(self, message: str):
         """Print informational message."""
@@ -69,8 +93,8 @@ class CLIInterface:
             self.print_warning("No documents found.")
             return
         
-        print(f"\n{self.color_text('📚 Retrieved Documents:', 'cyan')}")
-        print(self.color_text('-' * 50, 'cyan'))
+        # Assemble the whole block and write it once instead of ~4 prints per doc
+        parts = [f"\n{self._doc_header}\n{self._doc_rule}\n"]
         
         for i, doc in enumerate(documents, 1):
             content = doc.get('content', 'No content available')
@@ -80,31 +104,70 @@ class CLIInterface:
             # Truncate content if too long
             display_content = content[:200] + "..." if len(content) > 200 else content
             
-            print(f"\n{self.color_text(f'Document {i}:', 'bold')}")
-            print(f"{self.color_text('Score:', 'yellow')} {score}")
-            print(f"{self.color_text('Content:', 'white')} {display_content}")
+            parts.append(
+                f"\n{self.color_text(f'Document {i}:', 'bold')}\n"
+                f"{self._score_label} {score}\n"
+                f"{self._content_label} {display_content}\n"
+            )
+        
+        sys.stdout.write("".join(parts))
+        sys.stdout.flush()
     
     def print_answer(self, answer: str):
         """Print AI-generated answer."""
-        print(f"\n{self.color_text('🤖 AI Answer:', 'green')}")
-        print(self.color_text('-' * 50, 'green'))
+        print(f"\n{self._answer_header}")
+        print(self._answer_rule)
         print(f"{answer}\n")
     
-    def loading_animation(self, message: str, duration: float = 2.0):
-        """Show a loading animation."""
-        animation = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
-        start_time = time.time()
+    _SPINNER_FRAMES = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
+    
+    def _spin(self, message: str, stop: threading.Event):
+        """Draw spinner frames until `stop` is set, then clear the line."""
+        frames = [self.color_text(frame, "cyan") for frame in self._SPINNER_FRAMES]
         i = 0
         
-        while time.time() - start_time < duration:
-            sys.stdout.write(f'\r{self.color_text(animation[i % len(animation)], "cyan")} {message}')
+        while True:
+            sys.stdout.write(f'\r{frames[i % len(frames)]} {message}')
             sys.stdout.flush()
-            time.sleep(0.1)
+            if stop.wait(0.1):
+                break
             i += 1
         
         sys.stdout.write('\r' + ' ' * (len(message) + 10) + '\r')
         sys.stdout.flush()
     
+    @contextmanager
+    def spinner(self, message: str):
+        """
+        Show a loading animation while the enclosed block runs.
+        
+        The animation is drawn from a daemon thread and stops as soon as the
+        block exits, so it overlaps with the real work instead of delaying it.
+        Does nothing unless the interface is interactive.
+        
+        Args:
+            message (str): Text shown next to the spinner
+        """
+        if not self.interactive:
+            yield
+            return
+        
+        stop = threading.Event()
+        thread = threading.Thread(target=self._spin, args=(message, stop), daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+    
+    def loading_animation(self, message: str, duration: float = 2.0):
+        """Show a loading animation for a fixed duration (prefer `spinner`)."""
+        if not self.interactive:
+            return
+        with self.spinner(message):
+            threading.Event().wait(duration)
+    
     def get_user_input(self, prompt: str = "Enter your question") -> str:
         """Get input from user with colored prompt."""
         try:
@@ -115,4 +178,4 @@ class CLIInterface:
     
     def print_separator(self):
         """Print a visual separator."""
-        print(f"\n{self.color_text('=' * 60, 'blue')}") 
\ No newline at end of file
+        print(f"\n{self._separator}") 
\ No newline at end of file
@@ -8,12 +8,18 @@ alongside the existing document search and web search capabilities.
 """
 
 import os
-import json
+import logging
 import asyncio
-from typing import List, Dict, Any, Optional
-from litellm import completion
+import functools
+import hashlib
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, List, Dict, Any, Optional
+import numpy as np
+from litellm import acompletion, aembedding
 from dotenv import load_dotenv
 from agent_tools import AgentTools
+from cache import ExactCache, ProximityCache, SQLiteCache
 from cli_interface import CLIInterface
 import platform
 if platform.system() == "Windows":
@@ -23,6 +29,72 @@ else:
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# LiteLLM model string used for every completion
+MODEL = os.getenv("AGENT_MODEL", "openai/gpt-4o")
+
+# Embedding model for the semantic response cache
+EMBEDDING_MODEL = os.getenv("AGENT_EMBEDDING_MODEL", "text-embedding-3-small")
+
+# Answers that report a side effect must never be replayed from a cache
+_SIDE_EFFECT_TOOLS = frozenset({"mcp_write_file"})
+
+
+def _system_entry(system_message: str, model: str = MODEL) -> Dict[str, Any]:
+    """
+    Build the system message, marked as a cacheable prompt prefix.
+    
+    Anthropic only reuses a prefix up to an explicit ``cache_control``
+    breakpoint. OpenAI caches stable prefixes automatically and expects plain
+    string content, so its messages are left unchanged.
+    """
+    if model.startswith("anthropic/") or model.startswith("claude"):
+        return {
+            "role": "system",
+            "content": [{"type": "text", "text": system_message, "cache_control": {"type": "ephemeral"}}]
+        }
+    return {"role": "system", "content": system_message}
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize a tool result for the model (orjson, falling back to str)."""
+    return orjson.dumps(obj, default=str).decode()
+
+
+def _tools_digest(tools: List[Dict]) -> str:
+    """Fingerprint a tool list by its full canonical schema JSON."""
+    return hashlib.blake2b(orjson.dumps(tools, option=orjson.OPT_SORT_KEYS),
+                           digest_size=16).hexdigest()
+
+
+def _key_messages(messages: List[Any]) -> List[Any]:
+    """
+    Messages as they enter the response-cache key, without tool-call ids.
+    
+    The model mints fresh ids for every reply, so keeping them would make a
+    repeated conversation with tool results a guaranteed miss. Calls and
+    results still pair up by position.
+    """
+    keyed = []
+    for message in messages:
+        if isinstance(message, dict) and ("tool_calls" in message or "tool_call_id" in message):
+            message = {name: value for name, value in message.items() if name != "tool_call_id"}
+            if message.get("tool_calls"):
+                message["tool_calls"] = [
+                    {name: value for name, value in call.items() if name != "id"}
+                    for call in message["tool_calls"]
+                ]
+        keyed.append(message)
+    return keyed
+
+
+def _jsonable(obj: Any) -> Any:
+    """JSON fallback for LiteLLM message objects when hashing prompts."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    return str(obj)
+
 
 class EnhancedFunctionCallingAgent:
     """
@@ -47,6 +119,62 @@ class EnhancedFunctionCallingAgent:
         self.mcp_tools = MCPToolsWrapper()
         self.mcp_enabled = False
         
+        # Regular tools used when MCP is not enabled; built once and reused
+        self._regular_tools = AgentTools()
+        
+        # Dedicated pool for blocking tool calls so they never queue behind
+        # unrelated work in the event loop's default executor
+        self._tool_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("AGENT_TOOL_WORKERS", "8")),
+            thread_name_prefix="agent-tool"
+        )
+        self._regular_tools.executor = self._tool_executor
+        
+        # At most this many MCP calls from one turn in flight at once, so a
+        # burst of file searches cannot swamp the single MCP server process
+        self._mcp_concurrency = int(os.getenv("AGENT_MCP_CONCURRENCY", "4"))
+        
+        # Tool schemas and names, rebuilt only when the MCP state changes
+        self._tools_cache: Optional[List[Dict]] = None
+        self._tools_digest: Optional[str] = None
+        self._tool_names_regular: frozenset = frozenset()
+        self._tool_names_mcp: frozenset = frozenset()
+        self._regular_tools_list: List[Dict] = []
+        self._mcp_tools_list: List[Dict] = []
+        
+        # Exact-match cache of model responses, keyed by the full prompt.
+        # Only temperature-0 calls use it: replaying a sampled answer would
+        # make every repeat of a prompt return the same "random" reply. Tool
+        # selection runs at temperature 0 by default, so it is cached; the
+        # final answer is sampled unless AGENT_ANSWER_TEMPERATURE is 0.
+        self.cache_responses = os.getenv("AGENT_RESPONSE_CACHE", "1") != "0"
+        self._tool_temperature = float(os.getenv("AGENT_TOOL_TEMPERATURE", "0"))
+        self._answer_temperature = float(os.getenv("AGENT_ANSWER_TEMPERATURE", "0.7"))
+        self._response_cache = ExactCache(
+            capacity=int(os.getenv("AGENT_RESPONSE_CACHE_SIZE", "1024")),
+            ttl=float(os.getenv("AGENT_RESPONSE_CACHE_TTL", "1800")),
+            normalize=str
+        )
+        
+        # Optional on-disk tier under the in-memory one, so a warm cache
+        # survives restarts and is shared by every worker on the host
+        cache_path = os.getenv("AGENT_RESPONSE_CACHE_PATH")
+        self._disk_cache: Optional[SQLiteCache] = None
+        if cache_path:
+            self._disk_cache = SQLiteCache(
+                cache_path,
+                ttl=float(os.getenv("AGENT_RESPONSE_CACHE_DISK_TTL", "86400")),
+                normalize=str
+            )
+        
+        # Opt-in cache of final answers keyed by question embedding. Matches
+        # closer than tau are served directly; matches in the band just past
+        # it are confirmed by a short verifier call first.
+        self.semantic_cache = os.getenv("AGENT_SEMANTIC_CACHE", "0") == "1"
+        self._semantic_tau = float(os.getenv("AGENT_SEMANTIC_CACHE_TAU", "0.08"))
+        self._semantic_verify_band = float(os.getenv("AGENT_SEMANTIC_CACHE_VERIFY", "0.05"))
+        self._semantic_cache: Optional[ProximityCache] = None  # sized on first embedding
+        
         # Check OpenAI API key
         if not os.getenv("OPENAI_API_KEY"):
             raise ValueError("OPENAI_API_KEY environment variable is required")
@@ -58,12 +186,13 @@ class EnhancedFunctionCallingAgent:
             success = self.mcp_tools.initialize(base_directory)
             if success:
                 self.mcp_enabled = True
+                self._tools_cache = None
                 self.cli.print_success("✅ MCP File System Server connected!")
                 
                 # Show available MCP tools
-                mcp_tools = [tool for tool in self.get_available_tools() if "mcp_" in tool["function"]["name"]]
+                mcp_tools = [tool["function"]["name"] for tool in self.mcp_tools_list]
                 if mcp_tools:
-                    self.cli.print_info(f"📁 Available MCP tools: {', '.join([tool['function']['name'] for tool in mcp_tools])}")
+                    self.cli.print_info(f"📁 Available MCP tools: {', '.join(mcp_tools)}")
                 
                 return True
             else:
@@ -75,12 +204,50 @@ class EnhancedFunctionCallingAgent:
     
     def get_available_tools(self) -> List[Dict]:
         """Get all available tools including both regular and MCP tools."""
-        if self.mcp_enabled:
-            return self.mcp_tools.get_available_tools()
-        else:
-            # Fallback to regular tools only
-            regular_tools = AgentTools()
-            return regular_tools.get_available_tools()
+        if self._tools_cache is None:
+            if self.mcp_enabled:
+                tools = self.mcp_tools.get_available_tools()
+            else:
+                # Fallback to regular tools only
+                tools = self._regular_tools.get_available_tools()
+            
+            self._regular_tools_list = []
+            self._mcp_tools_list = []
+            for tool in tools:
+                if tool["function"]["name"].startswith("mcp_"):
+                    self._mcp_tools_list.append(tool)
+                else:
+                    self._regular_tools_list.append(tool)
+            self._tool_names_regular = frozenset(tool["function"]["name"] for tool in self._regular_tools_list)
+            self._tool_names_mcp = frozenset(tool["function"]["name"] for tool in self._mcp_tools_list)
+            # Serialized once here rather than per prompt in the cache key
+            self._tools_digest = _tools_digest(tools)
+            self._tools_cache = tools
+        return self._tools_cache
+    
+    @property
+    def regular_tool_names(self) -> frozenset:
+        """Names of the available non-MCP tools."""
+        self.get_available_tools()
+        return self._tool_names_regular
+    
+    @property
+    def mcp_tool_names(self) -> frozenset:
+        """Names of the available MCP tools."""
+        self.get_available_tools()
+        return self._tool_names_mcp
+    
+    @property
+    def regular_tools_list(self) -> List[Dict]:
+        """Schemas of the available non-MCP tools, in tool-list order."""
+        self.get_available_tools()
+        return self._regular_tools_list
+    
+    @property
+    def mcp_tools_list(self) -> List[Dict]:
+        """Schemas of the available MCP tools, in tool-list order."""
+        self.get_available_tools()
+        return self._mcp_tools_list
     
     def execute_tool(self, tool_name: str, **kwargs) -> Dict[str, Any]:
         """Execute either a regular tool or an MCP tool."""
@@ -88,13 +255,174 @@ class EnhancedFunctionCallingAgent:
             return self.mcp_tools.execute_tool(tool_name, **kwargs)
         else:
             # Fallback to regular tools only
-            regular_tools = AgentTools()
-            return regular_tools.execute_tool(tool_name, **kwargs)
+            return self._regular_tools.execute_tool(tool_name, **kwargs)
     
-    def chat_with_tools(self, user_message: str) -> str:
+    async def _complete(self, messages: List[Any], tools: Optional[List[Dict]] = None,
+                        temperature: float = 0.7, cache: bool = True,
+                        on_tool_call: Optional[Callable[[Dict[str, str]], None]] = None,
+                        on_content: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Call the model, answering identical temperature-0 prompts from the response cache.
+        
+        Calls that offer tools are streamed, and `on_tool_call` fires for each
+        tool call as soon as its arguments are complete, so the caller can
+        start executing it while the model is still decoding the rest.
+        Passing `on_content` also streams the call and hands each text delta
+        to it as it arrives.
+        
+        Args:
+            messages (List): Conversation so far
+            tools (Optional[List[Dict]]): Tool schemas offered to the model
+            temperature (float): Sampling temperature
+            cache (bool): Allow this call to be served from / stored in the cache
+                (calls with a nonzero temperature always bypass it)
+            on_tool_call (Callable): Invoked with each completed tool call
+            on_content (Callable): Invoked with each content delta
+            
+        Returns:
+            Dict with the reply "content" and its "tool_calls"
+            (each a dict with "id", "name" and "arguments")
+        """
+        kwargs = {"model": MODEL, "messages": messages, "temperature": temperature}
+        if tools:
+            kwargs["tools"] = tools
+            kwargs["tool_choice"] = "auto"
+        
+        key = None
+        if cache and self.cache_responses and temperature == 0:
+            key = orjson.dumps({
+                "m": kwargs["model"],
+                "msgs": _key_messages(messages),
+                "tools": self._tools_signature(tools),
+                "t": temperature
+            }, option=orjson.OPT_SORT_KEYS, default=_jsonable).decode()
+            cached = self._response_cache.get(key)
+            if cached is None and self._disk_cache is not None:
+                cached = self._disk_cache.get(key)
+                if cached is not None:
+                    self._response_cache.put(key, cached)
+            if cached is not None:
+                if on_tool_call is not None:
+                    for call in cached["tool_calls"]:
+                        on_tool_call(call)
+                if on_content is not None and cached["content"]:
+                    on_content(cached["content"])
+                return cached
+        
+        if tools or on_content is not None:
+            reply = await self._stream_completion(kwargs, on_tool_call, on_content)
+        else:
+            response = await acompletion(**kwargs)
+            reply = {"content": response.choices[0].message.content, "tool_calls": []}
+        
+        if key is not None:
+            self._response_cache.put(key, reply)
+            if self._disk_cache is not None:
+                self._disk_cache.put(key, reply)
+        return reply
+    
+    async def _stream_completion(self, kwargs: Dict[str, Any],
+                                 on_tool_call: Optional[Callable[[Dict[str, str]], None]],
+                                 on_content: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Stream a completion, reassembling content and tool-call fragments."""
+        content_parts: List[str] = []
+        calls: Dict[int, Dict[str, str]] = {}
+        current: Optional[int] = None
+        
+        def finish(index: int):
+            if on_tool_call is not None:
+                on_tool_call(calls[index])
+        
+        stream = await acompletion(stream=True, **kwargs)
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if getattr(delta, "content", None):
+                content_parts.append(delta.content)
+                if on_content is not None:
+                    on_content(delta.content)
+            
+            for fragment in getattr(delta, "tool_calls", None) or ():
+                index = fragment.index or 0
+                # Fragments arrive in order, so a new index closes the previous call
+                if current is not None and index != current:
+                    finish(current)
+                call = calls.setdefault(index, {"id": "", "name": "", "arguments": ""})
+                if fragment.id:
+                    call["id"] = fragment.id
+                if fragment.function is not None:
+                    call["name"] += fragment.function.name or ""
+                    call["arguments"] += fragment.function.arguments or ""
+                current = index
+        
+        if current is not None:
+            finish(current)
+        
+        return {
+            "content": "".join(content_parts) or None,
+            "tool_calls": [calls[index] for index in sorted(calls)]
+        }
+    
+    def _tools_signature(self, tools: Optional[List[Dict]]) -> Optional[str]:
+        """Cache-key fingerprint of a tool list, precomputed for the agent's own."""
+        if not tools:
+            return None
+        if tools is self._tools_cache:
+            return self._tools_digest
+        return _tools_digest(tools)
+    
+    def _dispatch_tool(self, call: Dict[str, str],
+                       mcp_slots: Optional[asyncio.Semaphore] = None) -> "asyncio.Future":
+        """
+        Start a tool call on the tool thread pool and return its future.
+        
+        MCP calls first wait for one of `mcp_slots`, making the turn's MCP
+        traffic a sliding window: the next call starts as soon as any
+        running one finishes.
+        """
+        try:
+            arguments = orjson.loads(call["arguments"] or "{}")
+        except orjson.JSONDecodeError as e:
+            arguments, error = None, f"Invalid tool arguments: {e}"
+        else:
+            error = None if isinstance(arguments, dict) else (
+                f"Invalid tool arguments: expected a JSON object, got {type(arguments).__name__}"
+            )
+        if error is not None:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result({"success": False, "error": error})
+            return future
+        
+        if mcp_slots is not None and call["name"] in self._tool_names_mcp:
+            return asyncio.ensure_future(self._run_tool_limited(mcp_slots, call["name"], arguments))
+        
+        # Web searches run on the loop; blocking tools go to the tool pool
+        if call["name"] in self._tool_names_regular:
+            return asyncio.ensure_future(self._regular_tools.aexecute_tool(call["name"], **arguments))
+        
+        return asyncio.get_running_loop().run_in_executor(
+            self._tool_executor,
+            functools.partial(self.execute_tool, call["name"], **arguments)
+        )
+    
+    async def _run_tool_limited(self, slots: asyncio.Semaphore, tool_name: str,
+                                arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a tool on the pool once a concurrency slot is free."""
+        async with slots:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._tool_executor,
+                functools.partial(self.execute_tool, tool_name, **arguments)
+            )
+    
+    async def chat_with_tools(self, user_message: str) -> str:
         """
         Main chat method that can use all available tools including MCP.
         
+        Tool calls requested in the same model turn are independent, so they
+        are executed concurrently on the agent's tool thread pool, each one
+        starting as soon as the model has finished streaming it.
+        
         Args:
             user_message (str): User's message/question
             
@@ -102,11 +430,81 @@ class EnhancedFunctionCallingAgent:
             str: AI response (potentially using tools)
         """
         try:
-            self.cli.print_question(user_message)
+            if self.cli.interactive:
+                self.cli.print_question(user_message)
+            async with self._regular_tools.async_session():
+                final_answer = await self._run_turn(user_message)
             
-            # Enhanced system message to guide the agent with MCP capabilities
-            if self.mcp_enabled:
-                system_message = """You are a helpful AI assistant with access to multiple tools:
+            # Display the final answer
+            if self.cli.interactive:
+                self.cli.print_answer(final_answer)
+            return final_answer
+            
+        except Exception as e:
+            if self.cli.interactive:
+                self.cli.print_error(f"Error: {str(e)}")
+            else:
+                logger.exception("Chat turn failed")
+            return "Sorry, I encountered an error."
+    
+    async def chat_with_tools_stream(self, user_message: str) -> AsyncIterator[str]:
+        """
+        Like `chat_with_tools`, but yield the answer text as it is decoded.
+        
+        The turn runs as a task that pushes content deltas onto a queue, so
+        the first words reach the caller after the prompt prefill instead of
+        after the whole answer has been generated.
+        
+        Args:
+            user_message (str): User's message/question
+            
+        Yields:
+            str: Successive pieces of the AI response
+        """
+        queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        
+        async def run_turn() -> str:
+            async with self._regular_tools.async_session():
+                return await self._run_turn(user_message, on_delta=queue.put_nowait)
+        
+        task = asyncio.create_task(run_turn())
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        
+        try:
+            while True:
+                delta = await queue.get()
+                if delta is None:
+                    break
+                yield delta
+            task.result()  # re-raise a failed turn
+        finally:
+            task.cancel()
+    
+    async def _run_turn(self, user_message: str,
+                        on_delta: Optional[Callable[[str], None]] = None) -> str:
+        """
+        Run one question through the model, executing any requested tools.
+        
+        Args:
+            user_message (str): User's message/question
+            on_delta (Callable): Receives the answer text as it streams in
+            
+        Returns:
+            str: Final answer text
+        """
+        vector = None
+        if self.semantic_cache:
+            vector = await self._embed_question(user_message)
+            cached_answer = await self._semantic_lookup(user_message, vector)
+            if cached_answer is not None:
+                logger.debug("Answered from semantic cache")
+                if on_delta is not None:
+                    on_delta(cached_answer)
+                return cached_answer
+        
+        # Enhanced system message to guide the agent with MCP capabilities
+        if self.mcp_enabled:
+            system_message = """You are a helpful AI assistant with access to multiple tools:
 
 1. search_documents: Search through uploaded documents (RAG)
 2. search_web: Search the internet for current information
@@ -117,92 +515,168 @@ class EnhancedFunctionCallingAgent:
 7. mcp_file_info: Get information about files or directories
 
 Use tools when appropriate to provide better answers. You can read, write, and manage files to help with various tasks."""
-            else:
-                system_message = """You are a helpful AI assistant with access to tools:
+        else:
+            system_message = """You are a helpful AI assistant with access to tools:
 
 1. search_documents: Search through uploaded documents
 2. search_web: Search the internet for current information
 
 Use tools when appropriate to provide better answers."""
 
-            # First call to get tool usage
-            messages = [
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": user_message}
-            ]
-            
-            self.cli.loading_animation("Thinking", 1.5)
-            
-            # Get available tools
-            available_tools = self.get_available_tools()
-            
-            # Call OpenAI with function calling
-            response = completion(
-                model="openai/gpt-4o",
-                messages=messages,
+        # First call to get tool usage. The static system prompt (and the
+        # tools list passed alongside it) forms the cacheable prefix; the
+        # volatile user message comes after it.
+        messages = [
+            _system_entry(system_message),
+            {"role": "user", "content": user_message}
+        ]
+        
+        # Get available tools
+        available_tools = self.get_available_tools()
+        
+        # Call OpenAI with function calling. Tool calls are dispatched as
+        # soon as each one is fully streamed, overlapping tool execution
+        # with the rest of the decode.
+        pending: List["asyncio.Future"] = []
+        mcp_slots = asyncio.Semaphore(self._mcp_concurrency)
+        with self.cli.spinner("Thinking"):
+            reply = await self._complete(
+                messages,
                 tools=available_tools,
-                tool_choice="auto",
-                temperature=0.7
+                temperature=self._tool_temperature,
+                on_tool_call=lambda call: pending.append(self._dispatch_tool(call, mcp_slots)),
+                on_content=on_delta
             )
+        
+        tool_calls = reply["tool_calls"]
+        
+        if tool_calls:
+            # Execute tool calls
+            messages.append({
+                "role": "assistant",
+                "content": reply["content"],
+                "tool_calls": [
+                    {
+                        "id": call["id"],
+                        "type": "function",
+                        "function": {"name": call["name"], "arguments": call["arguments"]}
+                    }
+                    for call in tool_calls
+                ]
+            })
             
-            response_message = response.choices[0].message
+            if self.cli.interactive:
+                for call in tool_calls:
+                    self.cli.print_info(f"Using tool: {call['name']}")
+            else:
+                logger.debug("Using tools: %s", [call["name"] for call in tool_calls])
             
-            # Check if the model wants to call functions
-            tool_calls = getattr(response_message, 'tool_calls', None)
+            # Wait for the tools that are already running
+            tool_names = ", ".join(call["name"] for call in tool_calls)
+            with self.cli.spinner(f"Executing {tool_names}"):
+                tool_results = await asyncio.gather(*pending)
             
-            if tool_calls:
-                # Execute tool calls
-                messages.append(response_message)
-                
-                for tool_call in tool_calls:
-                    function_name = tool_call.function.name
-                    function_args = json.loads(tool_call.function.arguments)
-                    
-                    self.cli.print_info(f"Using tool: {function_name}")
-                    self.cli.loading_animation(f"Executing {function_name}", 2.0)
-                    
-                    # Execute the tool
-                    tool_result = self.execute_tool(function_name, **function_args)
-                    
-                    # Display tool results with enhanced MCP info
-                    self._display_tool_results(function_name, tool_result)
-                    
-                    # Add tool result to conversation
-                    messages.append({
-                        "tool_call_id": tool_call.id,
-                        "role": "tool",
-                        "name": function_name,
-                        "content": json.dumps(tool_result)
-                    })
-                
-                # Get final response from the model
-                self.cli.loading_animation("Generating final response", 1.5)
-                
-                final_response = completion(
-                    model="openai/gpt-4o",
-                    messages=messages,
-                    temperature=0.7
-                )
-                
-                final_answer = final_response.choices[0].message.content
+            for call, tool_result in zip(tool_calls, tool_results):
+                # Display tool results with enhanced MCP info
+                self._display_tool_results(call["name"], tool_result)
                 
-            else:
-                # No tools needed, just return the response
-                final_answer = response_message.content
+                # Add tool result to conversation
+                messages.append({
+                    "tool_call_id": call["id"],
+                    "role": "tool",
+                    "name": call["name"],
+                    "content": _dumps(tool_result)
+                })
             
-            # Display the final answer
-            self.cli.print_answer(final_answer)
-            return final_answer
+            # Get final response from the model
+            with self.cli.spinner("Generating final response"):
+                final_reply = await self._complete(messages, temperature=self._answer_temperature,
+                                                   on_content=on_delta)
             
-        except Exception as e:
-            error_msg = f"Error: {str(e)}"
-            self.cli.print_error(error_msg)
-            return "Sorry, I encountered an error."
+            final_answer = final_reply["content"]
+            
+        else:
+            # No tools needed, just return the response
+            final_answer = reply["content"]
+        
+        if vector is not None and final_answer and not any(
+                call["name"] in _SIDE_EFFECT_TOOLS for call in tool_calls):
+            self._semantic_store(user_message, final_answer, vector)
+        
+        return final_answer
+    
+    async def _embed_question(self, text: str) -> Optional[np.ndarray]:
+        """Embed a question for the semantic cache; None if embedding fails."""
+        try:
+            response = await aembedding(model=EMBEDDING_MODEL, input=[text])
+        except Exception:
+            return None
+        
+        vector = np.asarray(response.data[0]["embedding"], dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else None
+    
+    async def _semantic_lookup(self, question: str, vector: Optional[np.ndarray]) -> Optional[str]:
+        """
+        Return a cached answer to a question equivalent to `question`.
+        
+        Args:
+            question (str): Incoming user question
+            vector (np.ndarray): Its normalized embedding
+            
+        Returns:
+            Optional[str]: Cached answer, or None on a miss
+        """
+        if vector is None or self._semantic_cache is None:
+            return None
+        
+        match = self._semantic_cache.lookup(question, vector)
+        if match is None:
+            return None
+        cached_question, answer, distance = match
+        
+        if distance < self._semantic_tau:
+            return answer
+        if distance < self._semantic_tau + self._semantic_verify_band:
+            # Gray zone: close enough to be a paraphrase, far enough to be a
+            # different question. Ask the model instead of guessing.
+            verdict = await self._complete([
+                {"role": "system", "content": "Answer only yes or no."},
+                {"role": "user", "content": (
+                    "Do these two questions ask for the same information?\n"
+                    f"1. {cached_question}\n2. {question}"
+                )}
+            ], temperature=0.0)
+            if (verdict["content"] or "").strip().lower().startswith("yes"):
+                return answer
+        return None
+    
+    def _semantic_store(self, question: str, answer: str, vector: np.ndarray):
+        """Remember a final answer under its question embedding."""
+        if self._semantic_cache is None:
+            self._semantic_cache = ProximityCache(
+                capacity=int(os.getenv("AGENT_SEMANTIC_CACHE_SIZE", "1024")),
+                tau=self._semantic_tau,
+                dim=len(vector),
+                # Answers expire like the exact response cache's
+                ttl=self._response_cache.ttl
+            )
+        self._semantic_cache.put(question, answer, vector)
+    
+    def chat_with_tools_sync(self, user_message: str) -> str:
+        """Blocking wrapper around `chat_with_tools` for synchronous callers."""
+        return asyncio.run(self.chat_with_tools(user_message))
     
     def _display_tool_results(self, tool_name: str, tool_result: Dict[str, Any]):
         """Display tool execution results in a nice format with MCP support."""
+        if not self.cli.interactive:
+            # Servers only keep failures, via logging
+            if not tool_result.get("success"):
+                logger.warning("Tool %s failed: %s", tool_name, tool_result.get("error", "Unknown error"))
+            return
+        
         if tool_result.get("success"):
-            if tool_name.startswith("mcp_"):
+            if tool_name in self._tool_names_mcp:
                 # MCP tool results
                 result_text = tool_result.get("result", "")
                 if tool_name == "mcp_list_directory":
@@ -232,6 +706,7 @@ Use tools when appropriate to provide better answers."""
     
     def interactive_chat(self):
         """Start an interactive chat session with enhanced tool capabilities."""
+        self.cli.interactive = True
         self.cli.print_info("🚀 Enhanced Function Calling Agent Ready!")
         
         # Initialize MCP if possible
@@ -240,16 +715,14 @@ Use tools when appropriate to provide better answers."""
         self.cli.print_info("Type 'quit' to exit.")
         
         # Show available tools
-        available_tools = self.get_available_tools()
-        tool_names = [tool["function"]["name"] for tool in available_tools]
-        
         if self.mcp_enabled:
-            regular_tools = [name for name in tool_names if not name.startswith("mcp_")]
-            mcp_tools = [name for name in tool_names if name.startswith("mcp_")]
+            regular_tools = [tool["function"]["name"] for tool in self.regular_tools_list]
+            mcp_tools = [tool["function"]["name"] for tool in self.mcp_tools_list]
             
             self.cli.print_success(f"📋 Regular tools: {', '.join(regular_tools)}")
             self.cli.print_success(f"🔧 MCP tools: {', '.join(mcp_tools)}")
         else:
+            tool_names = [tool["function"]["name"] for tool in self.get_available_tools()]
             self.cli.print_success(f"📋 Available tools: {', '.join(tool_names)}")
         
         while True:
@@ -264,7 +737,7 @@ Use tools when appropriate to provide better answers."""
                     self.cli.print_warning("Please enter a question.")
                     continue
                 
-                self.chat_with_tools(question)
+                self.chat_with_tools_sync(question)
                 self.cli.print_separator()
                 
             except KeyboardInterrupt:
@@ -275,9 +748,12 @@ Use tools when appropriate to provide better answers."""
                 continue
     
     def cleanup(self):
-        """Clean up MCP resources."""
+        """Clean up MCP resources and the tools' HTTP clients."""
+        self._regular_tools.close()
         if self.mcp_enabled:
             self.mcp_tools.cleanup()
+            self.mcp_enabled = False
+            self._tools_cache = None
 
 
 if __name__ == "__main__":
@@ -8,7 +8,15 @@ A modern web interface showcasing MCP integration with file management capabilit
 
 import os
 import json
-from flask import Flask, render_template, request, jsonify, session
+import queue
+import atexit
+import asyncio
+import logging
+import threading
+import orjson
+from logging.handlers import QueueHandler, QueueListener
+from flask import Flask, Response, render_template, request, jsonify, session
+from flask.json.provider import DefaultJSONProvider
 from dotenv import load_dotenv
 from enhanced_function_calling_agent import EnhancedFunctionCallingAgent
 from cli_interface import CLIInterface
@@ -17,53 +25,103 @@ import platform
 # Load environment variables
 load_dotenv()
 
+def configure_logging():
+    """
+    Send log records through a queue drained by a background thread.
+    
+    Request threads only enqueue records, so a burst of warnings (e.g. a
+    backend rate-limit storm) never serializes them on stderr writes.
+    Leaves logging alone if the host already configured handlers.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    
+    records = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    listener = QueueListener(records, handler)
+    root.addHandler(QueueHandler(records))
+    root.setLevel(os.getenv("LOG_LEVEL", "WARNING").upper())
+    listener.start()
+    atexit.register(listener.stop)
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, so `jsonify` stays cheap on large tool results."""
+
+    @staticmethod
+    def _fallback(obj):
+        try:
+            return DefaultJSONProvider.default(obj)
+        except TypeError:
+            return str(obj)
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self._fallback, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self._fallback, option=orjson.OPT_NON_STR_KEYS),
+            mimetype=self.mimetype
+        )
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key-change-in-production')
 
 # Initialize enhanced agent
 cli = CLIInterface()
 agent = EnhancedFunctionCallingAgent(cli)
 
-# Global variable to track agent initialization
-agent_initialized = False
+# MCP initialization happens once per process, on the first request (or
+# up front when run as a script), never at import; the lock keeps
+# concurrent workers from spawning duplicate MCP servers
+_init_lock = threading.Lock()
+_init_done = threading.Event()
 
 def initialize_agent():
-    """Initialize the enhanced agent with MCP support."""
-    global agent_initialized
-    if not agent_initialized:
+    """Initialize the enhanced agent with MCP support (once per process)."""
+    if _init_done.is_set():
+        return True
+    with _init_lock:
+        if _init_done.is_set():
+            return True
         try:
             # Initialize MCP - this will fall back gracefully if it fails
             agent.initialize_mcp()
-            agent_initialized = True
             return True
         except Exception as e:
-            print(f"Agent initialization warning: {e}")
-            agent_initialized = True  # Still mark as initialized for fallback mode
+            logger.warning("Agent initialization warning: %s", e)
             return False
-    return True
+        finally:
+            _init_done.set()  # Still mark as initialized for fallback mode
+
+@app.before_request
+def ensure_agent_initialized():
+    """Start MCP on the first request this process serves."""
+    initialize_agent()
 
 @app.route('/')
 def index():
     """Serve the enhanced web interface."""
-    initialize_agent()
-    
     # Get available tools for the UI
-    tools = agent.get_available_tools()
-    regular_tools = [tool for tool in tools if not tool["function"]["name"].startswith("mcp_")]
-    mcp_tools = [tool for tool in tools if tool["function"]["name"].startswith("mcp_")]
-    
     return render_template('enhanced_index.html', 
-                         regular_tools=regular_tools,
-                         mcp_tools=mcp_tools,
+                         regular_tools=agent.regular_tools_list,
+                         mcp_tools=agent.mcp_tools_list,
                          mcp_enabled=agent.mcp_enabled,
                          platform=platform.system())
 
 @app.route('/chat', methods=['POST'])
-def chat():
+async def chat():
     """Handle chat messages with enhanced agent."""
     try:
-        initialize_agent()
-        
         data = request.get_json()
         user_message = data.get('message', '').strip()
         
@@ -74,7 +132,7 @@ def chat():
             })
         
         # Get response from enhanced agent
-        response = agent.chat_with_tools(user_message)
+        response = await agent.chat_with_tools(user_message)
         
         return jsonify({
             'success': True,
@@ -88,20 +146,55 @@ def chat():
             'error': f'Error: {str(e)}'
         })
 
+def sse_event(payload):
+    """Format one Server-Sent Events message."""
+    return b'data: ' + orjson.dumps(payload) + b'\n\n'
+
+@app.route('/chat/stream', methods=['GET', 'POST'])
+def chat_stream():
+    """Stream the agent's answer as Server-Sent Events while it is decoded."""
+    if request.method == 'POST':
+        user_message = (request.get_json(silent=True) or {}).get('message', '').strip()
+    else:
+        user_message = request.args.get('message', '').strip()
+
+    if not user_message:
+        return jsonify({
+            'success': False,
+            'error': 'Please enter a message'
+        })
+
+    def events():
+        # WSGI iterates the body synchronously, so drive the async generator
+        # on a loop owned by this response
+        loop = asyncio.new_event_loop()
+        deltas = agent.chat_with_tools_stream(user_message)
+        try:
+            while True:
+                try:
+                    delta = loop.run_until_complete(deltas.__anext__())
+                except StopAsyncIteration:
+                    break
+                yield sse_event({'delta': delta})
+            yield sse_event({'done': True, 'mcp_enabled': agent.mcp_enabled})
+        except Exception as e:
+            yield sse_event({'error': f'Error: {str(e)}'})
+        finally:
+            loop.run_until_complete(deltas.aclose())
+            loop.close()
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/tools')
 def get_tools():
     """Get all available tools for the frontend."""
     try:
-        initialize_agent()
-        
         tools = agent.get_available_tools()
-        regular_tools = [tool for tool in tools if not tool["function"]["name"].startswith("mcp_")]
-        mcp_tools = [tool for tool in tools if tool["function"]["name"].startswith("mcp_")]
-        
         return jsonify({
             'success': True,
-            'regular_tools': regular_tools,
-            'mcp_tools': mcp_tools,
+            'regular_tools': agent.regular_tools_list,
+            'mcp_tools': agent.mcp_tools_list,
             'mcp_enabled': agent.mcp_enabled,
             'total_tools': len(tools)
         })
@@ -113,16 +206,14 @@ def get_tools():
         })
 
 @app.route('/file-explorer')
-def file_explorer():
+async def file_explorer():
     """Get directory contents for file explorer."""
     try:
-        initialize_agent()
-        
         directory = request.args.get('directory', '.')
         
         # Use MCP tool if available, otherwise fallback
         if agent.mcp_enabled:
-            result = agent.execute_tool("mcp_list_directory", directory_path=directory)
+            result = await asyncio.to_thread(agent.execute_tool, "mcp_list_directory", directory_path=directory)
             if result["success"]:
                 return jsonify({
                     'success': True,
@@ -142,11 +233,9 @@ def file_explorer():
         })
 
 @app.route('/read-file', methods=['POST'])
-def read_file():
+async def read_file():
     """Read a file using MCP tools."""
     try:
-        initialize_agent()
-        
         data = request.get_json()
         file_path = data.get('file_path', '').strip()
         
@@ -157,7 +246,7 @@ def read_file():
             })
         
         if agent.mcp_enabled:
-            result = agent.execute_tool("mcp_read_file", file_path=file_path)
+            result = await asyncio.to_thread(agent.execute_tool, "mcp_read_file", file_path=file_path)
             return jsonify(result)
         
         return jsonify({
@@ -172,11 +261,9 @@ def read_file():
         })
 
 @app.route('/write-file', methods=['POST'])
-def write_file():
+async def write_file():
     """Write a file using MCP tools."""
     try:
-        initialize_agent()
-        
         data = request.get_json()
         file_path = data.get('file_path', '').strip()
         content = data.get('content', '')
@@ -188,7 +275,8 @@ def write_file():
             })
         
         if agent.mcp_enabled:
-            result = agent.execute_tool("mcp_write_file", file_path=file_path, content=content)
+            result = await asyncio.to_thread(agent.execute_tool, "mcp_write_file",
+                                             file_path=file_path, content=content)
             return jsonify(result)
         
         return jsonify({
@@ -203,11 +291,9 @@ def write_file():
         })
 
 @app.route('/search-files', methods=['POST'])
-def search_files():
+async def search_files():
     """Search files using MCP tools."""
     try:
-        initialize_agent()
-        
         data = request.get_json()
         search_term = data.get('search_term', '').strip()
         directory = data.get('directory', '.')
@@ -220,10 +306,10 @@ def search_files():
             })
         
         if agent.mcp_enabled:
-            result = agent.execute_tool("mcp_search_files", 
-                                      search_term=search_term,
-                                      directory_path=directory,
-                                      file_extension=file_extension)
+            result = await asyncio.to_thread(agent.execute_tool, "mcp_search_files",
+                                             search_term=search_term,
+                                             directory_path=directory,
+                                             file_extension=file_extension)
             return jsonify(result)
         
         return jsonify({
@@ -240,10 +326,8 @@ def search_files():
 @app.route('/status')
 def status():
     """Get agent status and capabilities."""
-    initialize_agent()
-    
     return jsonify({
-        'agent_initialized': agent_initialized,
+        'agent_initialized': _init_done.is_set(),
         'mcp_enabled': agent.mcp_enabled,
         'platform': platform.system(),
         'tools_count': len(agent.get_available_tools()),
@@ -264,20 +348,33 @@ if __name__ == '__main__':
     print("🔧 Agent Engineering Bootcamp - MCP Integration")
     print(f"🌐 Platform: {platform.system()}")
     
-    try:
-        initialize_agent()
-        print(f"✅ Enhanced agent initialized (MCP enabled: {agent.mcp_enabled})")
-        tools = agent.get_available_tools()
-        print(f"🔧 Total tools available: {len(tools)}")
-        
-        mcp_tools = [tool for tool in tools if tool["function"]["name"].startswith("mcp_")]
-        print(f"📁 MCP tools: {[tool['function']['name'] for tool in mcp_tools]}")
-        
-    except Exception as e:
-        print(f"⚠️ Agent initialization warning: {e}")
+    # The development reloader runs this script twice: a watcher parent
+    # that never serves, and the serving child (WERKZEUG_RUN_MAIN set).
+    # Only the child starts MCP.
+    development = os.getenv('FLASK_ENV') == 'development'
+    if development and os.getenv('WERKZEUG_RUN_MAIN') != 'true':
+        print("🔁 Reloader started; the agent initializes in the serving process")
+    else:
+        try:
+            if initialize_agent():
+                print(f"✅ Enhanced agent initialized (MCP enabled: {agent.mcp_enabled})")
+            else:
+                print("⚠️ Agent initialization failed; continuing with basic tools only")
+            tools = agent.get_available_tools()
+            print(f"🔧 Total tools available: {len(tools)}")
+            
+            print(f"📁 MCP tools: {[tool['function']['name'] for tool in agent.mcp_tools_list]}")
+            
+        except Exception as e:
+            print(f"⚠️ Agent initialization warning: {e}")
     
     print("\n🌐 Enhanced Web Interface will be available at: http://localhost:5001")
     print("🎯 This showcases your Week 3 Assignment: Custom MCP Server Integration!")
     print("📁 Features: File management, enhanced chat, tool showcase")
     
-    app.run(host='0.0.0.0', port=5001, debug=True) 
\ No newline at end of file
+    if development:
+        # Reloader + debugger; single-process, for local development only
+        app.run(host='0.0.0.0', port=5001, debug=True)
+    else:
+        from waitress import serve
+        serve(app, host='0.0.0.0', port=5001, threads=int(os.getenv('WEB_THREADS', '16')))
@@ -12,116 +12,207 @@ This MCP server provides file system operations to AI agents:
 
 import os
 import json
+import io
+import re
+import codecs
+import time
+import shutil
 import asyncio
+import heapq
+from collections import OrderedDict, deque
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Sequence, Optional
+from stat import S_ISDIR, S_ISREG
+from typing import Any, Callable, Sequence, Optional
 import mcp.types as types
 from mcp.server import Server
 from mcp.server.models import InitializationOptions
 import mcp.server.stdio
 
 
+@lru_cache(maxsize=1)
+def _get_ahocorasick():
+    """Get the pyahocorasick module if installed (optional multi-term matcher)."""
+    try:
+        import ahocorasick
+    except ImportError:
+        return None
+    return ahocorasick
+
+
+class _SearchResults:
+    """Format per-file search hits into result lines, up to a file and size cap."""
+    
+    def __init__(self, max_files: int, max_bytes: int):
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.lines: list[str] = []
+        self.files = 0
+        self.size = 0
+        self.truncated = False
+    
+    def add(self, relative_path: Path, count: int, shown: list[str]) -> bool:
+        """Add one file's matches; returns False (and drops them) once a cap is reached."""
+        if (self.max_files and self.files >= self.max_files) or (self.max_bytes and self.size >= self.max_bytes):
+            self.truncated = True
+            return False
+        
+        block = [f"📄 {relative_path}:", *shown]
+        if count > 3:
+            block.append(f"  ... and {count - 3} more matches")
+        block.append("")  # Empty line for separation
+        
+        self.lines.extend(block)
+        self.files += 1
+        self.size += sum(len(line) + 1 for line in block)
+        return True
+    
+    def finish(self) -> list[str]:
+        """Return the result lines, with a note if matches were left out."""
+        if self.truncated:
+            self.lines.append(f"... search truncated at {self.files} files ({self.size} bytes of results)")
+        return self.lines
+
+
 class FileSystemMCPServer:
     """Custom File System MCP Server implementation."""
     
     def __init__(self, base_directory: str = "."):
         """Initialize the server with a base directory for safety."""
         self.base_directory = Path(base_directory).resolve()
+        # Containment is checked on strings against this prefix
+        self._base_str = str(self.base_directory)
+        self._base_prefix = os.path.join(self._base_str, "")
+        # Resolve symlinks before the containment check; turning this off
+        # makes the check purely lexical (no syscalls) but lets a symlink
+        # inside the tree point outside it
+        self.resolve_symlinks = os.getenv("FS_MCP_RESOLVE_SYMLINKS", "1") != "0"
+        # ripgrep, when installed, does the searching for _search_files
+        self._rg = shutil.which("rg")
+        # Files larger than this are not searched (0 = no limit)
+        self.max_search_bytes = int(os.getenv("FS_MCP_MAX_SEARCH_BYTES", "0"))
+        # Search output stops after this many matching files or result bytes (0 = no limit)
+        self.max_result_files = int(os.getenv("FS_MCP_MAX_RESULT_FILES", "500"))
+        self.max_result_bytes = int(os.getenv("FS_MCP_MAX_RESULT_BYTES", str(256 << 10)))
+        # Larger files are returned truncated by read_file (0 = no limit)
+        self.max_read_bytes = int(os.getenv("FS_MCP_MAX_READ_BYTES", str(8 << 20)))
+        # Directory listings stop after this many entries (0 = no limit)
+        self.max_list_entries = int(os.getenv("FS_MCP_MAX_LIST_ENTRIES", "10000"))
+        # Recent stat() results per resolved path; a short TTL bounds staleness
+        self.stat_ttl = float(os.getenv("FS_MCP_STAT_TTL", "1.0"))
+        # Directory names pruned from searches, comma-separated (empty: none)
+        skip_dirs = os.getenv("FS_MCP_SEARCH_SKIP_DIRS")
+        if skip_dirs is not None:
+            self.SEARCH_SKIP_DIRS = frozenset(name.strip() for name in skip_dirs.split(",") if name.strip())
+        self._stat_cache: "OrderedDict[Path, tuple[float, Optional[os.stat_result]]]" = OrderedDict()
+        # Built once; list_tools returns the same list on every call
+        self._tools = self._build_tools()
         self.server = Server("filesystem")
         self._setup_tools()
     
-    def _setup_tools(self):
-        """Set up all the tools that this MCP server provides."""
-        
-        # Tool 1: Read File
-        @self.server.list_tools()
-        async def handle_list_tools() -> list[types.Tool]:
-            return [
-                types.Tool(
-                    name="read_file",
-                    description="Read the contents of a file",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "file_path": {
-                                "type": "string",
-                                "description": "Path to the file to read"
-                            }
-                        },
-                        "required": ["file_path"]
-                    }
-                ),
-                types.Tool(
-                    name="write_file",
-                    description="Write content to a file (creates or overwrites)",
-                    inputSchema={
-                        "type": "object", 
-                        "properties": {
-                            "file_path": {
-                                "type": "string",
-                                "description": "Path to the file to write"
-                            },
-                            "content": {
-                                "type": "string",
-                                "description": "Content to write to the file"
-                            }
+    @staticmethod
+    def _build_tools() -> list[types.Tool]:
+        """Describe the tools this server provides; the schemas never change."""
+        return [
+            types.Tool(
+                name="read_file",
+                description="Read the contents of a file",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "file_path": {
+                            "type": "string",
+                            "description": "Path to the file to read"
+                        }
+                    },
+                    "required": ["file_path"]
+                }
+            ),
+            types.Tool(
+                name="write_file",
+                description="Write content to a file (creates or overwrites)",
+                inputSchema={
+                    "type": "object", 
+                    "properties": {
+                        "file_path": {
+                            "type": "string",
+                            "description": "Path to the file to write"
                         },
-                        "required": ["file_path", "content"]
-                    }
-                ),
-                types.Tool(
-                    name="list_directory",
-                    description="List contents of a directory",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "directory_path": {
-                                "type": "string", 
-                                "description": "Path to the directory to list",
-                                "default": "."
-                            }
+                        "content": {
+                            "type": "string",
+                            "description": "Content to write to the file"
+                        }
+                    },
+                    "required": ["file_path", "content"]
+                }
+            ),
+            types.Tool(
+                name="list_directory",
+                description="List contents of a directory",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "directory_path": {
+                            "type": "string", 
+                            "description": "Path to the directory to list",
+                            "default": "."
                         }
                     }
-                ),
-                types.Tool(
-                    name="search_files",
-                    description="Search for text within files in a directory",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "search_term": {
-                                "type": "string",
-                                "description": "Text to search for"
-                            },
-                            "directory_path": {
-                                "type": "string",
-                                "description": "Directory to search in",
-                                "default": "."
-                            },
-                            "file_extension": {
-                                "type": "string", 
-                                "description": "File extension to filter by (e.g., '.py', '.txt')",
-                                "default": ""
-                            }
+                }
+            ),
+            types.Tool(
+                name="search_files",
+                description="Search for text within files in a directory",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "search_term": {
+                            "type": "string",
+                            "description": "Text to search for"
                         },
-                        "required": ["search_term"]
-                    }
-                ),
-                types.Tool(
-                    name="file_info",
-                    description="Get information about a file or directory",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "path": {
-                                "type": "string",
-                                "description": "Path to the file or directory"
-                            }
+                        "directory_path": {
+                            "type": "string",
+                            "description": "Directory to search in",
+                            "default": "."
                         },
-                        "required": ["path"]
-                    }
-                )
-            ]
+                        "file_extension": {
+                            "type": "string", 
+                            "description": "File extension to filter by (e.g., '.py', '.txt')",
+                            "default": ""
+                        },
+                        "search_terms": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "More terms to search for in the same pass; lines matching any term are reported",
+                            "default": []
+                        }
+                    },
+                    "required": ["search_term"]
+                }
+            ),
+            types.Tool(
+                name="file_info",
+                description="Get information about a file or directory",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "path": {
+                            "type": "string",
+                            "description": "Path to the file or directory"
+                        }
+                    },
+                    "required": ["path"]
+                }
+            )
+        ]
+    
+    def _setup_tools(self):
+        """Set up all the tools that this MCP server provides."""
+        
+        # Tool listing
+        @self.server.list_tools()
+        async def handle_list_tools() -> list[types.Tool]:
+            return self._tools
         
         # Tool implementations
         @self.server.call_tool()
@@ -138,7 +229,8 @@ class FileSystemMCPServer:
                     search_term = arguments["search_term"]
                     directory_path = arguments.get("directory_path", ".")
                     file_extension = arguments.get("file_extension", "")
-                    return await self._search_files(search_term, directory_path, file_extension)
+                    search_terms = arguments.get("search_terms") or []
+                    return await self._search_files(search_term, directory_path, file_extension, search_terms)
                 elif name == "file_info":
                     return await self._file_info(arguments["path"])
                 else:
@@ -151,43 +243,71 @@ class FileSystemMCPServer:
     
     def _safe_path(self, path: str) -> Path:
         """Ensure the path is within the base directory for security."""
-        target_path = Path(path)
-        if not target_path.is_absolute():
-            target_path = self.base_directory / target_path
+        target = os.path.join(self._base_str, os.fspath(path))  # absolute paths replace the base
         
-        # Resolve and check if it's within base directory
-        resolved_path = target_path.resolve()
+        # Resolve (or just normalize) and check if it's within base directory
+        if self.resolve_symlinks:
+            target = os.path.realpath(target)
+        else:
+            target = os.path.normpath(target)
         
-        try:
-            resolved_path.relative_to(self.base_directory)
-            return resolved_path
-        except ValueError:
+        if target != self._base_str and not target.startswith(self._base_prefix):
             raise PermissionError(f"Access denied: Path outside base directory")
+        return Path(target)
+    
+    _STAT_CACHE_SIZE = 1024
+    
+    def _cached_stat(self, path: Path) -> Optional[os.stat_result]:
+        """
+        stat() a resolved path, reusing results younger than `stat_ttl`.
+        
+        One cached stat answers exists / is_file / is_dir together.
+        
+        Returns:
+            The stat result, or None if the path does not exist
+        """
+        now = time.monotonic()
+        entry = self._stat_cache.get(path)
+        if entry is not None and entry[0] > now:
+            self._stat_cache.move_to_end(path)
+            return entry[1]
+        
+        try:
+            st = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            st = None
+        
+        self._stat_cache[path] = (now + self.stat_ttl, st)
+        self._stat_cache.move_to_end(path)
+        if len(self._stat_cache) > self._STAT_CACHE_SIZE:
+            self._stat_cache.popitem(last=False)
+        return st
     
     async def _read_file(self, file_path: str) -> list[types.TextContent]:
         """Read the contents of a file."""
         try:
             safe_path = self._safe_path(file_path)
+            st = self._cached_stat(safe_path)
             
-            if not safe_path.exists():
+            if st is None:
                 return [types.TextContent(
                     type="text", 
                     text=f"Error: File not found: {file_path}"
                 )]
             
-            if not safe_path.is_file():
+            if not S_ISREG(st.st_mode):
                 return [types.TextContent(
                     type="text",
                     text=f"Error: Path is not a file: {file_path}"
                 )]
             
-            with open(safe_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            # Blocking I/O runs on a worker thread so other tool calls proceed
+            content, truncated = await asyncio.to_thread(self._read_text, safe_path)
             
-            return [types.TextContent(
-                type="text",
-                text=f"File: {file_path}\n---\n{content}"
-            )]
+            text = f"File: {file_path}\n---\n{content}"
+            if truncated:
+                text += f"\n... (truncated at {self.max_read_bytes} bytes)"
+            return [types.TextContent(type="text", text=text)]
             
         except UnicodeDecodeError:
             return [types.TextContent(
@@ -205,11 +325,12 @@ class FileSystemMCPServer:
         try:
             safe_path = self._safe_path(file_path)
             
-            # Create parent directories if they don't exist
-            safe_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(safe_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            try:
+                await asyncio.to_thread(self._write_text, safe_path, content)
+            finally:
+                # The file (and any directories just created) changed
+                for changed in (safe_path, *safe_path.parents):
+                    self._stat_cache.pop(changed, None)
             
             return [types.TextContent(
                 type="text",
@@ -222,32 +343,105 @@ class FileSystemMCPServer:
                 text=f"Error writing file: {str(e)}"
             )]
     
+    _READ_CHUNK = 1 << 20
+    
+    def _read_text(self, safe_path: Path) -> tuple[str, bool]:
+        """
+        Read up to `max_read_bytes` of a UTF-8 file (blocking).
+        
+        The buffer is sized from fstat once and filled with 1 MiB readinto
+        calls, so the raw bytes are held once. Decoding is strict, so binary
+        files still raise UnicodeDecodeError, and newlines are translated
+        as in text mode.
+        
+        Returns:
+            (content, whether the file was cut at the limit)
+        """
+        with open(safe_path, 'rb', buffering=0) as f:
+            size = os.fstat(f.fileno()).st_size
+            limit = min(size, self.max_read_bytes) if self.max_read_bytes else size
+            buf = bytearray(limit)
+            view = memoryview(buf)
+            filled = 0
+            while filled < limit:
+                n = f.readinto(view[filled:filled + self._READ_CHUNK])
+                if not n:
+                    break
+                filled += n
+            view.release()
+        del buf[filled:]
+        
+        truncated = limit < size
+        if truncated:
+            # A cut can split a multi-byte character; drop the partial tail
+            content = codecs.getincrementaldecoder('utf-8')().decode(buf)
+        else:
+            content = buf.decode('utf-8')
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        return content, truncated
+    
+    @staticmethod
+    def _write_text(safe_path: Path, content: str):
+        """Create parent directories and write the file (blocking)."""
+        safe_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(safe_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+    
+    @staticmethod
+    def _format_entry(entry: os.DirEntry) -> str:
+        """Format one directory listing line."""
+        if entry.is_dir():
+            return "📁 " + entry.name
+        if entry.is_file():
+            return f"📄 {entry.name} ({entry.stat().st_size} bytes)"
+        return "📄 " + entry.name
+    
+    @classmethod
+    def _directory_items(cls, safe_path: Path, limit: int = 0) -> tuple[list[str], int]:
+        """
+        Format one line per directory entry, up to `limit` (blocking).
+        
+        scandir reports entry types from the directory read itself, so only
+        regular files cost a stat() (for their size), and only those that
+        are listed. Returns the lines and the total number of entries.
+        """
+        with os.scandir(safe_path) as it:
+            entries = list(it)
+        
+        total = len(entries)
+        if limit and total > limit:
+            entries = heapq.nsmallest(limit, entries, key=lambda entry: entry.name)
+        else:
+            entries.sort(key=lambda entry: entry.name)
+        return [cls._format_entry(entry) for entry in entries], total
+    
     async def _list_directory(self, directory_path: str) -> list[types.TextContent]:
         """List contents of a directory."""
         try:
             safe_path = self._safe_path(directory_path)
+            st = self._cached_stat(safe_path)
             
-            if not safe_path.exists():
+            if st is None:
                 return [types.TextContent(
                     type="text",
                     text=f"Error: Directory not found: {directory_path}"
                 )]
             
-            if not safe_path.is_dir():
+            if not S_ISDIR(st.st_mode):
                 return [types.TextContent(
                     type="text", 
                     text=f"Error: Path is not a directory: {directory_path}"
                 )]
             
-            items = []
-            for item in sorted(safe_path.iterdir()):
-                item_type = "📁" if item.is_dir() else "📄"
-                size = f" ({item.stat().st_size} bytes)" if item.is_file() else ""
-                items.append(f"{item_type} {item.name}{size}")
+            # One thread hop for the listing and every per-entry stat
+            items, total = await asyncio.to_thread(self._directory_items, safe_path, self.max_list_entries)
             
-            content = f"Directory: {directory_path}\n---\n" + "\n".join(items)
+            content = "Directory: " + directory_path + "\n---\n" + "\n".join(items)
             if not items:
                 content += "(empty directory)"
+            elif total > len(items):
+                content += f"\n... and {total - len(items)} more entries"
             
             return [types.TextContent(type="text", text=content)]
             
@@ -257,54 +451,31 @@ class FileSystemMCPServer:
                 text=f"Error listing directory: {str(e)}"
             )]
     
-    async def _search_files(self, search_term: str, directory_path: str, file_extension: str) -> list[types.TextContent]:
-        """Search for text within files."""
+    async def _search_files(self, search_term: str, directory_path: str, file_extension: str,
+                            search_terms: Sequence[str] = ()) -> list[types.TextContent]:
+        """Search for text within files (any of several terms, in one pass per file)."""
         try:
             safe_path = self._safe_path(directory_path)
             
-            if not safe_path.exists() or not safe_path.is_dir():
+            st = self._cached_stat(safe_path)
+            if st is None or not S_ISDIR(st.st_mode):
                 return [types.TextContent(
                     type="text",
                     text=f"Error: Invalid directory: {directory_path}"
                 )]
             
-            matches = []
-            search_term_lower = search_term.lower()
-            
-            for file_path in safe_path.rglob("*"):
-                if not file_path.is_file():
-                    continue
-                    
-                # Filter by extension if specified
-                if file_extension and not file_path.name.endswith(file_extension):
-                    continue
-                
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        
-                    if search_term_lower in content.lower():
-                        # Find line numbers with matches
-                        lines = content.split('\n')
-                        matching_lines = []
-                        for i, line in enumerate(lines, 1):
-                            if search_term_lower in line.lower():
-                                matching_lines.append(f"  Line {i}: {line.strip()}")
-                        
-                        relative_path = file_path.relative_to(safe_path)
-                        matches.append(f"📄 {relative_path}:")
-                        matches.extend(matching_lines[:3])  # Show first 3 matches
-                        if len(matching_lines) > 3:
-                            matches.append(f"  ... and {len(matching_lines) - 3} more matches")
-                        matches.append("")  # Empty line for separation
-                        
-                except (UnicodeDecodeError, PermissionError):
-                    continue  # Skip binary files or files we can't read
+            terms = list(dict.fromkeys([search_term, *search_terms]))
+            if self._rg:
+                matches = await self._search_files_rg(terms, safe_path, file_extension)
+            else:
+                matches = await self._search_files_python(terms, safe_path, file_extension)
             
+            label = "', '".join(terms)
+            where = f"{directory_path}{self._skip_note()}"
             if matches:
-                result = f"Search results for '{search_term}' in {directory_path}:\n---\n" + "\n".join(matches)
+                result = f"Search results for '{label}' in {where}:\n---\n" + "\n".join(matches)
             else:
-                result = f"No matches found for '{search_term}' in {directory_path}"
+                result = f"No matches found for '{label}' in {where}"
             
             return [types.TextContent(type="text", text=result)]
             
@@ -314,30 +485,319 @@ class FileSystemMCPServer:
                 text=f"Error searching files: {str(e)}"
             )]
     
+    async def _search_files_rg(self, terms: list[str], safe_path: Path, file_extension: str) -> list[str]:
+        """
+        Search with ripgrep and format matches like `_search_files_python`.
+        
+        ripgrep walks the tree in parallel and uses SIMD literal search. It
+        runs case-insensitive and fixed-string, without honoring ignore files
+        or skipping hidden files, and prunes SEARCH_SKIP_DIRS, so it sees the
+        same files as the Python scan. Binary files are skipped.
+        """
+        args = [
+            self._rg, "--line-number", "--ignore-case", "--fixed-strings",
+            "--no-heading", "--with-filename", "--null", "--color=never",
+            "--hidden", "--no-ignore", "--max-columns=500", "--max-columns-preview"
+        ]
+        if file_extension:
+            args.append(f"--glob=*{file_extension}")
+        # The trailing slash limits each glob to directories, as in the Python walk
+        args += [f"--glob=!{name}/" for name in sorted(self.SEARCH_SKIP_DIRS)]
+        if self.max_search_bytes:
+            args.append(f"--max-filesize={self.max_search_bytes}")
+        for term in terms:
+            args += ["-e", term]
+        args += ["--", str(safe_path)]
+        
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=1 << 20
+        )
+        
+        def relative(path: bytes) -> Path:
+            return Path(os.fsdecode(path)).relative_to(safe_path)
+        
+        # rg prints each file's matches together, so a file is complete
+        # when the path changes
+        results = _SearchResults(self.max_result_files, self.max_result_bytes)
+        current, count, shown = None, 0, []
+        full = False
+        async for raw in proc.stdout:
+            path, _, rest = raw.rstrip(b"\r\n").partition(b"\0")
+            if path != current:
+                if current is not None and not results.add(relative(current), count, shown):
+                    full = True
+                    break
+                current, count, shown = path, 0, []
+            
+            line_number, _, text = rest.partition(b":")
+            count += 1
+            if count <= 3:
+                line = text.decode("utf-8", errors="replace").strip()
+                shown.append(f"  Line {line_number.decode()}: {line}")
+        
+        if full:
+            proc.kill()  # Stop rg walking the rest of the tree
+        elif current is not None:
+            results.add(relative(current), count, shown)
+        await proc.wait()
+        return results.finish()
+    
+    # Files scanned ahead of the one being reported
+    _SCAN_AHEAD = 64
+    
+    async def _search_files_python(self, terms: list[str], safe_path: Path, file_extension: str) -> list[str]:
+        """
+        Search file contents in-process (used when ripgrep is unavailable).
+        
+        Files are independent, so they are scanned concurrently on worker
+        threads: a window of up to _SCAN_AHEAD scans runs ahead of the file
+        being reported, so huge trees never turn into one task per file.
+        Results keep the walk order; once the result cap is reached, scans
+        still in the window are cancelled.
+        """
+        candidates = await asyncio.to_thread(self._search_candidates, safe_path, file_extension)
+        terms_lower = [term.lower() for term in terms]
+        match = self._line_matcher(terms_lower)
+        needles = self._prefilter_needles(terms_lower)
+        results = _SearchResults(self.max_result_files, self.max_result_bytes)
+        pending: deque = deque()
+        
+        async def report(file_path: Path, task: "asyncio.Future") -> bool:
+            count, shown = await task
+            return not count or results.add(file_path.relative_to(safe_path), count, shown)
+        
+        try:
+            for file_path, size in candidates:
+                task = asyncio.ensure_future(asyncio.to_thread(self._scan_file, file_path, size, match, needles))
+                pending.append((file_path, task))
+                if len(pending) < self._SCAN_AHEAD:
+                    continue
+                if not await report(*pending.popleft()):
+                    break
+            else:
+                while pending:
+                    if not await report(*pending.popleft()):
+                        break
+        finally:
+            for _, task in pending:
+                task.cancel()
+            await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+        
+        return results.finish()
+    
+    def _search_candidates(self, safe_path: Path, file_extension: str) -> list[tuple[Path, int]]:
+        """
+        Walk the tree for regular files worth searching, with their sizes (blocking).
+        
+        VCS, dependency, cache and build directories are pruned during the
+        walk, so none of their files are even listed.
+        """
+        candidates = []
+        for dirpath, dirnames, filenames in os.walk(safe_path):
+            dirnames[:] = [name for name in dirnames if name not in self.SEARCH_SKIP_DIRS]
+            directory = Path(dirpath)
+            
+            for name in filenames:
+                # Filter by extension first: a string compare, where stat is a syscall
+                if file_extension and not name.endswith(file_extension):
+                    continue
+                
+                file_path = directory / name
+                try:
+                    st = file_path.stat()
+                except OSError:
+                    continue
+                if not S_ISREG(st.st_mode) or st.st_size == 0:
+                    continue
+                if self.max_search_bytes and st.st_size > self.max_search_bytes:
+                    continue
+                
+                candidates.append((file_path, st.st_size))
+        return candidates
+    
+    # Directories never worth searching: VCS metadata, dependencies, caches
+    # and build output (FS_MCP_SEARCH_SKIP_DIRS overrides them)
+    SEARCH_SKIP_DIRS = frozenset({
+        '.git', '.hg', '.svn', 'node_modules', '.venv', 'venv', '__pycache__',
+        '.mypy_cache', '.pytest_cache', '.tox', 'dist', 'build'
+    })
+    
+    def _skip_note(self) -> str:
+        """Name the pruned directories in search results, so a miss inside one is explained."""
+        if not self.SEARCH_SKIP_DIRS:
+            return ""
+        return f" (skipped directories: {', '.join(sorted(self.SEARCH_SKIP_DIRS))})"
+    
+    # Files with a NUL byte in their first 4 KiB are treated as binary
+    _BINARY_SNIFF = 4096
+    
+    # UTF-8 for the only characters whose str.lower() is ASCII: U+0130 (İ)
+    # and U+212A (Kelvin sign). A bytes-level prefilter must let them through.
+    _LOWERS_TO_ASCII = (b"\xc4\xb0", b"\xe2\x84\xaa")
+    
+    @staticmethod
+    def _line_matcher(terms_lower: list[str]) -> Callable[[str], bool]:
+        """
+        Build one matcher for every search term, compiled once per search.
+        
+        A single term is a plain substring test. Several terms share one
+        Aho-Corasick automaton when pyahocorasick is installed, so each line
+        is scanned once however many terms there are; otherwise they share a
+        single compiled regex alternation.
+        """
+        if len(terms_lower) == 1:
+            term = terms_lower[0]
+            return lambda line: term in line
+        if "" in terms_lower:
+            return lambda line: True
+        
+        ahocorasick = _get_ahocorasick()
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for term in terms_lower:
+                automaton.add_word(term, term)
+            automaton.make_automaton()
+            return lambda line: next(automaton.iter(line), None) is not None
+        
+        pattern = re.compile("|".join(map(re.escape, terms_lower)))
+        return lambda line: pattern.search(line) is not None
+    
+    @staticmethod
+    def _prefilter_needles(terms_lower: list[str]) -> Optional[tuple[bytes, ...]]:
+        """
+        Byte needles for the raw-bytes prefilter, or None if it could miss.
+        
+        bytes.lower() only folds ASCII, and raw bytes still hold \r\n / \r,
+        so only ASCII terms without newlines can be checked before decoding.
+        """
+        if all(term and term.isascii() and '\n' not in term and '\r' not in term
+               for term in terms_lower):
+            return tuple(term.encode('ascii') for term in terms_lower)
+        return None
+    
+    @classmethod
+    def _may_contain(cls, raw: bytes, needles: tuple[bytes, ...]) -> bool:
+        """Whether `raw` can hold a case-insensitive match of any ASCII needle."""
+        lowered = raw.lower()
+        return (any(needle in lowered for needle in needles)
+                or any(seq in raw for seq in cls._LOWERS_TO_ASCII))
+    
+    @classmethod
+    def _file_may_contain(cls, file_path: Path, needles: tuple[bytes, ...]) -> bool:
+        """`_may_contain` over a large file, in overlapping binary chunks."""
+        overlap = max(3, *(len(needle) for needle in needles)) - 1
+        tail = b""
+        with open(file_path, 'rb') as f:
+            while True:
+                chunk = f.read(cls._READ_CHUNK)
+                if not chunk:
+                    return False
+                window = tail + chunk
+                if cls._may_contain(window, needles):
+                    return True
+                tail = window[-overlap:]
+    
+    @staticmethod
+    def _match_lines(lines, match: Callable[[str], bool]) -> tuple[int, list[str]]:
+        """Count matching lines and format the first three."""
+        shown = []
+        count = 0
+        for i, line in enumerate(lines, 1):
+            if match(line.lower()):
+                count += 1
+                if count <= 3:  # Show first 3 matches
+                    shown.append(f"  Line {i}: {line.strip()}")
+        return count, shown
+    
+    @classmethod
+    def _scan_file(cls, file_path: Path, size: int, match: Callable[[str], bool],
+                   needles: Optional[tuple[bytes, ...]]) -> tuple[int, list[str]]:
+        """
+        Count matching lines in one file and format the first three (blocking).
+        
+        With prefilter `needles`, the raw bytes are checked first using
+        bytes.lower() and C-level substring search, so files that cannot
+        match are never decoded. Files up to one chunk are read once. Larger
+        ones are prefiltered in chunks and then streamed line by line, so
+        memory stays O(chunk). Binary files (a NUL in the first 4 KiB, the
+        heuristic ripgrep uses) and unreadable files count as having no
+        matches.
+        """
+        try:
+            if size <= cls._READ_CHUNK:
+                raw = file_path.read_bytes()
+                if b"\0" in raw[:cls._BINARY_SNIFF]:
+                    return 0, []
+                if needles is not None and not cls._may_contain(raw, needles):
+                    return 0, []
+                # newline=None gives the same line splitting as text-mode open()
+                return cls._match_lines(io.StringIO(raw.decode('utf-8'), newline=None), match)
+            
+            with open(file_path, 'rb') as f:
+                if b"\0" in f.read(cls._BINARY_SNIFF):
+                    return 0, []
+            if needles is not None and not cls._file_may_contain(file_path, needles):
+                return 0, []
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return cls._match_lines(f, match)
+        except (UnicodeDecodeError, PermissionError):
+            return 0, []  # Skip binary files or files we can't read
+    
+    @staticmethod
+    def _count_lines(safe_path: Path) -> int:
+        """
+        Count lines the way text-mode readlines() would (blocking).
+        
+        Reads 1 MiB binary chunks and counts line breaks with bytes.count
+        (a memchr loop) instead of building a str per line. \r\n and a lone
+        \r each end a line, as in universal-newlines mode. An incremental
+        decoder still raises UnicodeDecodeError on non-UTF-8 files.
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        lines = 0
+        last = b""
+        with open(safe_path, 'rb') as f:
+            while True:
+                chunk = f.read(1 << 20)
+                if not chunk:
+                    break
+                decoder.decode(chunk)
+                lines += chunk.count(b"\n") + chunk.count(b"\r") - chunk.count(b"\r\n")
+                if last == b"\r" and chunk[:1] == b"\n":
+                    lines -= 1  # \r\n split across chunks
+                last = chunk[-1:]
+        decoder.decode(b"", final=True)
+        
+        if last and last not in (b"\n", b"\r"):
+            lines += 1  # final line without a terminator
+        return lines
+    
     async def _file_info(self, path: str) -> list[types.TextContent]:
         """Get information about a file or directory."""
         try:
             safe_path = self._safe_path(path)
+            stat = self._cached_stat(safe_path)
             
-            if not safe_path.exists():
+            if stat is None:
                 return [types.TextContent(
                     type="text",
                     text=f"Error: Path not found: {path}"
                 )]
             
-            stat = safe_path.stat()
             info = [
                 f"Path: {path}",
-                f"Type: {'Directory' if safe_path.is_dir() else 'File'}",
+                f"Type: {'Directory' if S_ISDIR(stat.st_mode) else 'File'}",
                 f"Size: {stat.st_size} bytes",
                 f"Last modified: {stat.st_mtime}",
                 f"Permissions: {oct(stat.st_mode)[-3:]}"
             ]
             
-            if safe_path.is_file():
+            if S_ISREG(stat.st_mode):
                 try:
-                    with open(safe_path, 'r', encoding='utf-8') as f:
-                        lines = len(f.readlines())
+                    lines = await asyncio.to_thread(self._count_lines, safe_path)
                     info.append(f"Lines: {lines}")
                 except UnicodeDecodeError:
                     info.append("Type: Binary file")
@@ -11,11 +11,27 @@ import asyncio
 import json
 import subprocess
 import os
-from typing import Dict, List, Any, Optional
+import sys
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, List, Any, Optional, Tuple
 from contextlib import asynccontextmanager
 import mcp
+from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
+# Spawned with this interpreter, wherever the client is started from
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "file_system_mcp_server.py")
+
+
+def _new_event_loop() -> asyncio.AbstractEventLoop:
+    """Create an event loop, using uvloop when it is installed (optional)."""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.new_event_loop()
+    return uvloop.new_event_loop()
+
 
 class MCPClient:
     """Client to connect to MCP servers and make their tools available."""
@@ -24,60 +40,90 @@ class MCPClient:
         """Initialize the MCP client."""
         self.connected_servers = {}
         self.available_tools = {}
+        # Rebuilt whenever available_tools changes; read on every agent turn
+        self._mcp_tools: List[Dict] = []
     
     async def connect_to_filesystem_server(self, base_directory: str = ".") -> bool:
-        """Connect to the custom filesystem MCP server."""
+        """
+        Connect to the custom filesystem MCP server.
+        
+        The server process, its stdio pipes and the initialized session stay
+        up until `cleanup`, so tool calls reuse one connection instead of
+        paying a spawn and handshake each time.
+        """
         try:
             # Set environment variable for the server
             env = os.environ.copy()
             env["FS_MCP_BASE_DIR"] = base_directory
             
-            # Start the MCP server as a subprocess
-            server_process = await asyncio.create_subprocess_exec(
-                "python", "file_system_mcp_server.py",
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
+            params = StdioServerParameters(
+                command=sys.executable,
+                args=[SERVER_SCRIPT],
                 env=env
             )
             
-            # Connect using MCP client
-            async with stdio_client(server_process.stdin, server_process.stdout) as client:
-                # Initialize the connection
-                await client.initialize()
-                
-                # Get available tools from the server
-                tools_result = await client.list_tools()
-                
-                # Store the tools and connection info
-                self.connected_servers["filesystem"] = {
-                    "client": client,
-                    "process": server_process
+            # A dedicated task owns the transport and session contexts, which
+            # must be entered and exited by the same task
+            connected = asyncio.get_running_loop().create_future()
+            stop = asyncio.Event()
+            task = asyncio.create_task(self._hold_connection("filesystem", params, connected, stop))
+            client, tools_result = await connected
+            
+            # Store the tools and connection info
+            self.connected_servers["filesystem"] = {
+                "client": client,
+                "task": task,
+                "stop": stop
+            }
+            
+            # Convert MCP tools to the format expected by our agent
+            for tool in tools_result.tools:
+                tool_name = f"mcp_{tool.name}"  # Prefix to avoid conflicts
+                self.available_tools[tool_name] = {
+                    "type": "function",
+                    "function": {
+                        "name": tool_name,
+                        "description": f"[MCP] {tool.description}",
+                        "parameters": tool.inputSchema
+                    },
+                    "mcp_server": "filesystem",
+                    "original_name": tool.name
                 }
-                
-                # Convert MCP tools to the format expected by our agent
-                for tool in tools_result.tools:
-                    tool_name = f"mcp_{tool.name}"  # Prefix to avoid conflicts
-                    self.available_tools[tool_name] = {
-                        "type": "function",
-                        "function": {
-                            "name": tool_name,
-                            "description": f"[MCP] {tool.description}",
-                            "parameters": tool.inputSchema
-                        },
-                        "mcp_server": "filesystem",
-                        "original_name": tool.name
-                    }
-                
-                return True
+            self._mcp_tools = [tool for tool in self.available_tools.values() if "mcp_server" in tool]
+            
+            return True
                 
         except Exception as e:
             print(f"Error connecting to filesystem MCP server: {e}")
             return False
     
+    async def _hold_connection(self, server_name: str, params: StdioServerParameters,
+                               connected: "asyncio.Future", stop: asyncio.Event):
+        """Open a server connection, publish it on `connected`, and keep it until `stop`."""
+        try:
+            async with stdio_client(params) as (read_stream, write_stream):
+                async with ClientSession(read_stream, write_stream) as client:
+                    # Initialize the connection
+                    await client.initialize()
+                    
+                    # Get available tools from the server
+                    tools_result = await client.list_tools()
+                    connected.set_result((client, tools_result))
+                    
+                    await stop.wait()
+        except Exception as e:
+            if not connected.done():
+                connected.set_exception(e)
+            else:
+                print(f"MCP server {server_name} connection closed: {e}")
+    
     def get_mcp_tools(self) -> List[Dict]:
-        """Get all available MCP tools in OpenAI function calling format."""
-        return [tool for tool in self.available_tools.values() if "mcp_server" in tool]
+        """
+        Get all available MCP tools in OpenAI function calling format.
+        
+        Returns the list built at connect time; callers must not modify it.
+        """
+        return self._mcp_tools
     
     async def execute_mcp_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Execute an MCP tool and return the result."""
@@ -125,6 +171,19 @@ class MCPClient:
                 "result": ""
             }
     
+    async def execute_mcp_tools_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Execute several MCP tools concurrently and return results in call order.
+        
+        The JSON-RPC session matches responses to requests by id, so every
+        request goes out on the one stdio pipe before any response is awaited:
+        the batch costs about one round trip instead of one per call. Unknown
+        tools fail individually without being sent.
+        """
+        return await asyncio.gather(*(
+            self.execute_mcp_tool(tool_name, arguments) for tool_name, arguments in calls
+        ))
+    
     def is_mcp_tool(self, tool_name: str) -> bool:
         """Check if a tool name is an MCP tool."""
         return tool_name.startswith("mcp_") and tool_name in self.available_tools
@@ -133,14 +192,15 @@ class MCPClient:
         """Clean up connections to MCP servers."""
         for server_name, server_info in self.connected_servers.items():
             try:
-                if "process" in server_info:
-                    server_info["process"].terminate()
-                    await server_info["process"].wait()
+                # Closing the session and transport also stops the server process
+                server_info["stop"].set()
+                await server_info["task"]
             except Exception as e:
                 print(f"Error cleaning up MCP server {server_name}: {e}")
         
         self.connected_servers.clear()
         self.available_tools.clear()
+        self._mcp_tools = []
 
 
 class MCPIntegratedTools:
@@ -187,6 +247,28 @@ class MCPIntegratedTools:
         # Otherwise, use regular tools
         return self.regular_tools.execute_tool(tool_name, **kwargs)
     
+    async def execute_tools_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Execute several tools concurrently, MCP ones pipelined on one session."""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(calls)
+        mcp_indices = []
+        pending = []
+        
+        for i, (tool_name, arguments) in enumerate(calls):
+            if self.mcp_connected and self.mcp_client.is_mcp_tool(tool_name):
+                mcp_indices.append(i)
+            else:
+                # Regular tools block, so they run on worker threads meanwhile
+                pending.append((i, asyncio.to_thread(self.regular_tools.execute_tool, tool_name, **arguments)))
+        
+        mcp_batch = self.mcp_client.execute_mcp_tools_batch([calls[i] for i in mcp_indices])
+        mcp_results, *regular_results = await asyncio.gather(mcp_batch, *(job for _, job in pending))
+        
+        for i, result in zip(mcp_indices, mcp_results):
+            results[i] = result
+        for (i, _), result in zip(pending, regular_results):
+            results[i] = result
+        return results
+    
     async def cleanup(self):
         """Clean up MCP connections."""
         if self.mcp_connected:
@@ -195,22 +277,43 @@ class MCPIntegratedTools:
 
 # Synchronous wrapper for easier integration
 class MCPToolsWrapper:
-    """Synchronous wrapper for MCP tools to integrate with existing code."""
+    """
+    Synchronous wrapper for MCP tools to integrate with existing code.
     
-    def __init__(self):
+    The MCP session lives on an event loop that runs forever on a daemon
+    thread. Callers submit coroutines with run_coroutine_threadsafe, so
+    calls from several threads overlap on the one session instead of taking
+    turns driving the loop.
+    """
+    
+    def __init__(self, timeout: float = 120.0):
+        """
+        Args:
+            timeout (float): Seconds to wait for a single tool call
+        """
         self.mcp_tools = None
         self._loop = None
+        self._thread = None
+        self.timeout = timeout
+    
+    def _run(self, coro):
+        """Run a coroutine on the loop thread and wait for its result."""
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return future.result(self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
     
     def initialize(self, base_directory: str = ".") -> bool:
         """Initialize MCP tools synchronously."""
         try:
-            self._loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self._loop)
+            self._loop = _new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="mcp-loop", daemon=True)
+            self._thread.start()
             
             self.mcp_tools = MCPIntegratedTools()
-            success = self._loop.run_until_complete(
-                self.mcp_tools.initialize_mcp(base_directory)
-            )
+            success = self._run(self.mcp_tools.initialize_mcp(base_directory))
             return success
         except Exception as e:
             print(f"Failed to initialize MCP wrapper: {e}")
@@ -227,19 +330,34 @@ class MCPToolsWrapper:
         if not self.mcp_tools or not self._loop:
             return {"success": False, "error": "MCP not initialized"}
         
+        # Regular tools block; run them here rather than stalling the MCP loop
+        if not (self.mcp_tools.mcp_connected and self.mcp_tools.mcp_client.is_mcp_tool(tool_name)):
+            return self.mcp_tools.regular_tools.execute_tool(tool_name, **kwargs)
+        
         try:
-            return self._loop.run_until_complete(
-                self.mcp_tools.execute_tool(tool_name, **kwargs)
-            )
+            return self._run(self.mcp_tools.mcp_client.execute_mcp_tool(tool_name, kwargs))
         except Exception as e:
             return {"success": False, "error": f"Error executing tool: {str(e)}"}
     
+    def execute_tools_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Execute several tools in one synchronous call (see `MCPIntegratedTools.execute_tools_batch`)."""
+        if not self.mcp_tools or not self._loop:
+            return [{"success": False, "error": "MCP not initialized"} for _ in calls]
+        
+        try:
+            return self._run(self.mcp_tools.execute_tools_batch(calls))
+        except Exception as e:
+            return [{"success": False, "error": f"Error executing tool: {str(e)}"} for _ in calls]
+    
     def cleanup(self):
         """Clean up resources."""
         if self.mcp_tools and self._loop:
-            self._loop.run_until_complete(self.mcp_tools.cleanup())
+            self._run(self.mcp_tools.cleanup())
         if self._loop:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
             self._loop.close()
+            self._loop = None
 
 
 if __name__ == "__main__":
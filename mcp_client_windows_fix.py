@@ -6,154 +6,207 @@ Agent Engineering Bootcamp - Week 3 Assignment
 This module provides a Windows-compatible MCP client that fixes the subprocess issues.
 """
 
-import asyncio
-import json
 import subprocess
 import os
-import sys
-from typing import Dict, List, Any, Optional
-from agent_tools import AgentTools
+import codecs
+import mmap
+import shutil
+import functools
+from collections import deque
+from stat import S_ISDIR, S_ISREG
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 
 
-class WindowsMCPClient:
-    """Windows-compatible MCP client using simplified communication."""
+# UTF-8 for the only non-ASCII characters whose str.lower() contains
+# ASCII: U+0130 (İ, lowers to "i" + a combining dot) and U+212A (Kelvin
+# sign, lowers to "k")
+_LOWERS_TO_ASCII = {"i": "\u0130".encode("utf-8"), "k": "\u212a".encode("utf-8")}
+
+
+@functools.lru_cache(maxsize=128)
+def _prefilter_needles(search_term_lower: str) -> Optional[Tuple[bytes, ...]]:
+    """
+    Get byte strings, one of which any file whose lowered text contains the term must contain.
     
-    def __init__(self):
-        """Initialize the Windows MCP client."""
-        self.available_tools = {}
-        self.server_process = None
+    The raw bytes are searched after bytes.lower(), which folds ASCII
+    only, so this works for ASCII terms; the few non-ASCII characters
+    that lower to ASCII are added as extra needles. Returns None (no
+    prefilter) for empty or non-ASCII terms and for terms with line
+    breaks, which text-mode newline translation can create from other
+    bytes.
+    """
+    if not search_term_lower or not search_term_lower.isascii() or "\r" in search_term_lower or "\n" in search_term_lower:
+        return None
     
-    def get_mcp_tools(self) -> List[Dict]:
-        """Get MCP tools in OpenAI function calling format."""
-        return [
-            {
-                "type": "function",
-                "function": {
-                    "name": "mcp_read_file",
-                    "description": "[MCP] Read the contents of a file",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "file_path": {
-                                "type": "string",
-                                "description": "Path to the file to read"
-                            }
-                        },
-                        "required": ["file_path"]
+    needles = [search_term_lower.encode("ascii")]
+    needles += [raw for char, raw in _LOWERS_TO_ASCII.items() if char in search_term_lower]
+    return tuple(needles)
+
+
+# Tool schemas in OpenAI function calling format; pure data, built once
+_MCP_TOOLS_SCHEMA: List[Dict] = [
+    {
+        "type": "function",
+        "function": {
+            "name": "mcp_read_file",
+            "description": "[MCP] Read the contents of a file",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "file_path": {
+                        "type": "string",
+                        "description": "Path to the file to read"
                     }
-                }
-            },
-            {
-                "type": "function", 
-                "function": {
-                    "name": "mcp_write_file",
-                    "description": "[MCP] Write content to a file (creates or overwrites)",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "file_path": {
-                                "type": "string",
-                                "description": "Path to the file to write"
-                            },
-                            "content": {
-                                "type": "string",
-                                "description": "Content to write to the file"
-                            }
-                        },
-                        "required": ["file_path", "content"]
+                },
+                "required": ["file_path"]
+            }
+        }
+    },
+    {
+        "type": "function", 
+        "function": {
+            "name": "mcp_write_file",
+            "description": "[MCP] Write content to a file (creates or overwrites)",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "file_path": {
+                        "type": "string",
+                        "description": "Path to the file to write"
+                    },
+                    "content": {
+                        "type": "string",
+                        "description": "Content to write to the file"
                     }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "mcp_list_directory",
-                    "description": "[MCP] List contents of a directory",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "directory_path": {
-                                "type": "string",
-                                "description": "Path to the directory to list",
-                                "default": "."
-                            }
-                        }
+                },
+                "required": ["file_path", "content"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "mcp_list_directory",
+            "description": "[MCP] List contents of a directory",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "directory_path": {
+                        "type": "string",
+                        "description": "Path to the directory to list",
+                        "default": "."
                     }
                 }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "mcp_search_files",
-                    "description": "[MCP] Search for text within files in a directory",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "search_term": {
-                                "type": "string",
-                                "description": "Text to search for"
-                            },
-                            "directory_path": {
-                                "type": "string",
-                                "description": "Directory to search in",
-                                "default": "."
-                            },
-                            "file_extension": {
-                                "type": "string",
-                                "description": "File extension to filter by (e.g., '.py', '.txt')",
-                                "default": ""
-                            }
-                        },
-                        "required": ["search_term"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "mcp_search_files",
+            "description": "[MCP] Search for text within files in a directory",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "search_term": {
+                        "type": "string",
+                        "description": "Text to search for"
+                    },
+                    "directory_path": {
+                        "type": "string",
+                        "description": "Directory to search in",
+                        "default": "."
+                    },
+                    "file_extension": {
+                        "type": "string",
+                        "description": "File extension to filter by (e.g., '.py', '.txt')",
+                        "default": ""
+                    },
+                    "max_results": {
+                        "type": "integer",
+                        "description": "Maximum number of matching files to list (0 for no limit)",
+                        "default": 200
                     }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "mcp_file_info",
-                    "description": "[MCP] Get information about a file or directory",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "path": {
-                                "type": "string",
-                                "description": "Path to the file or directory"
-                            }
-                        },
-                        "required": ["path"]
+                },
+                "required": ["search_term"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "mcp_file_info",
+            "description": "[MCP] Get information about a file or directory",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "path": {
+                        "type": "string",
+                        "description": "Path to the file or directory"
                     }
-                }
+                },
+                "required": ["path"]
             }
-        ]
+        }
+    }
+]
+
+
+class WindowsMCPClient:
+    """Windows-compatible MCP client using simplified communication."""
+    
+    def __init__(self, base_directory: str = "."):
+        """Initialize the Windows MCP client."""
+        self.set_base_directory(base_directory)
+        self.available_tools = {}
+        self.server_process = None
+        # ripgrep, when installed, does the searching for _search_files_direct
+        self._rg = shutil.which("rg")
+        self._search_pool: Optional[ThreadPoolExecutor] = None
+        # Directory names pruned from searches, comma-separated (empty: none)
+        skip_dirs = os.getenv("FS_MCP_SEARCH_SKIP_DIRS")
+        if skip_dirs is not None:
+            self.SEARCH_SKIP_DIRS = frozenset(name.strip() for name in skip_dirs.split(",") if name.strip())
+        # Directories already known to exist, so writes skip makedirs
+        self._known_dirs = set()
+        # Tool name -> handler taking the call's arguments dict
+        self._dispatch = {
+            "mcp_read_file": lambda args: self._read_file_direct(args["file_path"]),
+            "mcp_write_file": lambda args: self._write_file_direct(args["file_path"], args["content"]),
+            "mcp_list_directory": lambda args: self._list_directory_direct(args.get("directory_path", ".")),
+            "mcp_search_files": lambda args: self._search_files_direct(
+                args["search_term"],
+                args.get("directory_path", "."),
+                args.get("file_extension", ""),
+                args.get("max_results")
+            ),
+            "mcp_file_info": lambda args: self._file_info_direct(args["path"]),
+        }
+    
+    def set_base_directory(self, base_directory: str):
+        """Resolve the directory that all tool paths must stay within."""
+        self._base_resolved = os.path.realpath(base_directory)
+        # Containment is checked on strings against this prefix
+        self._base_prefix = os.path.join(self._base_resolved, "")
+    
+    def get_mcp_tools(self) -> List[Dict]:
+        """Get MCP tools in OpenAI function calling format (a shared list; do not modify)."""
+        return _MCP_TOOLS_SCHEMA
     
     def execute_mcp_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Execute an MCP tool using direct file operations (Windows-compatible)."""
         try:
-            # Remove mcp_ prefix for internal handling
-            operation = tool_name.replace("mcp_", "")
-            
-            if operation == "read_file":
-                return self._read_file_direct(arguments["file_path"])
-            elif operation == "write_file":
-                return self._write_file_direct(arguments["file_path"], arguments["content"])
-            elif operation == "list_directory":
-                directory_path = arguments.get("directory_path", ".")
-                return self._list_directory_direct(directory_path)
-            elif operation == "search_files":
-                search_term = arguments["search_term"]
-                directory_path = arguments.get("directory_path", ".")
-                file_extension = arguments.get("file_extension", "")
-                return self._search_files_direct(search_term, directory_path, file_extension)
-            elif operation == "file_info":
-                return self._file_info_direct(arguments["path"])
-            else:
+            handler = self._dispatch.get(tool_name)
+            if handler is None:
                 return {
                     "success": False,
-                    "error": f"Unknown MCP operation: {operation}",
+                    "error": f"Unknown MCP operation: {tool_name.replace('mcp_', '')}",
                     "result": ""
                 }
-                
+            
+            return handler(arguments)
+            
         except Exception as e:
             return {
                 "success": False,
@@ -161,45 +214,45 @@ class WindowsMCPClient:
                 "result": ""
             }
     
-    def _safe_path(self, path: str, base_directory: str = ".") -> str:
+    def _safe_path(self, path: str) -> str:
         """Ensure the path is safe and within base directory."""
-        from pathlib import Path
-        
-        target_path = Path(path)
-        if not target_path.is_absolute():
-            target_path = Path(base_directory) / target_path
+        # Absolute paths replace the base in the join
+        resolved_path = os.path.realpath(os.path.join(self._base_resolved, path))
         
-        # Resolve and check if it's within base directory
-        resolved_path = target_path.resolve()
-        base_resolved = Path(base_directory).resolve()
-        
-        try:
-            resolved_path.relative_to(base_resolved)
-            return str(resolved_path)
-        except ValueError:
+        # Check if it's within base directory
+        if resolved_path != self._base_resolved and not resolved_path.startswith(self._base_prefix):
             raise PermissionError(f"Access denied: Path outside base directory")
+        return resolved_path
+    
+    @staticmethod
+    def _stat(safe_path: str) -> Optional[os.stat_result]:
+        """stat() a path once for both the existence and the type checks; None if missing."""
+        try:
+            return os.stat(safe_path)
+        except OSError:
+            return None  # Same as os.path.exists() returning False
     
     def _read_file_direct(self, file_path: str) -> Dict[str, Any]:
         """Read file directly using Python file operations."""
         try:
             safe_path = self._safe_path(file_path)
             
-            if not os.path.exists(safe_path):
+            st = self._stat(safe_path)
+            if st is None:
                 return {
                     "success": False,
                     "error": f"File not found: {file_path}",
                     "result": ""
                 }
             
-            if not os.path.isfile(safe_path):
+            if not S_ISREG(st.st_mode):
                 return {
                     "success": False,
                     "error": f"Path is not a file: {file_path}",
                     "result": ""
                 }
             
-            with open(safe_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content = self._read_text(safe_path)
             
             return {
                 "success": True,
@@ -225,11 +278,18 @@ class WindowsMCPClient:
         try:
             safe_path = self._safe_path(file_path)
             
-            # Create parent directories if they don't exist
-            os.makedirs(os.path.dirname(safe_path), exist_ok=True)
+            # Same bytes text mode would write: UTF-8, '\n' as os.linesep
+            data = content.encode('utf-8')
+            if os.linesep != "\n":
+                data = data.replace(b"\n", os.linesep.encode())
             
-            with open(safe_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            parent = os.path.dirname(safe_path)
+            try:
+                self._write_bytes(safe_path, parent, data)
+            except FileNotFoundError:
+                # A directory we created earlier may have been removed since
+                self._known_dirs.discard(parent)
+                self._write_bytes(safe_path, parent, data)
             
             return {
                 "success": True,
@@ -244,33 +304,91 @@ class WindowsMCPClient:
                 "result": ""
             }
     
+    # Files at least this large are decoded straight from a memory map
+    _MMAP_READ_BYTES = 64 << 10
+    
+    @classmethod
+    def _read_text(cls, safe_path: str) -> str:
+        """
+        Read a file as text-mode open().read() would: strict UTF-8, universal newlines.
+        
+        Small files take one os.read of their stat size (plus the read that
+        sees EOF) and one decode; larger ones are decoded from an mmap
+        without an intermediate bytes copy.
+        """
+        fd = os.open(safe_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            size = os.fstat(fd).st_size
+            if size >= cls._MMAP_READ_BYTES:
+                with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                    content = str(mm, 'utf-8')
+            else:
+                parts = [os.read(fd, size)] if size else []
+                while True:
+                    part = os.read(fd, 1 << 16)  # The file may have grown
+                    if not part:
+                        break
+                    parts.append(part)
+                content = b"".join(parts).decode('utf-8')
+        finally:
+            os.close(fd)
+        
+        return content.replace('\r\n', '\n').replace('\r', '\n')
+    
+    _WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    
+    def _write_bytes(self, safe_path: str, parent: str, data: bytes):
+        """Write `data` to a file with raw fd writes, creating its parent directory once."""
+        # Create parent directories if they don't exist (once per directory)
+        if parent not in self._known_dirs:
+            os.makedirs(parent, exist_ok=True)
+            self._known_dirs.add(parent)
+        
+        fd = os.open(safe_path, self._WRITE_FLAGS, 0o666)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+    
+    @staticmethod
+    def _format_entry(entry: os.DirEntry) -> str:
+        """Format one directory listing line."""
+        if entry.is_dir():
+            return "📁 " + entry.name
+        if entry.is_file():
+            return f"📄 {entry.name} ({entry.stat().st_size} bytes)"
+        return "📄 " + entry.name
+    
     def _list_directory_direct(self, directory_path: str) -> Dict[str, Any]:
         """List directory contents directly."""
         try:
             safe_path = self._safe_path(directory_path)
+            st = self._stat(safe_path)
             
-            if not os.path.exists(safe_path):
+            if st is None:
                 return {
                     "success": False,
                     "error": f"Directory not found: {directory_path}",
                     "result": ""
                 }
             
-            if not os.path.isdir(safe_path):
+            if not S_ISDIR(st.st_mode):
                 return {
                     "success": False,
                     "error": f"Path is not a directory: {directory_path}",
                     "result": ""
                 }
             
-            items = []
-            for item in sorted(os.listdir(safe_path)):
-                item_path = os.path.join(safe_path, item)
-                item_type = "📁" if os.path.isdir(item_path) else "📄"
-                size = f" ({os.path.getsize(item_path)} bytes)" if os.path.isfile(item_path) else ""
-                items.append(f"{item_type} {item}{size}")
+            # scandir reports entry types from the directory read itself, so
+            # only regular files cost a stat() (for their size)
+            with os.scandir(safe_path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+            
+            items = [self._format_entry(entry) for entry in entries]
             
-            content = f"Directory: {directory_path}\n---\n" + "\n".join(items)
+            content = "Directory: " + directory_path + "\n---\n" + "\n".join(items)
             if not items:
                 content += "(empty directory)"
             
@@ -287,54 +405,60 @@ class WindowsMCPClient:
                 "result": ""
             }
     
-    def _search_files_direct(self, search_term: str, directory_path: str, file_extension: str) -> Dict[str, Any]:
-        """Search files directly using Python file operations."""
+    # Matching files listed by a search unless the caller asks otherwise
+    DEFAULT_MAX_RESULTS = 200
+    
+    def _search_files_direct(self, search_term: str, directory_path: str, file_extension: str,
+                             max_results: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Search files directly using Python file operations.
+        
+        Matches are consumed lazily and the search stops after `max_results`
+        matching files (DEFAULT_MAX_RESULTS if None, 0 for no limit), so
+        huge trees cost neither unbounded memory nor a full scan.
+        """
         try:
             safe_path = self._safe_path(directory_path)
             
-            if not os.path.exists(safe_path) or not os.path.isdir(safe_path):
+            st = self._stat(safe_path)
+            if st is None or not S_ISDIR(st.st_mode):
                 return {
                     "success": False,
                     "error": f"Invalid directory: {directory_path}",
                     "result": ""
                 }
             
-            matches = []
-            search_term_lower = search_term.lower()
+            if max_results is None:
+                max_results = self.DEFAULT_MAX_RESULTS
+            max_results = int(max_results)
             
-            for root, dirs, files in os.walk(safe_path):
-                for file in files:
-                    # Filter by extension if specified
-                    if file_extension and not file.endswith(file_extension):
-                        continue
+            matches = []
+            files = 0
+            truncated = False
+            hits = self._iter_matches(search_term, safe_path, file_extension)
+            try:
+                for relative_path, count, shown in hits:
+                    if max_results > 0 and files >= max_results:
+                        truncated = True
+                        break
                     
-                    file_path = os.path.join(root, file)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                            
-                        if search_term_lower in content.lower():
-                            # Find line numbers with matches
-                            lines = content.split('\n')
-                            matching_lines = []
-                            for i, line in enumerate(lines, 1):
-                                if search_term_lower in line.lower():
-                                    matching_lines.append(f"  Line {i}: {line.strip()}")
-                            
-                            relative_path = os.path.relpath(file_path, safe_path)
-                            matches.append(f"📄 {relative_path}:")
-                            matches.extend(matching_lines[:3])  # Show first 3 matches
-                            if len(matching_lines) > 3:
-                                matches.append(f"  ... and {len(matching_lines) - 3} more matches")
-                            matches.append("")  # Empty line for separation
-                            
-                    except (UnicodeDecodeError, PermissionError):
-                        continue  # Skip binary files or files we can't read
+                    matches.append(f"📄 {relative_path}:")
+                    matches.extend(shown)  # Show first 3 matches
+                    if count > 3:
+                        matches.append(f"  ... and {count - 3} more matches")
+                    matches.append("")  # Empty line for separation
+                    files += 1
+            finally:
+                hits.close()  # Stops rg or cancels pending scans
             
+            if truncated:
+                matches.append(f"... search truncated at {files} files")
+            
+            where = f"{directory_path}{self._skip_note()}"
             if matches:
-                result = f"Search results for '{search_term}' in {directory_path}:\n---\n" + "\n".join(matches)
+                result = f"Search results for '{search_term}' in {where}:\n---\n" + "\n".join(matches)
             else:
-                result = f"No matches found for '{search_term}' in {directory_path}"
+                result = f"No matches found for '{search_term}' in {where}"
             
             return {
                 "success": True,
@@ -349,31 +473,325 @@ class WindowsMCPClient:
                 "result": ""
             }
     
+    def _iter_matches(self, search_term: str, safe_path: str,
+                      file_extension: str) -> Iterator[Tuple[str, int, List[str]]]:
+        """Yield (relative path, match count, first 3 formatted lines) per matching file."""
+        if self._rg:
+            return self._iter_matches_rg(search_term, safe_path, file_extension)
+        return self._iter_matches_python(search_term, safe_path, file_extension)
+    
+    def _iter_matches_rg(self, search_term: str, safe_path: str,
+                         file_extension: str) -> Iterator[Tuple[str, int, List[str]]]:
+        """
+        Search with ripgrep, yielding files as its output streams in.
+        
+        ripgrep walks the tree in parallel and uses SIMD literal search. It
+        runs case-insensitive and fixed-string, without honoring ignore files
+        or skipping hidden files, and prunes SEARCH_SKIP_DIRS, so it sees the
+        same files as the Python walk. Binary files (a NUL near the start)
+        are skipped even when they would decode as UTF-8. Closing the
+        generator early kills rg.
+        """
+        args = [
+            self._rg, "--line-number", "--ignore-case", "--fixed-strings",
+            "--no-heading", "--with-filename", "--null", "--color=never",
+            "--hidden", "--no-ignore", "--max-columns=500", "--max-columns-preview"
+        ]
+        if file_extension:
+            args.append(f"--glob=*{file_extension}")
+        # The trailing slash limits each glob to directories, as in _walk_files
+        args += [f"--glob=!{name}/" for name in sorted(self.SEARCH_SKIP_DIRS)]
+        args += ["-e", search_term, "--", safe_path]
+        
+        # rg exits 1 when nothing matched, so the return code is not checked
+        proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        try:
+            # rg prints each file's matches together, so a file is complete
+            # when the path changes
+            current, count, shown = None, 0, []
+            for raw in proc.stdout:
+                path, _, rest = raw.rstrip(b"\r\n").partition(b"\0")
+                if path != current:
+                    if current is not None:
+                        yield os.path.relpath(os.fsdecode(current), safe_path), count, shown
+                    current, count, shown = path, 0, []
+                
+                line_number, _, text = rest.partition(b":")
+                count += 1
+                if count <= 3:
+                    line = text.decode("utf-8", errors="replace").strip()
+                    shown.append(f"  Line {line_number.decode()}: {line}")
+            
+            if current is not None:
+                yield os.path.relpath(os.fsdecode(current), safe_path), count, shown
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.stdout.close()
+            proc.wait()
+    
+    # Files scanned ahead of the one being reported
+    _SCAN_AHEAD = 64
+    
+    def _iter_matches_python(self, search_term: str, safe_path: str,
+                             file_extension: str) -> Iterator[Tuple[str, int, List[str]]]:
+        """
+        Search file contents in-process (used when ripgrep is unavailable).
+        
+        Each file is memory-mapped and checked for the term on its raw bytes
+        first, so files that cannot match are never decoded or split. Up to
+        _SCAN_AHEAD files are in flight on a thread pool, so opens and
+        stats (which release the GIL) overlap; results keep the walk order.
+        Closing the generator early cancels scans that have not started.
+        """
+        search_term_lower = search_term.lower()
+        needles = _prefilter_needles(search_term_lower)
+        pool = self._get_search_pool()
+        pending = deque()
+        
+        try:
+            for file_path in self._walk_files(safe_path, file_extension):
+                pending.append((file_path, pool.submit(self._scan_file, file_path, search_term_lower, needles)))
+                if len(pending) < self._SCAN_AHEAD:
+                    continue
+                
+                file_path, future = pending.popleft()
+                hit = future.result()
+                if hit is not None:
+                    yield (os.path.relpath(file_path, safe_path), *hit)
+            
+            while pending:
+                file_path, future = pending.popleft()
+                hit = future.result()
+                if hit is not None:
+                    yield (os.path.relpath(file_path, safe_path), *hit)
+        finally:
+            for _, future in pending:
+                future.cancel()
+    
+    # Directories never worth searching: VCS metadata, dependencies, caches
+    # and build output (FS_MCP_SEARCH_SKIP_DIRS overrides them)
+    SEARCH_SKIP_DIRS = frozenset({
+        '.git', '.hg', '.svn', 'node_modules', '.venv', 'venv', '__pycache__',
+        '.mypy_cache', '.pytest_cache', '.tox', 'dist', 'build'
+    })
+    
+    def _skip_note(self) -> str:
+        """Name the pruned directories in search results, so a miss inside one is explained."""
+        if not self.SEARCH_SKIP_DIRS:
+            return ""
+        return f" (skipped directories: {', '.join(sorted(self.SEARCH_SKIP_DIRS))})"
+    
+    def _walk_files(self, root: str, file_extension: str) -> Iterator[str]:
+        """
+        Yield the files under `root` in os.walk order, pruning SEARCH_SKIP_DIRS.
+        
+        An explicit stack of scandir iterators replaces os.walk, so entry
+        types come from the directory read and skipped directories are
+        never opened. Symlinked directories are not followed.
+        """
+        stack = [root]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            
+            subdirs = []
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                
+                if is_dir:
+                    if entry.name not in self.SEARCH_SKIP_DIRS and not entry.is_symlink():
+                        subdirs.append(entry.path)
+                elif not file_extension or entry.name.endswith(file_extension):
+                    yield entry.path
+            
+            # Reversed, so the first subdirectory is walked first
+            stack.extend(reversed(subdirs))
+    
+    def _get_search_pool(self) -> ThreadPoolExecutor:
+        """Get the thread pool for file scans, created on first search."""
+        if self._search_pool is None:
+            self._search_pool = ThreadPoolExecutor(
+                max_workers=min(32, (os.cpu_count() or 1) * 4),
+                thread_name_prefix="mcp-search"
+            )
+        return self._search_pool
+    
+    def cleanup(self):
+        """Stop the search thread pool, if one was started."""
+        if self._search_pool is not None:
+            self._search_pool.shutdown(wait=False)
+            self._search_pool = None
+    
+    @classmethod
+    def _scan_file(cls, file_path: str, search_term_lower: str,
+                   needles: Optional[Tuple[bytes, ...]]) -> Optional[Tuple[int, List[str]]]:
+        """
+        Count the matching lines of one file and format the first three (blocking).
+        
+        Returns None when the file does not contain the term at all, or is
+        binary or unreadable.
+        """
+        try:
+            content = cls._read_if_may_match(file_path, needles)
+        except (UnicodeDecodeError, PermissionError):
+            return None  # Skip binary files or files we can't read
+        
+        if content is None:
+            return None
+        content_lower = content.lower()
+        if search_term_lower not in content_lower:
+            return None
+        
+        if search_term_lower and len(content_lower) == len(content):
+            return cls._match_offsets(content, content_lower, search_term_lower)
+        
+        # Lowering changed the length (e.g. U+0130), so offsets in the
+        # lowered text do not line up: check line by line instead
+        count = 0
+        shown = []
+        for i, line in enumerate(content.split('\n'), 1):
+            if search_term_lower in line.lower():
+                count += 1
+                if count <= 3:
+                    shown.append(f"  Line {i}: {line.strip()}")
+        return count, shown
+    
+    @staticmethod
+    def _match_offsets(content: str, content_lower: str, search_term_lower: str) -> Tuple[int, List[str]]:
+        """
+        Find matching lines from the term's offsets in the lowered text.
+        
+        str.find jumps between hits and str.count tracks line numbers, so
+        lines without a hit are never sliced or lowered. Needs
+        `content_lower` to be offset-aligned with `content`.
+        """
+        if "\n" in search_term_lower:
+            return 0, []  # No single line can contain it
+        
+        count = 0
+        shown = []
+        line_number = 1
+        counted_to = 0
+        hit = content_lower.find(search_term_lower)
+        while hit >= 0:
+            line_number += content_lower.count("\n", counted_to, hit)
+            end = content_lower.find("\n", hit)
+            if end < 0:
+                end = len(content_lower)
+            
+            count += 1
+            if count <= 3:
+                start = content_lower.rfind("\n", 0, hit) + 1
+                shown.append(f"  Line {line_number}: {content[start:end].strip()}")
+            
+            # One line counts once: resume after it
+            counted_to = hit
+            hit = content_lower.find(search_term_lower, end + 1)
+        return count, shown
+    
+    # Bytes lowered at a time by the prefilter
+    _FOLD_WINDOW = 1 << 20
+    
+    @classmethod
+    def _may_contain(cls, mm: mmap.mmap, needles: Tuple[bytes, ...]) -> bool:
+        """
+        Check whether the lowered bytes contain any needle.
+        
+        bytes.lower() plus substring search runs in C and beats an
+        IGNORECASE regex about 2.5x; windows overlapping by the longest
+        needle keep memory bounded and catch matches across boundaries.
+        """
+        overlap = max(map(len, needles)) - 1
+        window = max(cls._FOLD_WINDOW, 2 * overlap + 1)
+        size = len(mm)
+        start = 0
+        while True:
+            folded = mm[start:start + window].lower()
+            if any(needle in folded for needle in needles):
+                return True
+            if start + window >= size:
+                return False
+            start += window - overlap
+    
+    @classmethod
+    def _read_if_may_match(cls, file_path: str, needles: Optional[Tuple[bytes, ...]]) -> Optional[str]:
+        """
+        Read a file as text-mode open() would, or return None if `needles` rule it out.
+        
+        The prefilter scans the memory-mapped file a window at a time.
+        Only files that pass are decoded (strict UTF-8, raising
+        UnicodeDecodeError) with universal newlines.
+        """
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return ""  # mmap cannot map an empty file
+            
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if needles is not None and not cls._may_contain(mm, needles):
+                    return None
+                content = str(mm, 'utf-8')
+        
+        return content.replace('\r\n', '\n').replace('\r', '\n')
+    
+    @staticmethod
+    def _count_lines(safe_path: str) -> int:
+        """
+        Count lines the way text-mode readlines() would.
+        
+        Reads 1 MiB binary chunks and counts line breaks with bytes.count
+        instead of building a str per line. \r\n and a lone \r each end a
+        line, as in universal-newlines mode. An incremental decoder still
+        raises UnicodeDecodeError on non-UTF-8 files.
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        lines = 0
+        last = b""
+        with open(safe_path, 'rb') as f:
+            while True:
+                chunk = f.read(1 << 20)
+                if not chunk:
+                    break
+                decoder.decode(chunk)
+                lines += chunk.count(b"\n") + chunk.count(b"\r") - chunk.count(b"\r\n")
+                if last == b"\r" and chunk[:1] == b"\n":
+                    lines -= 1  # \r\n split across chunks
+                last = chunk[-1:]
+        decoder.decode(b"", final=True)
+        
+        if last and last not in (b"\n", b"\r"):
+            lines += 1  # final line without a terminator
+        return lines
+    
     def _file_info_direct(self, path: str) -> Dict[str, Any]:
         """Get file information directly."""
         try:
             safe_path = self._safe_path(path)
             
-            if not os.path.exists(safe_path):
+            stat = self._stat(safe_path)
+            if stat is None:
                 return {
                     "success": False,
                     "error": f"Path not found: {path}",
                     "result": ""
                 }
             
-            stat = os.stat(safe_path)
             info = [
                 f"Path: {path}",
-                f"Type: {'Directory' if os.path.isdir(safe_path) else 'File'}",
+                f"Type: {'Directory' if S_ISDIR(stat.st_mode) else 'File'}",
                 f"Size: {stat.st_size} bytes",
                 f"Last modified: {stat.st_mtime}",
             ]
             
-            if os.path.isfile(safe_path):
+            if S_ISREG(stat.st_mode):
                 try:
-                    with open(safe_path, 'r', encoding='utf-8') as f:
-                        lines = len(f.readlines())
-                    info.append(f"Lines: {lines}")
+                    info.append(f"Lines: {self._count_lines(safe_path)}")
                 except UnicodeDecodeError:
                     info.append("Type: Binary file")
             
@@ -398,16 +816,18 @@ class WindowsMCPIntegratedTools:
     
     def __init__(self):
         """Initialize with both regular tools and Windows MCP integration."""
+        # Import here so importing this module does not pull in the RAG stack
+        from agent_tools import AgentTools
+        
         self.regular_tools = AgentTools()
         self.mcp_client = WindowsMCPClient()
         self.mcp_enabled = True  # Always enabled since we use direct operations
+        # Neither tool set changes after construction
+        self._tools = self.regular_tools.get_available_tools() + self.mcp_client.get_mcp_tools()
     
     def get_available_tools(self) -> List[Dict]:
         """Get all available tools including both regular and MCP tools."""
-        tools = self.regular_tools.get_available_tools()
-        mcp_tools = self.mcp_client.get_mcp_tools()
-        tools.extend(mcp_tools)
-        return tools
+        return self._tools
     
     def execute_tool(self, tool_name: str, **kwargs) -> Dict[str, Any]:
         """Execute either a regular tool or an MCP tool."""
@@ -427,6 +847,7 @@ class WindowsMCPToolsWrapper:
     
     def initialize(self, base_directory: str = ".") -> bool:
         """Initialize MCP tools (always successful on Windows version)."""
+        self.mcp_tools.mcp_client.set_base_directory(base_directory)
         return True
     
     def get_available_tools(self) -> List[Dict]:
@@ -438,8 +859,8 @@ class WindowsMCPToolsWrapper:
         return self.mcp_tools.execute_tool(tool_name, **kwargs)
     
     def cleanup(self):
-        """Clean up resources (no-op for Windows version)."""
-        pass
+        """Clean up resources (only the search threads for Windows version)."""
+        self.mcp_tools.mcp_client.cleanup()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Protocol, Sequence, Union
 
 
 class RAGSourceType(Enum):
@@ -10,6 +10,30 @@ class RAGSourceType(Enum):
     PINECONE = "pinecone"
 
 
+class RetrievedDocument(Protocol):
+    """
+    A retrieved document exposed as a read-only view.
+    
+    Sources may return these instead of dicts to avoid building one dict per
+    document; `to_dict` gives the equivalent {"content", "metadata"} dict.
+    """
+    
+    @property
+    def content(self) -> str: ...
+    
+    @property
+    def score(self) -> Any: ...
+    
+    @property
+    def metadata(self) -> Dict[str, Any]: ...
+    
+    def to_dict(self) -> Dict[str, Any]: ...
+
+
+# What retrieve_documents returns for each document
+Document = Union[Dict[str, Any], RetrievedDocument]
+
+
 class RAGSourceBase(ABC):
     """
     Abstract base class for RAG (Retrieval-Augmented Generation) sources.
@@ -18,7 +42,7 @@ class RAGSourceBase(ABC):
     """
     
     @abstractmethod
-    def retrieve_documents(self, question: str, num_results: int = 5) -> List[Dict[str, Any]]:
+    def retrieve_documents(self, question: str, num_results: int = 5) -> Sequence[Document]:
         """
         Retrieve relevant documents based on the question.
         
@@ -27,7 +51,8 @@ class RAGSourceBase(ABC):
             num_results (int): Number of documents to retrieve
             
         Returns:
-            List[Dict[str, Any]]: List of retrieved documents with metadata
+            Sequence[Document]: Retrieved documents, each either a
+                {"content", "metadata"} dict or a RetrievedDocument view
         """
         pass
     
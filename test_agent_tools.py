@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for the agent's regular tools
+Agent Engineering Bootcamp - Week 3 Assignment
+
+Network backends are replaced by fakes, so these run offline.
+"""
+
+import asyncio
+import pytest
+from agent_tools import AgentTools
+
+
+@pytest.fixture
+def tools():
+    return AgentTools(seed=0)
+
+
+def test_async_client_is_shared_per_loop_and_closed_with_the_session(tools):
+    async def run():
+        async with tools.async_session():
+            client = tools._get_async_client()
+            async with tools.async_session():
+                assert tools._get_async_client() is client
+            assert not client.is_closed  # the outer session still uses it
+        return client
+
+    first = asyncio.run(run())
+    assert first.is_closed
+    second = asyncio.run(run())
+    assert second is not first
+    assert not tools._aclients
+
+
+def test_close_releases_clients_of_open_loops(tools):
+    loop = asyncio.new_event_loop()
+    try:
+        async def get_client():
+            return tools._get_async_client()
+
+        client = loop.run_until_complete(get_client())
+        tools.close()
+        assert client.is_closed and not tools._aclients
+    finally:
+        loop.close()
+
+
+def test_async_web_search_skips_duckduckgo_for_quick_answers(tools, monkeypatch):
+    requests = []
+
+    async def fake_ddg(query, max_results):
+        requests.append(query)
+        return tools._build_web_results(query, {"RelatedTopics": []}, max_results)
+
+    monkeypatch.setattr(tools, "_ddg_result_async", fake_ddg)
+
+    weather = asyncio.run(tools.search_web_async("weather in London"))
+    assert weather.success and "London" in weather.results[0].content
+    news = asyncio.run(tools.search_web_async("latest ai news"))
+    assert news.success and news.results[0].source == "news_api"
+    assert requests == []
+
+    asyncio.run(tools.search_web_async("python packaging"))
+    assert requests == ["python packaging"]
+
+
+@pytest.mark.parametrize("semantic", ["0", "1"])
+def test_document_cache_survives_a_restart(tmp_path, monkeypatch, semantic):
+    import agent_tools
+    from agent_tools import ToolResult
+
+    path = str(tmp_path / "documents.cache")  # no .npz suffix on purpose
+    monkeypatch.setenv("AGENT_DOCUMENT_CACHE_PATH", path)
+    monkeypatch.setenv("AGENT_DOCUMENT_CACHE_SEMANTIC", semantic)
+    monkeypatch.setattr(agent_tools, "_PERSISTED_CACHES", {})
+
+    AgentTools(seed=0)  # an older instance for the same file
+    second = AgentTools(seed=0)
+    result = ToolResult(success=True, query="refund policy", results=[], total_found=0)
+    second._document_cache.put("refund policy", result, 5)
+    assert list(agent_tools._PERSISTED_CACHES.values()) == [second._document_cache]
+
+    agent_tools._save_document_caches()
+    assert [p.name for p in tmp_path.iterdir()] == ["documents.cache"]
+
+    restarted = AgentTools(seed=0)
+    cached = restarted._document_cache.get("Refund policy?", 5)
+    assert cached is not None and cached.to_dict() == result.to_dict()
+    assert restarted._document_cache.get("refund policy", 3) is None
+
+
+# Keyword lists of the original substring classifiers
+BASELINE_WEATHER = ["weather", "temperature", "climate", "forecast", "rain", "sunny", "cloudy"]
+BASELINE_NEWS = ["news", "latest", "current", "today", "recent", "breaking", "updates"]
+BASELINE_FALLBACK = [
+    ("weather", ["weather", "temperature", "climate", "forecast"]),
+    ("news", ["news", "latest", "current", "today", "recent"]),
+    ("financial", ["price", "cost", "value", "bitcoin", "stock"]),
+]
+
+
+def baseline_classify(query):
+    """The original fallback classification, for whole-word queries."""
+    for search_type, keywords in BASELINE_FALLBACK:
+        if any(keyword in query.lower() for keyword in keywords):
+            return search_type
+    return "general"
+
+
+def test_query_classifiers_match_the_baseline_on_whole_words():
+    from agent_tools import _classify_query, _is_news_query, _is_weather_query
+
+    words = BASELINE_WEATHER + BASELINE_NEWS + [k for _, ks in BASELINE_FALLBACK for k in ks] + ["python"]
+    for word in words:
+        for query in (f"tell me about {word}", f"{word.upper()}?", f"is it {word}, really"):
+            assert _is_weather_query(query) == any(k in query.lower() for k in BASELINE_WEATHER), query
+            assert _is_news_query(query) == any(k in query.lower() for k in BASELINE_NEWS), query
+            assert _classify_query(query) == baseline_classify(query), query
+
+
+def test_query_classifiers_ignore_keywords_inside_other_words():
+    from agent_tools import _classify_query, _is_news_query, _is_weather_query
+
+    assert not _is_weather_query("model training tips")
+    assert not _is_news_query("subscribe to the newsletter")
+    assert _classify_query("costume ideas") == "general"
+    # Sunny is a quick-answer keyword but not a fallback one, as before
+    assert _is_weather_query("sunny beaches") and _classify_query("sunny beaches") == "general"
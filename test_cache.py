@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Tests for the query caches
+Agent Engineering Bootcamp - Week 3 Assignment
+
+Covers expiry, eviction and statistics of the exact caches, hit/miss at
+tau and wrong-neighbour rejection in the proximity caches, and tag
+separation in the tiered cache.
+"""
+
+import threading
+import time
+import numpy as np
+import pytest
+from cache import (
+    ExactCache, HNSWProximityCache, ProximityCache, SQLiteCache, TieredCache,
+    _hnswlib, embed_text, normalize_query, quantize_int8
+)
+
+PROXIMITY_CLASSES = [ProximityCache] + ([HNSWProximityCache] if _hnswlib() is not None else [])
+
+
+def unit(*values):
+    """A normalized float32 vector."""
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_normalize_query_keeps_distinct_questions_apart():
+    """Case, spacing and edge punctuation fold; inner punctuation does not."""
+    assert normalize_query("  What is  RAG? ") == normalize_query("what is rag")
+    assert normalize_query("“c++”") == "c++"
+    assert normalize_query("python 3.10") != normalize_query("python 310")
+
+
+def test_exact_cache_ttl_expires_entries():
+    cache = ExactCache(capacity=4, ttl=0.05)
+    cache.put("question", "answer")
+    assert cache.get("Question?") == "answer"
+
+    time.sleep(0.06)
+    assert cache.get("question") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_exact_cache_per_entry_ttl_overrides_default():
+    cache = ExactCache(capacity=4, ttl=60)
+    cache.put("short", "a", ttl=0.05)
+    cache.put("long", "b")
+    time.sleep(0.06)
+    assert cache.get("short") is None
+    assert cache.get("long") == "b"
+
+
+def test_exact_cache_evicts_least_recently_used():
+    cache = ExactCache(capacity=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_exact_cache_byte_budget():
+    cache = ExactCache(capacity=100, max_bytes=10, sizeof=len)
+    cache.put("a", "xxxx")
+    cache.put("b", "yyyy")
+    cache.put("c", "zzzz")  # 12 bytes > 10: the oldest goes
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 8
+
+    cache.put("huge", "x" * 11)  # Larger than the whole budget: not cached
+    assert cache.get("huge") is None
+    assert cache.get("b") == "yyyy"
+
+
+def test_exact_cache_tags_and_stats():
+    cache = ExactCache()
+    cache.put("question", "five", tag=5)
+    assert cache.get("question", tag=3) is None
+    assert cache.get("question", tag=5) == "five"
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_sqlite_cache_round_trip_and_expiry(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = SQLiteCache(path, ttl=0.05)
+    cache.put("question", {"content": "answer"}, tag=2)
+
+    # A second instance (e.g. another worker) sees the same file
+    assert SQLiteCache(path).get("question", tag=2) == {"content": "answer"}
+    assert cache.get("question", tag=3) is None
+
+    time.sleep(0.06)
+    assert cache.get("question", tag=2) is None
+
+
+@pytest.mark.parametrize("cls", PROXIMITY_CLASSES)
+@pytest.mark.parametrize("quantize", [False, True])
+def test_proximity_cache_hit_and_miss_at_tau(cls, quantize):
+    cache = cls(capacity=8, tau=0.05, dim=3, quantize=quantize)
+    cache.put("what is x", "x docs", unit(1, 0, 0.1))
+    cache.put("what is y", "y docs", unit(0, 1, 0.1))
+
+    assert cache.get("explain x", unit(1, 0, 0.12)) == "x docs"
+    assert cache.get("far from both", unit(1, 1, 0)) is None
+
+    cached_query, value, distance = cache.lookup("far from both", unit(1, 1, 0))
+    assert distance > cache.tau
+
+
+@pytest.mark.parametrize("cls", PROXIMITY_CLASSES)
+def test_proximity_cache_returns_the_matching_neighbour(cls):
+    """A hit pairs the query with its own value, never another entry's."""
+    cache = cls(capacity=64, tau=0.01)
+    queries = [f"report for region {i} quarter {i % 4}" for i in range(40)]
+    for query in queries:
+        cache.put(query, query.upper())
+
+    for query in queries:
+        assert cache.get(query) == query.upper()
+
+
+def test_hashed_embedder_rejects_near_miss_questions_at_default_tau():
+    """Questions differing in one meaningful token must not share an answer."""
+    tau = 0.01  # AGENT_DOCUMENT_CACHE_TAU default
+    pairs = [
+        ("summarize chapter 3 of the handbook", "summarize chapter 4 of the handbook"),
+        ("q1 2024 revenue", "q2 2024 revenue"),
+        ("python 3.10 release notes", "python 3.12 release notes"),
+    ]
+    for first, second in pairs:
+        distance = 1.0 - float(embed_text(first) @ embed_text(second))
+        assert distance > tau, (first, second)
+
+
+@pytest.mark.parametrize("cls", PROXIMITY_CLASSES)
+def test_proximity_cache_ttl_drops_expired_rows(cls):
+    cache = cls(capacity=4, tau=0.05, dim=3, ttl=0.05)
+    cache.put("what is x", "old", unit(1, 0, 0))
+    time.sleep(0.06)
+    assert cache.get("what is x", unit(1, 0, 0)) is None
+
+    # The refreshed entry is not shadowed by the expired one
+    cache.put("what is x", "new", unit(1, 0, 0))
+    assert cache.get("what is x", unit(1, 0, 0)) == "new"
+
+
+@pytest.mark.parametrize("cls", PROXIMITY_CLASSES)
+def test_proximity_cache_evicts_oldest_when_full(cls):
+    cache = cls(capacity=2, tau=0.01)
+    for query in ("alpha", "beta", "gamma"):
+        cache.put(query, query)
+    assert len(cache) == 2
+    assert cache.get("alpha") is None
+    assert cache.get("gamma") == "gamma"
+
+
+@pytest.mark.parametrize("quantize", [False, True])
+def test_proximity_cache_save_and_load(tmp_path, quantize):
+    path = str(tmp_path / "semantic.npz")
+    cache = ProximityCache(capacity=4, tau=0.01, quantize=quantize)
+    cache.put("alpha", {"n": 1})
+    cache.put("beta", {"n": 2})
+    cache.save(path, encode=lambda value: value["n"])
+
+    loaded = ProximityCache(capacity=4, tau=0.01, quantize=quantize)
+    loaded.load(path, decode=lambda n: {"n": n})
+    assert len(loaded) == 2
+    assert loaded.get("beta") == {"n": 2}
+
+
+def test_int8_round_trip_keeps_similarity():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((16, 256)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    quantized, scales = quantize_int8(vectors)
+    assert quantized.dtype == np.int8 and scales.shape == (16,)
+    restored = quantized.astype(np.float32) * scales[:, None]
+    assert np.abs(restored - vectors).max() <= scales.max() / 2 + 1e-6
+    assert np.allclose((restored * vectors).sum(axis=1), 1.0, atol=1e-3)
+
+    zeros, zero_scales = quantize_int8(np.zeros((1, 4)))
+    assert not zeros.any() and not zero_scales.any()
+
+
+def test_proximity_cache_concurrent_puts_keep_rows_and_values_paired():
+    cache = ProximityCache(capacity=128, tau=0.01)
+
+    def worker(k):
+        for i in range(200):
+            query = f"worker {k} query {i}"
+            cache.put(query, query)
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for query, value in cache.rows()[0]:
+        assert cache.lookup(query)[0] == value
+
+
+def test_tiered_cache_keeps_tags_apart():
+    """A near-identical query under another tag does not hide a same-tag match."""
+    cache = TieredCache(capacity=16, tau=0.2)
+    cache.put("what is the refund policy", "five results", tag=5)
+    cache.put("what is the refund policy please", "three results", tag=3)
+
+    assert cache.get("what is the refund policy today", tag=5) == "five results"
+    assert cache.get("what is the refund policy today", tag=3) == "three results"
+    assert cache.get("what is the refund policy today", tag=7) is None
+
+
+def test_tiered_cache_save_and_load_by_tag(tmp_path):
+    path = str(tmp_path / "tiered.npz")
+    cache = TieredCache(capacity=16, tau=0.2)
+    cache.put("what is the refund policy", "five", tag=5)
+    cache.put("what is the refund policy", "three", tag=3)
+    cache.save(path)
+
+    loaded = TieredCache(capacity=16, tau=0.2)
+    loaded.load(path)
+    assert loaded.get("what is the refund policy today", tag=5) == "five"
+    assert loaded.get("what is the refund policy today", tag=3) == "three"
+
+
+def test_tiered_cache_exact_only_with_ttl():
+    cache = TieredCache(capacity=16, semantic=False, ttl=0.05)
+    cache.put("weather in paris", "sunny", tag=5)
+    assert cache.get("Weather in Paris?", tag=5) == "sunny"
+    assert cache.get("weather in paris today", tag=5) is None
+
+    time.sleep(0.06)
+    assert cache.get("weather in paris", tag=5) is None
+
+
+def test_agent_tools_default_caches_answer_exact_repeats_only(monkeypatch):
+    """Out of the box a one-token change in a query is a miss, not a reuse."""
+    monkeypatch.delenv("AGENT_DOCUMENT_CACHE_SEMANTIC", raising=False)
+    from agent_tools import AgentTools, ToolResult
+
+    tools = AgentTools(seed=0)
+    searched = []
+
+    def fake_search(query, max_results):
+        searched.append(query)
+        return ToolResult(success=True, query=query, results=[], total_found=0)
+
+    monkeypatch.setattr(tools, "_search_web", fake_search)
+    first = tools.search_web("summarize chapter 3 of the handbook")
+    assert tools.search_web("summarize chapter 4 of the handbook").query.endswith("chapter 4 of the handbook")
+    assert tools.search_web("Summarize chapter 3 of the handbook?") is first
+    assert searched == ["summarize chapter 3 of the handbook", "summarize chapter 4 of the handbook"]
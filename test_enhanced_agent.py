@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Tests for the enhanced agent's model-call handling
+Agent Engineering Bootcamp - Week 3 Assignment
+
+LiteLLM's acompletion is replaced by a counting fake, so these run without
+an API key or network access.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+import pytest
+import enhanced_function_calling_agent as agent_module
+from agent_tools import ToolResult
+from cli_interface import CLIInterface
+
+
+class FakeModel:
+    """Stands in for acompletion: one search_web call, then a final answer."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, **kwargs):
+        self.calls.append(kwargs)
+        if kwargs.get("stream"):
+            return self._stream(len(self.calls))
+        return SimpleNamespace(choices=[SimpleNamespace(
+            message=SimpleNamespace(content="final answer", tool_calls=None))])
+
+    async def _stream(self, serial):
+        # A fresh tool-call id per reply, as real models do
+        function = SimpleNamespace(name="search_web", arguments=json.dumps({"query": "ai news"}))
+        call = SimpleNamespace(index=0, id=f"call_{serial}", function=function)
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=None, tool_calls=[call]))])
+
+
+async def fake_search(query, max_results=5):
+    """Stands in for the web search, answering without network access."""
+    return ToolResult(success=True, query=query, results=[], total_found=0)
+
+
+@pytest.fixture
+def make_agent(monkeypatch):
+    """Build agents with a fake model and a fake tool backend."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    for name in ("AGENT_RESPONSE_CACHE_PATH", "AGENT_SEMANTIC_CACHE", "AGENT_RESPONSE_CACHE"):
+        monkeypatch.delenv(name, raising=False)
+    model = FakeModel()
+    monkeypatch.setattr(agent_module, "acompletion", model)
+
+    def make(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        agent = agent_module.EnhancedFunctionCallingAgent(CLIInterface())
+        agent.cli.interactive = False
+        agent._regular_tools.search_web_async = fake_search
+        return agent, model
+
+    return make
+
+
+def test_repeated_temperature_zero_prompt_skips_the_model(make_agent):
+    agent, model = make_agent()
+    messages = [{"role": "user", "content": "hello"}]
+
+    async def run():
+        first = await agent._complete(messages, temperature=0)
+        second = await agent._complete(messages, temperature=0)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert second == first
+    assert len(model.calls) == 1
+
+
+def test_sampled_completions_bypass_the_cache(make_agent):
+    agent, model = make_agent()
+    messages = [{"role": "user", "content": "write a poem"}]
+
+    async def run():
+        for _ in range(2):
+            await agent._complete(messages, temperature=0.7)
+
+    asyncio.run(run())
+    assert len(model.calls) == 2
+
+
+def test_cache_key_ignores_tool_call_ids(make_agent):
+    agent, model = make_agent()
+
+    def conversation(call_id):
+        return [
+            {"role": "user", "content": "ai news?"},
+            {"role": "assistant", "content": None, "tool_calls": [{
+                "id": call_id, "type": "function",
+                "function": {"name": "search_web", "arguments": "{}"}
+            }]},
+            {"tool_call_id": call_id, "role": "tool", "name": "search_web", "content": "{}"}
+        ]
+
+    async def run():
+        await agent._complete(conversation("call_a"), temperature=0)
+        await agent._complete(conversation("call_b"), temperature=0)
+
+    asyncio.run(run())
+    assert len(model.calls) == 1
+
+
+def test_repeated_turn_reuses_the_tool_selection(make_agent):
+    agent, model = make_agent()
+
+    async def run():
+        return [await agent._run_turn("latest ai news") for _ in range(2)]
+
+    assert asyncio.run(run()) == ["final answer", "final answer"]
+    # Tool selection is cached; the sampled final answer is not
+    assert [bool(call.get("stream")) for call in model.calls] == [True, False, False]
+
+
+def test_deterministic_turn_is_fully_cached(make_agent):
+    agent, model = make_agent(AGENT_ANSWER_TEMPERATURE="0")
+
+    async def run():
+        for _ in range(2):
+            await agent._run_turn("latest ai news")
+
+    asyncio.run(run())
+    assert len(model.calls) == 2
+
+
+@pytest.mark.parametrize("arguments", ["not json", "[1, 2]", "\"query\"", "3"])
+def test_dispatch_rejects_arguments_that_are_not_an_object(make_agent, arguments):
+    agent, model = make_agent()
+
+    async def run():
+        return await agent._dispatch_tool({"id": "call_1", "name": "search_web", "arguments": arguments})
+
+    result = asyncio.run(run())
+    assert result["success"] is False
+    assert result["error"].startswith("Invalid tool arguments")
+
+
+def test_web_search_runs_on_the_loop_in_a_shared_client_session(make_agent):
+    agent, model = make_agent()
+    sessions = []
+
+    async def search(query, max_results=5):
+        sessions.append(dict(agent._regular_tools._asession_users))
+        return await fake_search(query, max_results)
+
+    agent._regular_tools.search_web_async = search
+
+    assert asyncio.run(agent.chat_with_tools("latest ai news")) == "final answer"
+    assert [list(users.values()) for users in sessions] == [[1]]
+    assert not agent._regular_tools._asession_users
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Tests for file search in the MCP server and the Windows client
+Agent Engineering Bootcamp - Week 3 Assignment
+
+Checks the result caps and that SEARCH_SKIP_DIRS are pruned, with the
+in-process scanner and (when installed) ripgrep.
+"""
+
+import asyncio
+import shutil
+import threading
+import time
+import pytest
+from mcp.server import Server
+from file_system_mcp_server import FileSystemMCPServer, _SearchResults
+from mcp_client_windows_fix import WindowsMCPClient
+
+BACKENDS = ["python", pytest.param("rg", marks=pytest.mark.skipif(
+    shutil.which("rg") is None, reason="ripgrep is not installed"))]
+
+# FileSystemMCPServer registers its handlers with the mcp 1.x decorators
+requires_server_api = pytest.mark.skipif(
+    not hasattr(Server, "list_tools"), reason="installed mcp lacks the Server decorator API")
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """Ten matching source files plus matches hidden in skipped directories."""
+    for i in range(10):
+        (tmp_path / f"module_{i}.py").write_text(f"# needle {i}\nprint('needle')\n")
+    (tmp_path / "notes.txt").write_text("needle in a text file\n")
+    for skipped in ("node_modules", ".git", "__pycache__"):
+        (tmp_path / skipped / "deep").mkdir(parents=True)
+        (tmp_path / skipped / "deep" / "hidden.py").write_text("needle\n")
+    # Files named like a skipped directory are still searched
+    (tmp_path / "build").write_text("needle in a file named build\n")
+    return tmp_path
+
+
+def server_search(root, backend, file_extension=".py", **limits):
+    server = FileSystemMCPServer(str(root))
+    if backend == "python":
+        server._rg = None
+    for name, value in limits.items():
+        setattr(server, name, value)
+    return asyncio.run(server._search_files("needle", ".", file_extension))[0].text
+
+
+def test_search_results_caps_files_and_bytes():
+    results = _SearchResults(max_files=2, max_bytes=0)
+    assert results.add("a.py", 1, ["  Line 1: x"])
+    assert results.add("b.py", 5, ["  Line 1: x"] * 3)
+    assert not results.add("c.py", 1, ["  Line 1: x"])
+    lines = results.finish()
+    assert "  ... and 2 more matches" in lines
+    assert lines[-1].startswith("... search truncated at 2 files")
+
+    by_size = _SearchResults(max_files=0, max_bytes=10)
+    assert by_size.add("a.py", 1, ["  Line 1: a long enough line"])
+    assert not by_size.add("b.py", 1, ["  Line 1: x"])
+    assert by_size.truncated
+
+
+@requires_server_api
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_server_search_prunes_skipped_dirs(tree, backend):
+    text = server_search(tree, backend)
+    assert text.count("📄") == 10
+    assert "hidden.py" not in text and "notes.txt" not in text
+    assert "truncated" not in text
+
+
+@requires_server_api
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_server_search_skips_directories_not_files(tree, backend):
+    text = server_search(tree, backend, file_extension="")
+    assert "📄 build:" in text and "notes.txt" in text
+    assert "hidden.py" not in text
+    assert "(skipped directories: .git, .hg," in text.splitlines()[0]
+
+
+@requires_server_api
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_server_search_stops_at_result_cap(tree, backend):
+    text = server_search(tree, backend, max_result_files=3)
+    assert text.count("📄") == 3
+    assert "... search truncated at 3 files" in text
+
+
+@requires_server_api
+def test_server_python_scan_keeps_a_bounded_window(tmp_path):
+    for i in range(30):
+        (tmp_path / f"module_{i:02}.py").write_text("needle\n")
+    server = FileSystemMCPServer(str(tmp_path))
+    server._SCAN_AHEAD = 4
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0, "scans": 0}
+    scan_file = server._scan_file
+
+    def counting_scan(*args):
+        with lock:
+            state["running"] += 1
+            state["scans"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.01)
+        try:
+            return scan_file(*args)
+        finally:
+            with lock:
+                state["running"] -= 1
+
+    server._scan_file = counting_scan
+    lines = asyncio.run(server._search_files_python(["needle"], tmp_path, ".py"))
+    assert sum(line.startswith("📄") for line in lines) == 30
+    assert state["peak"] <= 4
+
+    server.max_result_files = 5
+    state["scans"] = 0
+    asyncio.run(server._search_files_python(["needle"], tmp_path, ".py"))
+    assert state["scans"] <= 5 + 4
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_windows_client_search_prunes_and_caps(tree, backend):
+    client = WindowsMCPClient(str(tree))
+    if backend == "python":
+        client._rg = None
+
+    full = client._search_files_direct("needle", ".", ".py", max_results=0)["result"]
+    assert full.count("📄") == 10 and "hidden.py" not in full
+
+    capped = client._search_files_direct("needle", ".", ".py", max_results=4)["result"]
+    assert capped.count("📄") == 4
+    assert capped.rstrip().endswith("... search truncated at 4 files")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_windows_client_skips_directories_not_files(tree, backend):
+    client = WindowsMCPClient(str(tree))
+    if backend == "python":
+        client._rg = None
+
+    text = client._search_files_direct("needle", ".", "", max_results=0)["result"]
+    assert "📄 build:" in text and "notes.txt" in text
+    assert "hidden.py" not in text
+    assert "(skipped directories: .git, .hg," in text.splitlines()[0]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_skipped_directories_are_configurable(tree, backend, monkeypatch):
+    monkeypatch.setenv("FS_MCP_SEARCH_SKIP_DIRS", "node_modules, .git")
+    client = WindowsMCPClient(str(tree))
+    if backend == "python":
+        client._rg = None
+
+    text = client._search_files_direct("needle", ".", ".py", max_results=0)["result"]
+    assert text.count("hidden.py") == 1 and "__pycache__" in text
+    assert "(skipped directories: .git, node_modules)" in text.splitlines()[0]
+
+    monkeypatch.setenv("FS_MCP_SEARCH_SKIP_DIRS", "")
+    everything = WindowsMCPClient(str(tree))._search_files_direct("needle", ".", ".py", max_results=0)["result"]
+    assert everything.count("hidden.py") == 3 and "skipped directories" not in everything
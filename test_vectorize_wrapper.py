@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Tests for the Vectorize wrapper's caching
+Agent Engineering Bootcamp - Week 3 Assignment
+
+The pipeline call is replaced by a counting fake, so these run without
+credentials or network access.
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+from typing import Optional
+import numpy as np
+import pytest
+import vectorize_wrapper
+from vectorize_wrapper import RetrievedDoc, VectorizeWrapper
+
+
+class FakePipeline:
+    """Stands in for `_query_pipeline`, counting calls."""
+
+    def __init__(self, delay: float = 0.0, documents: int = 2):
+        self.delay = delay
+        self.documents = documents
+        self.calls = 0
+        self.fail = None
+        self._lock = threading.Lock()
+
+    def __call__(self, question, num_results):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.fail is not None:
+            raise self.fail
+        return tuple(
+            RetrievedDoc({"text": f"{question} doc {i}", "score": 1.0 - i / 10})
+            for i in range(min(num_results, self.documents))
+        )
+
+
+@pytest.fixture
+def make_wrapper(monkeypatch):
+    """Build wrappers with fake credentials and a fake pipeline."""
+    for name, value in zip(vectorize_wrapper._CREDENTIAL_VARS, ("org", "token", "pipeline")):
+        monkeypatch.setenv(name, value)
+    VectorizeWrapper.refresh_env()
+    monkeypatch.setattr(vectorize_wrapper, "_PIPELINES", {})
+
+    def make(pipeline: Optional[FakePipeline], **env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        wrapper = VectorizeWrapper()
+        if pipeline is not None:
+            monkeypatch.setattr(wrapper, "_query_pipeline", pipeline)
+        return wrapper
+
+    yield make
+    VectorizeWrapper.refresh_env()
+
+
+def test_repeated_questions_are_served_from_cache(make_wrapper):
+    pipeline = FakePipeline()
+    wrapper = make_wrapper(pipeline)
+
+    first = wrapper.retrieve_documents("What is RAG?", 2)
+    assert wrapper.retrieve_documents("what is rag", 2) is first
+    assert wrapper.retrieve_documents("what is rag", 3) is not first
+    assert pipeline.calls == 2
+    assert first[0].to_dict() == {
+        "content": "What is RAG? doc 0", "metadata": {"score": 1.0, "source": "vectorize"}
+    }
+
+
+def test_concurrent_misses_share_one_request(make_wrapper):
+    pipeline = FakePipeline(delay=0.1)
+    wrapper = make_wrapper(pipeline)
+    results = []
+
+    threads = [
+        threading.Thread(target=lambda: results.append(wrapper.retrieve_documents("same question", 2)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert pipeline.calls == 1
+    assert len(results) == 8 and all(result is results[0] for result in results)
+
+
+def test_batch_deduplicates_and_keeps_order(make_wrapper):
+    pipeline = FakePipeline(delay=0.05)
+    wrapper = make_wrapper(pipeline)
+
+    results = wrapper.retrieve_documents_batch(["a", "b", "a", "c"], num_results=1)
+    assert [docs[0].content for docs in results] == ["a doc 0", "b doc 0", "a doc 0", "c doc 0"]
+    assert results[0] is results[2]
+    assert pipeline.calls == 3
+
+
+def test_failures_are_negatively_cached_briefly(make_wrapper):
+    pipeline = FakePipeline()
+    pipeline.fail = RuntimeError("backend down")
+    wrapper = make_wrapper(pipeline, VECTORIZE_NEGATIVE_CACHE_TTL="0.05")
+
+    assert wrapper.retrieve_documents("question", 2) == ()
+    assert wrapper.retrieve_documents("question", 2) == ()
+    assert pipeline.calls == 1
+
+    time.sleep(0.06)
+    pipeline.fail = None
+    assert len(wrapper.retrieve_documents("question", 2)) == 2
+    assert pipeline.calls == 2
+
+
+def test_make_retriever_matches_retrieve_documents(make_wrapper):
+    pipeline = FakePipeline(documents=5)
+    wrapper = make_wrapper(pipeline)
+    wrapper._retrieval_endpoint = ("POST", "https://example.invalid", {})
+
+    retriever = wrapper.make_retriever(3)
+    documents = retriever("What is RAG?")
+    assert len(documents) == 3
+    assert wrapper.retrieve_documents("what is rag", 3) is documents
+    assert pipeline.calls == 1
+
+
+def test_semantic_entries_expire_with_the_exact_ttl(make_wrapper):
+    pipeline = FakePipeline()
+    wrapper = make_wrapper(pipeline, VECTORIZE_SEMANTIC_CACHE="1", VECTORIZE_CACHE_TTL="0.1")
+    vectors = {"what is x": [1, 0, 0.1], "explain x": [1, 0, 0.12]}
+    wrapper._embed_question = lambda question: (
+        lambda vector: vector / np.linalg.norm(vector)
+    )(np.asarray(vectors[question], dtype=np.float32))
+
+    first = wrapper.retrieve_documents("what is x", 2)
+    assert wrapper.retrieve_documents("explain x", 2) is first
+    assert pipeline.calls == 1
+
+    time.sleep(0.12)
+    assert wrapper.retrieve_documents("explain x", 2) is not first
+    assert pipeline.calls == 2
+
+
+def test_credentials_are_read_on_first_construction(monkeypatch):
+    for name in vectorize_wrapper._CREDENTIAL_VARS:
+        monkeypatch.delenv(name, raising=False)
+    VectorizeWrapper.refresh_env()
+    with pytest.raises(ValueError, match="VECTORIZE_PIPELINE_ID"):
+        VectorizeWrapper()
+
+    # Set after import and after a failed attempt, e.g. by a late load_dotenv
+    for name, value in zip(vectorize_wrapper._CREDENTIAL_VARS, ("org", "token", "pipeline")):
+        monkeypatch.setenv(name, value)
+    monkeypatch.setattr(vectorize_wrapper, "_PIPELINES", {})
+    assert VectorizeWrapper().pipeline_id == "pipeline"
+    VectorizeWrapper.refresh_env()
+
+
+def test_falls_back_to_the_public_client_method(make_wrapper):
+    """A client without the private serializer is queried through retrieve_documents."""
+    requests = []
+
+    def retrieve_documents(organization_id, pipeline_id, request):
+        requests.append((organization_id, pipeline_id, request.question, request.num_results))
+        documents = [{"text": f"{request.question} doc", "score": 0.5}]
+        return SimpleNamespace(to_dict=lambda: {"documents": documents})
+
+    wrapper = make_wrapper(None)
+    wrapper.pipelines_api = SimpleNamespace(retrieve_documents=retrieve_documents)
+
+    documents = wrapper.retrieve_documents("What is RAG?", 2)
+    assert [doc.content for doc in documents] == ["What is RAG? doc"]
+    assert requests == [("org", "pipeline", "What is RAG?", 2)]
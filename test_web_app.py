@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Tests for the enhanced web app's startup
+Agent Engineering Bootcamp - Week 3 Assignment
+
+MCP initialization is replaced by a counter, so no server is spawned.
+"""
+
+import importlib
+
+
+def test_mcp_starts_on_the_first_request_not_at_import(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    web_app = importlib.import_module("enhanced_web_app")
+    assert not web_app._init_done.is_set()
+
+    starts = []
+    monkeypatch.setattr(web_app.agent, "initialize_mcp", lambda: starts.append(1) or False)
+    client = web_app.app.test_client()
+    for _ in range(2):
+        assert client.get("/status").get_json()["agent_initialized"] is True
+    assert starts == [1]
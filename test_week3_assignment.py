@@ -16,7 +16,7 @@ else:
     from mcp_client import MCPIntegratedTools, MCPToolsWrapper
 
 
-async def test_mcp_integration():
+async def run_mcp_integration():
     """Test the MCP integration components."""
     cli = CLIInterface("Week 3 Assignment - MCP Integration Test")
     
@@ -141,6 +141,11 @@ async def test_mcp_integration():
     return True
 
 
+def test_mcp_integration():
+    """Run the async MCP integration test (pytest has no async plugin here)."""
+    return asyncio.run(run_mcp_integration())
+
+
 def test_synchronous_wrapper():
     """Test the synchronous wrapper for easier integration."""
     cli = CLIInterface("MCP Synchronous Wrapper Test")
@@ -208,7 +213,7 @@ def main():
         # Test 3: Test async integration
         cli.print_separator()
         cli.print_info("Running async MCP integration test...")
-        success = asyncio.run(test_mcp_integration())
+        success = test_mcp_integration()
         
         cli.print_separator()
         if success:
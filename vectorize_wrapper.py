@@ -1,8 +1,196 @@
 import os
-from typing import List, Dict, Any
-import vectorize_client as v
+import sys
+import socket
+import asyncio
+import logging
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, List, Dict, Any, Optional, Tuple
+import numpy as np
+import orjson
+from cache import ExactCache, HNSWProximityCache, ProximityCache
 from rag_source_base import RAGSourceBase
 
+# The Vectorize client (pydantic plus every generated model) is imported on
+# first request, so answers served from the caches never pay for it
+if TYPE_CHECKING:
+    import vectorize_client
+
+logger = logging.getLogger(__name__)
+
+# Pipeline credentials, read once per process (see VectorizeWrapper.refresh_env)
+_CREDENTIAL_VARS = ("VECTORIZE_ORGANIZATION_ID", "VECTORIZE_PIPELINE_ACCESS_TOKEN", "VECTORIZE_PIPELINE_ID")
+
+
+@functools.lru_cache(maxsize=1)
+def _credentials() -> Tuple[Tuple[Optional[str], ...], Optional[str]]:
+    """
+    Read the credentials and describe what is missing (None when complete).
+    
+    Read when the first wrapper is built rather than at import, so a .env
+    loaded after importing this module is still seen.
+    """
+    values = tuple(os.environ.get(name) for name in _CREDENTIAL_VARS)
+    missing = [name for name, value in zip(_CREDENTIAL_VARS, values) if not value]
+    error = f"Missing required Vectorize environment variables: {', '.join(missing)}" if missing else None
+    return values, error
+
+
+# HTTP statuses that signal a transient Vectorize outage, not a bad request
+_TRANSIENT_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Embedding model for the semantic result cache
+EMBEDDING_MODEL = os.getenv("VECTORIZE_EMBEDDING_MODEL", "text-embedding-3-small")
+
+# Semantic caches at least this large use an HNSW index when it is "auto"
+HNSW_MIN_ENTRIES = 100_000
+
+
+@dataclass(slots=True, frozen=True)
+class RetrievedDoc:
+    """
+    A retrieved document, backed by its decoded response object
+    (rag_source_base.RetrievedDocument).
+    
+    Nothing is copied out of the response: fields are read from the decoded
+    JSON on access, and `to_dict` builds the dict form only when asked.
+    """
+    raw: Dict[str, Any]
+    
+    @property
+    def content(self) -> str:
+        return self.raw["text"]
+    
+    @property
+    def score(self) -> Any:
+        return self.raw.get("score")
+    
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        # Document metadata overrides "score"/"source"; a missing or None
+        # `metadata` adds nothing
+        return {
+            "score": self.score,
+            "source": "vectorize",
+            **(self.raw.get("metadata") or {})
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """The {"content", "metadata"} dict older callers expect."""
+        return {"content": self.content, "metadata": self.metadata}
+
+
+# Cached results are shared between callers, so they are handed out immutable
+FrozenDocuments = Tuple[RetrievedDoc, ...]
+
+# Rough per-document cost of the wrapper and the decoded document's other
+# fields (ids, chunk and source names) beyond the text itself
+_DOCUMENT_OVERHEAD = 1024
+
+
+def _documents_size(documents: FrozenDocuments) -> int:
+    """Estimate the memory held by a cached result (dominated by the texts)."""
+    return sys.getsizeof(documents) + sum(
+        _DOCUMENT_OVERHEAD + sys.getsizeof(doc.content) for doc in documents
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _vectorize():
+    """Import the Vectorize client module on first use."""
+    import vectorize_client
+    return vectorize_client
+
+
+@functools.lru_cache(maxsize=None)
+def _get_api(access_token: str, max_concurrency: int) -> "vectorize_client.ApiClient":
+    """
+    Get the shared Vectorize API client for a token, building it on first use.
+    
+    It is built once per process and reused by every wrapper: its pool holds
+    a keep-alive socket per concurrent request, so sequential and parallel
+    calls skip the TCP + TLS handshake.
+    """
+    from urllib3.connection import HTTPConnection
+    from urllib3.util.retry import Retry
+    v = _vectorize()
+    
+    config = v.Configuration(access_token=access_token)
+    config.connection_pool_maxsize = max_concurrency
+    config.socket_options = HTTPConnection.default_socket_options + [
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    ]
+    # Retrieval is read-only, so retrying the POST is safe
+    config.retries = Retry(
+        total=3,
+        backoff_factor=0.2,
+        status_forcelist=[429, 502, 503, 504],
+        allowed_methods=None
+    )
+    return v.ApiClient(config)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_pipelines_api(access_token: str, max_concurrency: int) -> "vectorize_client.PipelinesApi":
+    """Get the pipelines endpoint group of the shared client for a token."""
+    return _vectorize().PipelinesApi(_get_api(access_token, max_concurrency))
+
+
+@functools.lru_cache(maxsize=1024)
+def _retrieval_body(question: str, num_results: int) -> bytes:
+    """
+    JSON body of a retrieval request, validated and encoded once per pair.
+    
+    Built through the generated request model, so the body (aliases,
+    defaults such as `rerank`) matches what the client itself would send.
+    """
+    request = _vectorize().RetrieveDocumentsRequest(question=question, num_results=num_results)
+    return orjson.dumps(request.to_dict())
+
+
+# Error models of the retrieval endpoint, as in the generated client
+_RETRIEVAL_ERROR_TYPES = {
+    "400": "GetWorkspaces400Response",
+    "401": "GetWorkspaces400Response",
+    "403": "GetWorkspaces400Response",
+    "404": "GetWorkspaces400Response",
+    "500": "GetWorkspaces400Response",
+}
+
+
+class _SharedPipeline:
+    """
+    Caches and request slots shared by every wrapper of one pipeline.
+    
+    Wrappers built from the same credentials (e.g. one per agent) reuse one
+    set, so memory and in-flight requests scale with distinct pipelines
+    rather than with instances.
+    """
+    
+    def __init__(self, cache_size: int, max_concurrency: int,
+                 ttl: Optional[float], max_bytes: Optional[int]):
+        """
+        Args:
+            cache_size (int): Number of exact-match results kept in memory
+            max_concurrency (int): Pipeline requests allowed in flight
+            ttl (float): Seconds an exact-match result stays valid
+            max_bytes (int): Memory budget for exact-match results
+        """
+        self.cache = ExactCache(cache_size, ttl=ttl, max_bytes=max_bytes, sizeof=_documents_size)
+        self.semantic_caches: Dict[int, ProximityCache] = {}
+        self.semantic_lock = threading.Lock()
+        self.request_slots = threading.BoundedSemaphore(max_concurrency)
+        # Pending exact-cache misses by cache key, so concurrent callers of
+        # one question share a single pipeline request
+        self.inflight: Dict[bytes, Future] = {}
+        self.inflight_lock = threading.Lock()
+
+
+_PIPELINES: Dict[Tuple[str, str, str], _SharedPipeline] = {}
+_PIPELINES_LOCK = threading.Lock()
+
 
 class VectorizeWrapper(RAGSourceBase):
     """
@@ -11,59 +199,371 @@ class VectorizeWrapper(RAGSourceBase):
     This class handles document retrieval using Vectorize.io's API.
     """
     
-    def __init__(self):
-        """Initialize the Vectorize client with credentials from environment variables."""
-        self.org_id = os.getenv("VECTORIZE_ORGANIZATION_ID")
-        self.access_token = os.getenv("VECTORIZE_PIPELINE_ACCESS_TOKEN")
-        self.pipeline_id = os.getenv("VECTORIZE_PIPELINE_ID")
+    def __init__(self, cache_size: int = 1024):
+        """
+        Initialize the Vectorize client with credentials from environment variables.
+        
+        Args:
+            cache_size (int): Number of (question, num_results) results kept in memory
+        """
+        credentials, error = _credentials()
+        if error is not None:
+            _credentials.cache_clear()  # Only complete credentials are kept
+            raise ValueError(error)
+        self.org_id, self.access_token, self.pipeline_id = credentials
+        
+        self._max_concurrency = int(os.getenv("VECTORIZE_MAX_CONCURRENCY", "16"))
+        
+        # Results expire so a re-indexed pipeline is picked up (semantic
+        # entries too), and exact matches are evicted LRU past the entry
+        # count or the memory budget
+        cache_ttl = float(os.getenv("VECTORIZE_CACHE_TTL", "900"))
+        cache_max_bytes = int(os.getenv("VECTORIZE_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+        # Empty results and failures are kept briefly, so an outage is not
+        # amplified by every caller retrying the same question at once
+        self._negative_ttl = float(os.getenv("VECTORIZE_NEGATIVE_CACHE_TTL", "5"))
         
-        if not all([self.org_id, self.access_token, self.pipeline_id]):
-            raise ValueError("Missing required Vectorize environment variables")
+        # Opt-in cache for paraphrased questions, keyed by question embedding:
+        # a question whose cosine similarity to a cached one reaches the
+        # threshold reuses its documents. One cache per result count, sized
+        # on first embedding.
+        self.semantic_cache = os.getenv("VECTORIZE_SEMANTIC_CACHE", "0") == "1"
+        self._semantic_threshold = float(os.getenv("VECTORIZE_SEMANTIC_CACHE_THRESHOLD", "0.95"))
+        self._semantic_size = int(os.getenv("VECTORIZE_SEMANTIC_CACHE_SIZE", "10000"))
+        # Rows as int8 plus a per-row scale: a quarter of the float32 memory,
+        # well within the precision a 0.95 similarity threshold needs
+        self._semantic_int8 = os.getenv("VECTORIZE_SEMANTIC_CACHE_INT8", "1") != "0"
+        # "flat" scores every row, "hnsw" walks an hnswlib graph (optional
+        # dependency), "auto" picks HNSW for caches of HNSW_MIN_ENTRIES or more
+        index = os.getenv("VECTORIZE_SEMANTIC_CACHE_INDEX", "auto")
+        self._semantic_hnsw = index == "hnsw" or (
+            index == "auto" and self._semantic_size >= HNSW_MIN_ENTRIES
+        )
         
-        # Initialize the Vectorize API client
-        self.api = v.ApiClient(v.Configuration(access_token=self.access_token))
-        self.pipelines_api = v.PipelinesApi(self.api)
+        # Caches and request slots are shared with every other wrapper of
+        # this pipeline; the first one created sizes them. Repeat
+        # (normalized question, num_results) pairs are answered from memory,
+        # and the slots cap requests in flight across all threads and
+        # batches, keeping concurrent callers under the API rate limit.
+        key = (self.org_id, self.pipeline_id, self.access_token)
+        with _PIPELINES_LOCK:
+            shared = _PIPELINES.get(key)
+            if shared is None:
+                shared = _PIPELINES[key] = _SharedPipeline(
+                    cache_size, self._max_concurrency, cache_ttl, cache_max_bytes
+                )
+        self._cache = shared.cache
+        self._semantic_caches = shared.semantic_caches
+        self._semantic_lock = shared.semantic_lock
+        self._request_slots = shared.request_slots
+        self._inflight = shared.inflight
+        self._inflight_lock = shared.inflight_lock
+    
+    @classmethod
+    def refresh_env(cls):
+        """
+        Re-read the credentials from the environment for new instances.
+        
+        They are read once, by the first wrapper built; call this after
+        changing them, e.g. when python-dotenv reloads a .env file. Existing
+        instances keep the credentials they were built with.
+        """
+        _credentials.cache_clear()
+    
+    @functools.cached_property
+    def api(self) -> "vectorize_client.ApiClient":
+        """Process-wide Vectorize API client for this token, built on first request."""
+        return _get_api(self.access_token, self._max_concurrency)
     
-    def retrieve_documents(self, question: str, num_results: int = 5) -> List[Dict[str, Any]]:
+    @functools.cached_property
+    def pipelines_api(self) -> "vectorize_client.PipelinesApi":
+        """Pipelines endpoint group of `api`, built on first request."""
+        return _get_pipelines_api(self.access_token, self._max_concurrency)
+    
+    def retrieve_documents(self, question: str, num_results: int = 5) -> FrozenDocuments:
         """
         Retrieve documents from Vectorize based on the question.
         
+        Results are cached per (normalized question, num_results). Documents
+        come back as immutable RetrievedDoc views of the response in a tuple,
+        so callers cannot alter cached entries; `to_dict` gives the dict form.
+        
         Args:
             question (str): The question to search for
             num_results (int): Number of documents to retrieve
             
         Returns:
-            List[Dict[str, Any]]: List of retrieved documents with content and metadata
+            FrozenDocuments: Retrieved documents with content and metadata
         """
+        cached = self._cache.get(question, num_results)
+        if cached is not None:
+            return cached
+        return self._fetch(question, num_results)
+    
+    def _fetch(self, question: str, num_results: int) -> FrozenDocuments:
+        """
+        Resolve an exact-cache miss, coalescing concurrent misses.
+        
+        The first caller for a cache key fetches; callers arriving while it
+        is in flight wait for its result instead of sending their own request.
+        """
+        key = self._cache.key(question, num_results)
+        with self._inflight_lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = Future()
+        
+        if not leader:
+            return flight.result()
+        
         try:
-            # Use Vectorize API to retrieve documents
-            response = self.pipelines_api.retrieve_documents(
-                self.org_id, 
-                self.pipeline_id, 
-                v.RetrieveDocumentsRequest(
-                    question=question,
-                    num_results=num_results,
-                )
-            )
-            
-            # Format the response for consistent interface
-            documents = []
-            for doc in response.documents:
-                formatted_doc = {
-                    "content": doc.text,
-                    "metadata": {
-                        "score": getattr(doc, 'score', None),
-                        "source": "vectorize",
-                        **getattr(doc, 'metadata', {})
-                    }
-                }
-                documents.append(formatted_doc)
-            
+            documents = self._fetch_once(question, num_results)
+            flight.set_result(documents)
             return documents
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+    
+    def _fetch_once(self, question: str, num_results: int) -> FrozenDocuments:
+        """Fetch documents and cache them; a failure yields an empty result."""
+        try:
+            documents = self._retrieve_uncached(question, num_results)
             
         except Exception as e:
-            print(f"Error retrieving documents from Vectorize: {e}")
+            if self._is_transient(e):
+                # Expected during rate limiting or an outage: one line, no traceback
+                logger.warning("Vectorize unavailable, returning no documents: %s", e)
+            else:
+                logger.exception("Error retrieving documents from Vectorize: %s", e)
+            documents = ()
+        
+        # Empty results (including failures) expire after the negative TTL
+        self._cache.put(question, documents, num_results,
+                        ttl=None if documents else self._negative_ttl)
+        return documents
+    
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        """Whether a retrieval error is a rate limit or server-side failure."""
+        from urllib3.exceptions import MaxRetryError
+        
+        # Statuses in the retry list surface as MaxRetryError once retries run out
+        return isinstance(error, MaxRetryError) or getattr(error, "status", None) in _TRANSIENT_STATUSES
+    
+    async def aretrieve_documents(self, question: str, num_results: int = 5) -> FrozenDocuments:
+        """
+        Async variant of `retrieve_documents` for callers on an event loop.
+        
+        Exact-cache hits are answered on the loop. Otherwise the generated
+        client has no async transport, so the blocking call runs on the
+        loop's default thread pool; many questions can be in flight without
+        stalling the loop. The caches and request slots are the same
+        (thread-safe) ones the sync path uses.
+        
+        Args:
+            question (str): The question to search for
+            num_results (int): Number of documents to retrieve
+            
+        Returns:
+            FrozenDocuments: Retrieved documents with content and metadata
+        """
+        cached = self._cache.get(question, num_results)
+        if cached is not None:
+            return cached
+        return await asyncio.to_thread(self._fetch, question, num_results)
+    
+    def retrieve_documents_batch(self, questions: List[str], num_results: int = 5,
+                                 max_concurrency: int = 16) -> List[FrozenDocuments]:
+        """
+        Retrieve documents for several questions concurrently.
+        
+        Round trips overlap on a thread pool, so N questions cost about one
+        request's latency plus N / max_concurrency of the server time instead
+        of N sequential round trips. Repeated questions are fetched once, and
+        every question still goes through the caches.
+        
+        Args:
+            questions (List[str]): Questions to search for
+            num_results (int): Number of documents to retrieve per question
+            max_concurrency (int): Maximum requests in flight for this batch
+                (VECTORIZE_MAX_CONCURRENCY still caps the process as a whole)
+            
+        Returns:
+            List[FrozenDocuments]: Documents for each question, in input order
+        """
+        unique = list(dict.fromkeys(questions))
+        if not unique:
             return []
+        
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(unique)),
+                                thread_name_prefix="vectorize") as pool:
+            results = dict(zip(unique, pool.map(
+                lambda question: self.retrieve_documents(question, num_results), unique)))
+        return [results[question] for question in questions]
+    
+    def make_retriever(self, num_results: int = 5) -> Callable[[str], FrozenDocuments]:
+        """
+        Build a `retrieve_documents` specialized for one num_results.
+        
+        Agent loops usually ask for the same number of documents every turn;
+        the returned function has it (and the cache and fetch methods) bound
+        up front, so each call is one cache lookup on a hit.
+        
+        Args:
+            num_results (int): Number of documents every call retrieves
+            
+        Returns:
+            Callable[[str], FrozenDocuments]: `retriever(question)`, with the
+                same caching and results as `retrieve_documents`
+        """
+        self._retrieval_endpoint  # resolve the URL and headers now, not on the first miss
+        cache_get = self._cache.get
+        fetch = self._fetch
+        
+        def retriever(question: str) -> FrozenDocuments:
+            cached = cache_get(question, num_results)
+            if cached is not None:
+                return cached
+            return fetch(question, num_results)
+        
+        return retriever
+    
+    def _retrieve_uncached(self, question: str, num_results: int) -> FrozenDocuments:
+        """Answer an exact-cache miss from the semantic cache or the pipeline."""
+        vector = self._embed_question(question) if self.semantic_cache else None
+        if vector is not None:
+            documents = self._semantic_lookup(question, num_results, vector)
+            if documents is not None:
+                return documents
+        
+        documents = self._query_pipeline(question, num_results)
+        if vector is not None and documents:
+            # Semantic entries get no negative ttl, so empty results stay out
+            self._semantic_store(question, num_results, documents, vector)
+        return documents
+    
+    @functools.cached_property
+    def _retrieval_endpoint(self) -> Optional[Tuple[str, str, Dict[str, str]]]:
+        """
+        Method, URL and headers (auth included) of this pipeline's retrieval call.
+        
+        Produced once by the generated client's own request serializer, so
+        per-call work is just the POST. The serializer and the REST pool are
+        private to the generated code (checked against the pinned
+        vectorize-client); None when the installed client lacks them.
+        """
+        try:
+            method, url, headers, _, _ = self.pipelines_api._retrieve_documents_serialize(
+                organization_id=self.org_id,
+                pipeline_id=self.pipeline_id,
+                retrieve_documents_request=None,
+                _request_auth=None,
+                _content_type=None,
+                _headers=None,
+                _host_index=0
+            )
+            self.api.rest_client.pool_manager
+        except (AttributeError, TypeError, ValueError) as e:
+            logger.warning("vectorize-client internals differ (%s); using the public retrieve_documents", e)
+            return None
+        return method, url, headers
+    
+    def _query_pipeline(self, question: str, num_results: int) -> FrozenDocuments:
+        """Query the Vectorize pipeline and wrap the returned documents."""
+        endpoint = self._retrieval_endpoint
+        if endpoint is None:
+            return self._query_pipeline_public(question, num_results)
+        
+        # The generated REST layer re-encodes every JSON body, so the memoized
+        # bytes go straight to the client's connection pool instead
+        method, url, headers = endpoint
+        body = _retrieval_body(question, num_results)
+        with self._request_slots:
+            raw = self.api.rest_client.pool_manager.request(method, url, body=body, headers=headers)
+        
+        if not 200 <= raw.status <= 299:
+            # Raises the generated client's ApiException for the status
+            response = _vectorize().rest.RESTResponse(raw)
+            response.read()
+            self.api.response_deserialize(response, _RETRIEVAL_ERROR_TYPES)
+        
+        # Documents stay the decoded JSON objects: validating them through the
+        # generated models costs more than the request on a fast network
+        documents = orjson.loads(raw.data).get("documents") or ()
+        return tuple([RetrievedDoc(doc) for doc in documents])
+    
+    def _query_pipeline_public(self, question: str, num_results: int) -> FrozenDocuments:
+        """Query the pipeline through the generated client's public method."""
+        request = _vectorize().RetrieveDocumentsRequest(question=question, num_results=num_results)
+        with self._request_slots:
+            response = self.pipelines_api.retrieve_documents(self.org_id, self.pipeline_id, request)
+        
+        documents = response.to_dict().get("documents") or ()
+        return tuple([RetrievedDoc(doc) for doc in documents])
+    
+    def _embed_question(self, question: str) -> Optional[np.ndarray]:
+        """Embed a question for the semantic cache; None if embedding fails."""
+        # Imported here so the wrapper stays cheap when the cache is off
+        from litellm import embedding
+        
+        try:
+            response = embedding(model=EMBEDDING_MODEL, input=[question])
+        except Exception:
+            return None
+        
+        vector = np.asarray(response.data[0]["embedding"], dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else None
+    
+    def _semantic_lookup(self, question: str, num_results: int,
+                         vector: np.ndarray) -> Optional[FrozenDocuments]:
+        """Return documents cached for an equivalent question, or None on a miss."""
+        with self._semantic_lock:
+            cache = self._semantic_caches.get(num_results)
+            if cache is None:
+                return None
+            return cache.get(question, vector)
+    
+    def _semantic_store(self, question: str, num_results: int,
+                        documents: FrozenDocuments, vector: np.ndarray):
+        """Remember documents under their question embedding."""
+        with self._semantic_lock:
+            cache = self._semantic_caches.get(num_results)
+            if cache is None:
+                cache = self._semantic_caches[num_results] = self._new_semantic_cache(len(vector))
+            cache.put(question, documents, vector)
+    
+    def _new_semantic_cache(self, dim: int) -> ProximityCache:
+        """Create a semantic cache for embeddings of dimension `dim`."""
+        options = dict(
+            capacity=self._semantic_size,
+            tau=1.0 - self._semantic_threshold,
+            dim=dim,
+            quantize=self._semantic_int8,
+            # Same lifetime as exact matches, or expired exact entries would
+            # keep being answered from here
+            ttl=self._cache.ttl
+        )
+        if self._semantic_hnsw:
+            try:
+                return HNSWProximityCache(**options)
+            except ImportError:
+                logger.warning("hnswlib is not installed; semantic cache lookups scan every entry")
+        return ProximityCache(**options)
+    
+    def cache_info(self) -> Dict[str, Any]:
+        """Hits, misses, evictions, hit rate and size of the exact-match cache."""
+        return self._cache.stats()
+    
+    def cache_clear(self):
+        """Drop every cached result, e.g. after the pipeline is re-indexed."""
+        self._cache.clear()
+        with self._semantic_lock:
+            self._semantic_caches.clear()
     
     def get_required_env_vars(self) -> List[str]:
         """